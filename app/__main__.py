@@ -1,3 +1,7 @@
+import argparse
+import asyncio
+import json
+
 import uvicorn
 
 from .main import create_app
@@ -7,5 +11,69 @@ def run() -> None:
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=False)
 
 
-if __name__ == "__main__":
+async def migrate(command: str, revision: str | None = None) -> dict[str, object]:
+    from .db import migrations
+    from .db.session import engine
+
+    try:
+        if command == "upgrade":
+            report: dict[str, object] = {"applied": await migrations.upgrade(engine, revision or migrations.HEAD)}
+        elif command == "downgrade":
+            report = {"reverted": await migrations.downgrade(engine, revision)}
+        else:
+            report = {}
+        current, head = await migrations.current_revision(engine), migrations.head_revision()
+    finally:
+        await engine.dispose()
+    return {**report, "current": current, "head": head, "up_to_date": current == head}
+
+
+async def compact_raw_plans(batch_size: int, vacuum: bool) -> dict[str, int]:
+    from .db.backfill import compact_raw_plans as compact
+    from .db.init_db import verify_db
+    from .db.session import AsyncSessionLocal, engine
+
+    await verify_db()
+    async with AsyncSessionLocal() as session:
+        report = await compact(session, batch_size=batch_size)
+    if vacuum:
+        # VACUUM cannot run inside a transaction block.
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql("VACUUM")
+    await engine.dispose()
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="Run the API server (the default); the schema must be up to date.")
+    upgrade = commands.add_parser("upgrade", help="Apply pending schema migrations.")
+    upgrade.add_argument("revision", nargs="?", default="head", help="Target revision (default: head).")
+    downgrade = commands.add_parser("downgrade", help="Revert schema migrations.")
+    downgrade.add_argument("revision", help="Target revision, -1 for one step back, or base to drop everything.")
+    commands.add_parser("current", help="Show the applied and the latest schema revision.")
+    compact = commands.add_parser(
+        "compact-raw-plans", help="Move inline raw_plan_text into compressed planblob rows."
+    )
+    compact.add_argument("--batch-size", type=int, default=200)
+    compact.add_argument("--vacuum", action="store_true", help="Reclaim the freed space afterwards.")
+    args = parser.parse_args(argv)
+    if args.command in ("upgrade", "downgrade", "current"):
+        from .db.migrations import MigrationError
+
+        try:
+            report = asyncio.run(migrate(args.command, getattr(args, "revision", None)))
+        except MigrationError as exc:
+            parser.exit(1, f"error: {exc}\n")
+        print(json.dumps(report, indent=2))
+        return
+    if args.command == "compact-raw-plans":
+        print(json.dumps(asyncio.run(compact_raw_plans(args.batch_size, args.vacuum)), indent=2))
+        return
     run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,14 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core import security
 from ..core.config import settings
-from ..models import User
+from ..core.principals import cache_principal, get_cached_principal
 from ..repositories.user_repository import UserRepository
-from ..schemas.auth import TokenPayload
+from ..schemas.auth import CurrentUser, TokenPayload
 from ..db.session import get_session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -22,16 +22,38 @@ async def get_db_session() -> AsyncSession:
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     session: Annotated[AsyncSession, Depends(get_db_session)],
-) -> User:
+) -> CurrentUser:
     payload = security.verify_access_token(token)
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     token_data = TokenPayload(**payload)
     if token_data.sub is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    cached = get_cached_principal(token_data.sub)
+    if cached is not None:
+        return cached
     repo = UserRepository(session)
     user = await repo.get_by_email(token_data.sub)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
+    principal = CurrentUser.model_validate(user)
+    cache_principal(principal)
+    return principal
+
+
+async def require_internal_access(
+    x_internal_token: Annotated[str | None, Header()] = None,
+) -> None:
+    if settings.internal_stats_token:
+        if x_internal_token != settings.internal_stats_token:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    elif settings.environment == "production":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+async def require_internal_write(
+    x_internal_token: Annotated[str | None, Header()] = None,
+) -> None:
+    # Unlike the read-only routes, writes are never open: without a configured token they are refused.
+    if not settings.internal_stats_token or x_internal_token != settings.internal_stats_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
@@ -0,0 +1,63 @@
+"""JSON responses encoded in one pass.
+
+When an endpoint returns data, FastAPI validates it against ``response_model`` again, turns it
+into plain Python objects and only then encodes it with the stdlib ``json`` module, so every
+plan is built twice. :func:`model_response` validates once and encodes with pydantic-core, and
+since it returns a ``Response``, FastAPI skips its own pass; ``response_model`` stays on the
+route for the OpenAPI schema. Plain dict payloads go through :class:`FastJSONResponse`, backed
+by orjson when it is installed.
+"""
+import json
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any, Mapping
+
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+ORJSON_AVAILABLE = find_spec("orjson") is not None
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON for data that is already JSON-compatible."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def model_response(
+    schema: Any,
+    content: Any,
+    *,
+    status_code: int = status.HTTP_200_OK,
+    response: Response | None = None,
+    headers: Mapping[str, str] | None = None,
+    exclude_unset: bool = False,
+) -> Response:
+    """Validate ``content`` (ORM objects, dicts or schema instances) against ``schema`` and encode it.
+
+    Instances of the schema are not validated again. Pass the endpoint's injected ``response``
+    to keep the headers set on it, which FastAPI drops once an endpoint returns a Response.
+    """
+    adapter = _adapter(schema)
+    body = adapter.dump_json(
+        adapter.validate_python(content, from_attributes=True), by_alias=True, exclude_unset=exclude_unset
+    )
+    result = Response(body, status_code=status_code, headers=headers, media_type="application/json")
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+    return result
@@ -1 +1 @@
-__all__ = ["auth", "expenses", "plans", "speech", "users"]
+__all__ = ["auth", "expenses", "internal", "jobs", "plans", "speech", "users"]
@@ -3,6 +3,7 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from ....api.deps import get_db_session
+from ....api.responses import model_response
 from ....core import security
 from ....core.config import settings
 from ....schemas.auth import Token, UserLogin, UserProfile, UserRegister
@@ -15,7 +16,7 @@ router = APIRouter()
 async def register_user(payload: UserRegister, session=Depends(get_db_session)):
     service = AuthService(session)
     user = await service.register(payload)
-    return UserProfile.from_orm(user)
+    return model_response(UserProfile, user, status_code=status.HTTP_201_CREATED)
 
 
 @router.post("/login", response_model=Token)
@@ -25,4 +26,4 @@ async def login(payload: UserLogin, session=Depends(get_db_session)):
     expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
     token = security.create_access_token(subject=user.email, expires_delta=expires_delta)
     expires_in = int(expires_delta.total_seconds())
-    return Token(access_token=token, expires_in=expires_in)
+    return model_response(Token, Token(access_token=token, expires_in=expires_in))
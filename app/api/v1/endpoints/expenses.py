@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, status
+from typing import AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from ....api.deps import get_current_user, get_db_session
-from ....models import User
-from ....schemas.expense import ExpenseCreate, ExpenseRead
+from ....api.responses import model_response
+from ....core.etags import matches_if_none_match, not_modified, validator_headers
+from ....db.session import AsyncSessionLocal
+from ....schemas.auth import CurrentUser
+from ....schemas.expense import ExpenseCreate, ExpenseImportResult, ExpenseRead, ExpenseSummary
+from ....services.expense_io import MEDIA_TYPES, detect_format, iter_lines, parse_rows
 from ....services.expense_service import ExpenseService
 
 router = APIRouter()
@@ -11,31 +18,107 @@ router = APIRouter()
 @router.get("", response_model=list[ExpenseRead])
 async def list_expenses(
     plan_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = ExpenseService(session)
+    etag = await service.list_etag(current_user.id, plan_id)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
     expenses = await service.list_expenses(current_user.id, plan_id)
-    return [ExpenseRead.from_orm(expense) for expense in expenses]
+    return model_response(list[ExpenseRead], expenses, response=response)
+
+
+@router.get("/summary", response_model=ExpenseSummary)
+async def summarize_expenses(
+    plan_id: int,
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = ExpenseService(session)
+    etag = await service.summary_etag(current_user.id, plan_id)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+    summary = await service.summarize_plan(current_user.id, plan_id)
+    return model_response(ExpenseSummary, summary, response=response)
+
+
+@router.post(
+    "/import",
+    response_model=ExpenseImportResult,
+    openapi_extra={
+        "requestBody": {
+            "content": {media_type: {"schema": {"type": "string"}} for media_type in MEDIA_TYPES.values()}
+        }
+    },
+)
+async def import_expenses(
+    plan_id: int,
+    request: Request,
+    format: Literal["csv", "ndjson"] | None = Query(
+        default=None, description="Body format; defaults to the one implied by Content-Type."
+    ),
+    atomic: bool = Query(default=False, description="Roll back the whole import if any row is invalid."),
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    fmt = format or detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=",
+        )
+    service = ExpenseService(session)
+    rows = parse_rows(iter_lines(request.stream()), fmt)
+    result = await service.import_expenses(current_user.id, plan_id, rows, atomic=atomic)
+    return model_response(ExpenseImportResult, result)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_expenses(
+    plan_id: int,
+    format: Literal["csv", "ndjson"] = Query(default="csv"),
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    await ExpenseService(session).ensure_plan(current_user.id, plan_id)
+
+    async def body() -> AsyncIterator[str]:
+        # The request-scoped session is closed before a streaming body is sent, so open our own.
+        async with AsyncSessionLocal() as export_session:
+            async for chunk in ExpenseService(export_session).export_expenses(plan_id, format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="plan-{plan_id}-expenses.{format}"'},
+    )
 
 
 @router.post("", response_model=ExpenseRead, status_code=status.HTTP_201_CREATED)
 async def add_expense(
     plan_id: int,
     payload: ExpenseCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = ExpenseService(session)
     expense = await service.add_expense(current_user.id, plan_id, payload)
-    return ExpenseRead.from_orm(expense)
+    return model_response(ExpenseRead, expense, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_expense(
     plan_id: int,
     expense_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = ExpenseService(session)
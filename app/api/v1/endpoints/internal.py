@@ -0,0 +1,54 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+
+from ....api.deps import get_db_session, require_internal_access, require_internal_write
+from ....core.compression import compression_stats
+from ....core.principals import principal_cache
+from ....core.security import password_hasher
+from ....services.currency import exchange_rates
+from ....services.expense_service import ledger_cache
+from ....services.geocoding import geocoder
+from ....services.plan_cache import plan_cache
+from ....services.planning_service import plan_generation_flights
+from ....services.provider_health import provider_health
+
+router = APIRouter(dependencies=[Depends(require_internal_access)])
+
+
+class ExchangeRateUpdate(BaseModel):
+    rates: dict[str, float] = Field(description="Units of each currency per one unit of EXCHANGE_RATE_BASE.")
+
+
+@router.get("/stats")
+async def read_stats() -> dict[str, Any]:
+    return {
+        "llm_providers": provider_health.stats(),
+        "plan_generation": plan_generation_flights.stats(),
+        "plan_cache": plan_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "expense_ledger_cache": ledger_cache.stats(),
+        "geocoding": geocoder.stats(),
+        "response_compression": compression_stats.stats(),
+        "exchange_rates": {"version": exchange_rates.table.version, "source": exchange_rates.table.source},
+    }
+
+
+@router.get("/exchange-rates")
+async def read_exchange_rates() -> dict[str, Any]:
+    return exchange_rates.table.as_dict()
+
+
+@router.put("/exchange-rates", dependencies=[Depends(require_internal_write)])
+async def replace_exchange_rates(payload: ExchangeRateUpdate, session=Depends(get_db_session)) -> dict[str, Any]:
+    if exchange_rates.file_backed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Rates are loaded from EXCHANGE_RATE_FILE; edit the file and restart instead",
+        )
+    if any(rate <= 0 for rate in payload.rates.values()):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Rates must be positive")
+    table = await exchange_rates.replace(session, payload.rates)
+    return table.as_dict()
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, status
+
+from ....api.deps import get_current_user, get_db_session
+from ....api.responses import model_response
+from ....models import PlanJob
+from ....schemas.auth import CurrentUser
+from ....schemas.job import PlanJobRead
+from ....schemas.plan import TravelPlanRead
+from ....services.plan_job_service import PlanJobService
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=PlanJobRead)
+async def get_job(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanJobService(session)
+    job = await service.get_job(current_user, job_id)
+    return model_response(PlanJobRead, job)
+
+
+@router.get(
+    "/{job_id}/result",
+    response_model=TravelPlanRead,
+    responses={status.HTTP_202_ACCEPTED: {"model": PlanJobRead, "description": "Job still pending"}},
+)
+async def get_job_result(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanJobService(session)
+    result = await service.get_result(current_user, job_id)
+    if isinstance(result, PlanJob):
+        return model_response(PlanJobRead, result, status_code=status.HTTP_202_ACCEPTED)
+    return model_response(TravelPlanRead, result)
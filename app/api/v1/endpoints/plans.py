@@ -1,67 +1,255 @@
-from typing import Sequence
+import logging
+from datetime import date
+from typing import Any, AsyncIterator, Literal, Sequence
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from ....api.deps import get_current_user, get_db_session
-from ....models import TravelPlan, User
-from ....schemas.plan import PlanGenerationRequest, PlanGenerationResponse, TravelPlanRead, TravelPlanUpdate
-from ....services.planning_service import PlanningService
+from ....api.responses import dumps, model_response
+from ....core.etags import matches_if_none_match, not_modified, validator_headers
+from ....db.session import AsyncSessionLocal
+from ....models import TravelPlan
+from ....schemas.auth import CurrentUser
+from ....schemas.job import PlanJobRead
+from ....schemas.plan import (
+    ActivityRead,
+    ItineraryOperation,
+    ItineraryPatchResult,
+    PlanGenerationRequest,
+    PlanGenerationResponse,
+    PlanSearchHit,
+    RouteOptimizationResult,
+    TravelPlanRead,
+    TravelPlanSummary,
+    TravelPlanUpdate,
+)
+from ....services.plan_job_service import plan_job_queue
+from ....services.planning_service import PlanningService, plan_etag
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def serialize_plan(plan: TravelPlan) -> TravelPlanRead:
-    return TravelPlanRead.from_orm(plan)
+IncludeQuery = Query(default=[], description="Extra fields to return; `raw` adds raw_plan_text.")
+
+
+def serialize_plan(plan: TravelPlan, raw_plan_text: str | None = None) -> TravelPlanRead:
+    result = TravelPlanRead.model_validate(plan)
+    result.raw_plan_text = raw_plan_text
+    return result
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
 
 
-@router.get("", response_model=list[TravelPlanRead])
+@router.get("", response_model=list[TravelPlanRead] | list[TravelPlanSummary])
 async def list_plans(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=200, description="Page size; omit to list every plan."),
+    cursor: str | None = Query(default=None, description="Value of X-Next-Cursor from the previous page."),
+    view: Literal["full", "summary"] = Query(default="full"),
+    include: list[Literal["raw"]] = IncludeQuery,
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanningService(session)
+    etag = await service.list_etag(current_user, limit=limit, cursor=cursor, summary=view == "summary")
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+    plans, next_cursor = await service.list_plans(
+        current_user, limit=limit, cursor=cursor, summary=view == "summary"
+    )
+    response.headers.update(validator_headers(etag))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if view == "summary":
+        return model_response(list[TravelPlanSummary], plans, response=response)
+    raw = await service.raw_plan_texts(plans) if "raw" in include else {}
+    return model_response(
+        list[TravelPlanRead], [serialize_plan(plan, raw.get(plan.id)) for plan in plans], response=response
+    )
+
+
+@router.get("/search", response_model=list[PlanSearchHit])
+async def search_plans(
+    q: str = Query(
+        min_length=1, max_length=200, description="Words to find in titles, destinations, activities and notes."
+    ),
+    limit: int = Query(default=20, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = PlanningService(session)
-    plans = await service.list_plans(current_user)
-    return [serialize_plan(plan) for plan in plans]
+    hits = await service.search_plans(current_user, q, limit=limit)
+    return model_response(list[PlanSearchHit], hits)
 
 
-@router.post("/generate", response_model=PlanGenerationResponse, status_code=status.HTTP_201_CREATED)
+@router.get("/activities", response_model=list[ActivityRead])
+async def list_activities(
+    on_date: date | None = Query(default=None, alias="date", description="Only activities on this day."),
+    plan_id: int | None = Query(default=None),
+    with_coordinates: bool = Query(default=False, description="Only activities that have latitude/longitude."),
+    limit: int = Query(default=500, ge=1, le=5000),
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanningService(session)
+    activities = await service.list_activities(
+        current_user, on_date=on_date, plan_id=plan_id, with_coordinates=with_coordinates, limit=limit
+    )
+    return model_response(list[ActivityRead], activities)
+
+
+@router.post(
+    "/generate",
+    response_model=PlanGenerationResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": PlanJobRead, "description": "Queued as a background job"}},
+)
 async def generate_plan(
     payload: PlanGenerationRequest,
-    current_user: User = Depends(get_current_user),
+    run_async: bool = Query(default=False, alias="async", description="Queue the generation and return a job."),
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
+    if run_async:
+        job = await plan_job_queue.submit(session, current_user, payload)
+        return model_response(
+            PlanJobRead,
+            job,
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"/api/v1/plans/jobs/{job.id}"},
+        )
     service = PlanningService(session)
     plan = await service.generate_plan(current_user, payload)
-    return PlanGenerationResponse(plan=serialize_plan(plan))
+    return model_response(
+        PlanGenerationResponse, PlanGenerationResponse(plan=serialize_plan(plan)), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post("/generate/stream", response_class=StreamingResponse)
+async def generate_plan_stream(
+    payload: PlanGenerationRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    async def event_stream() -> AsyncIterator[str]:
+        # The request-scoped session is closed before a streaming body is sent, so open our own.
+        async with AsyncSessionLocal() as session:
+            service = PlanningService(session)
+            try:
+                async for event, data in service.stream_plan(current_user, payload):
+                    if event == "plan":
+                        data = serialize_plan(data).model_dump(mode="json")
+                    yield format_sse(event, data)
+            except HTTPException as exc:
+                yield format_sse("error", {"status_code": exc.status_code, "detail": exc.detail})
+            except Exception:  # noqa: BLE001
+                # The 200 and earlier events are already sent: end the stream with an error event
+                # rather than cutting it off, and keep the cause in the log.
+                logger.exception("Plan stream for user %s failed", current_user.id)
+                yield format_sse(
+                    "error",
+                    {"status_code": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": "Plan generation failed"},
+                )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{plan_id}", response_model=TravelPlanRead)
 async def get_plan(
     plan_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    include: list[Literal["raw"]] = IncludeQuery,
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = PlanningService(session)
+    # Checked against the version columns alone, before the itinerary and expenses are loaded.
+    etag = await service.plan_etag(current_user, plan_id)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
     plan = await service.get_plan(current_user, plan_id)
-    return serialize_plan(plan)
+    response.headers.update(validator_headers(plan_etag(plan.id, plan.version, plan.expenses_version)))
+    raw = await service.raw_plan_texts([plan]) if "raw" in include else {}
+    return model_response(TravelPlanRead, serialize_plan(plan, raw.get(plan.id)), response=response)
 
 
 @router.patch("/{plan_id}", response_model=TravelPlanRead)
 async def update_plan(
     plan_id: int,
     payload: TravelPlanUpdate,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    if_match: str | None = Header(default=None, description="ETag of the plan being edited."),
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanningService(session)
+    updated = await service.update_plan(
+        current_user, plan_id, payload.model_dump(exclude_unset=True), if_match=if_match
+    )
+    response.headers.update(validator_headers(plan_etag(updated.id, updated.version, updated.expenses_version)))
+    return model_response(TravelPlanRead, serialize_plan(updated), response=response)
+
+
+@router.patch("/{plan_id}/itinerary", response_model=ItineraryPatchResult, response_model_exclude_unset=True)
+async def patch_itinerary(
+    plan_id: int,
+    operations: list[ItineraryOperation],
+    response: Response,
+    if_match: str | None = Header(default=None, description="ETag of the plan being edited (required)."),
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanningService(session)
+    plan, changes = await service.patch_itinerary(current_user, plan_id, operations, if_match=if_match)
+    response.headers.update(validator_headers(plan_etag(plan.id, plan.version, plan.expenses_version)))
+    return model_response(
+        ItineraryPatchResult, ItineraryPatchResult(changes=changes), response=response, exclude_unset=True
+    )
+
+
+@router.post("/{plan_id}/geocode", response_model=TravelPlanRead)
+async def geocode_plan(
+    plan_id: int,
+    response: Response,
+    if_match: str | None = Header(default=None, description="ETag of the plan being edited."),
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = PlanningService(session)
+    plan = await service.geocode_plan(current_user, plan_id, if_match=if_match)
+    response.headers.update(validator_headers(plan_etag(plan.id, plan.version, plan.expenses_version)))
+    return model_response(TravelPlanRead, serialize_plan(plan), response=response)
+
+
+@router.post("/{plan_id}/optimize-route", response_model=RouteOptimizationResult)
+async def optimize_route(
+    plan_id: int,
+    response: Response,
+    dry_run: bool = Query(default=False, description="Report the shorter order without saving it."),
+    if_match: str | None = Header(default=None, description="ETag of the plan being edited."),
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = PlanningService(session)
-    updated = await service.update_plan(current_user, plan_id, payload.model_dump(exclude_unset=True))
-    return serialize_plan(updated)
+    plan, result = await service.optimize_route(current_user, plan_id, if_match=if_match, dry_run=dry_run)
+    response.headers.update(validator_headers(plan_etag(plan.id, plan.version, plan.expenses_version)))
+    return model_response(RouteOptimizationResult, result, response=response)
 
 
 @router.delete("/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_plan(
     plan_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session=Depends(get_db_session),
 ):
     service = PlanningService(session)
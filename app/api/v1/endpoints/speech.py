@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, File, Form, UploadFile
 
+from ....api.responses import model_response
 from ....schemas.speech import SpeechTranscriptionResponse
 from ....services.speech_service import SpeechService
 
@@ -13,4 +14,5 @@ async def transcribe_speech(
     language: str = Form(default="zh_cn"),
 ):
     service = SpeechService()
-    return await service.transcribe(audio_file=audio, transcript_text=transcript_text, language=language)
+    result = await service.transcribe(audio_file=audio, transcript_text=transcript_text, language=language)
+    return model_response(SpeechTranscriptionResponse, result)
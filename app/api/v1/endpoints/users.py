@@ -1,12 +1,23 @@
 from fastapi import APIRouter, Depends
 
-from ....api.deps import get_current_user
-from ....models import User
-from ....schemas.auth import UserProfile
+from ....api.deps import get_current_user, get_db_session
+from ....api.responses import model_response
+from ....schemas.auth import CurrentUser, UserProfile
+from ....schemas.expense import ExpenseRollup
+from ....services.expense_service import ExpenseService
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserProfile)
-async def read_current_user(current_user: User = Depends(get_current_user)):
-    return UserProfile.from_orm(current_user)
+async def read_current_user(current_user: CurrentUser = Depends(get_current_user)):
+    return model_response(UserProfile, current_user)
+
+
+@router.get("/me/expenses/summary", response_model=ExpenseRollup)
+async def summarize_my_expenses(
+    current_user: CurrentUser = Depends(get_current_user),
+    session=Depends(get_db_session),
+):
+    service = ExpenseService(session)
+    return model_response(ExpenseRollup, await service.summarize_user(current_user.id))
@@ -0,0 +1,293 @@
+"""Response compression negotiated from ``Accept-Encoding``: zstd, brotli and gzip.
+
+zstd needs the ``zstandard`` package and brotli the ``brotli`` package; codings whose package
+is missing are not offered. Bodies below ``COMPRESSION_MINIMUM_SIZE``, event streams, responses
+that already carry a ``Content-Encoding`` and non-text media types are sent as they are.
+
+A compressed response's ``ETag`` gets the coding as a suffix (``"abc-gzip"``), since a strong
+tag names exact bytes; :mod:`app.core.etags` strips it again when comparing preconditions.
+
+Compression runs on the event loop, so its CPU time is measured per response: buffered
+responses report it in a ``Server-Timing: compress`` header, and :data:`compression_stats`
+totals it per coding and per body size for ``/internal/stats``.
+"""
+import time
+import zlib
+from collections import Counter, defaultdict
+from importlib.util import find_spec
+from typing import Any, Protocol, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .etags import encoded_etag
+
+BROTLI_AVAILABLE = find_spec("brotli") is not None
+ZSTD_AVAILABLE = find_spec("zstandard") is not None
+
+COMPRESSIBLE_TYPES = frozenset(
+    {"application/json", "application/x-ndjson", "application/javascript", "application/xml", "image/svg+xml"}
+)
+# Upper bounds (bytes) of the body-size buckets CPU time is reported in.
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144)
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings(names: Sequence[str] | None = None) -> list[str]:
+    """Configured codings, in preference order, whose package is installed."""
+    installed = {"zstd": ZSTD_AVAILABLE, "br": BROTLI_AVAILABLE, "gzip": True}
+    return [
+        name
+        for name in (coding.lower() for coding in (names or settings.compression_encodings))
+        if installed.get(name, False)
+    ]
+
+
+def new_compressor(encoding: str) -> Compressor:
+    if encoding == "gzip":
+        return zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+    if encoding == "br":
+        return _BrotliCompressor(settings.compression_brotli_quality)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=settings.compression_zstd_level).compressobj()
+    raise ValueError(f"Unknown content coding: {encoding}")
+
+
+def negotiate(accept_encoding: str, offered: Sequence[str]) -> str | None:
+    """The offered coding with the highest q-value in ``accept_encoding``; ties go to the earlier offer."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for coding in offered:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def size_bucket(size: int) -> str:
+    for limit in SIZE_BUCKETS:
+        if size < limit:
+            return f"<{limit // 1024}KiB"
+    return f">={SIZE_BUCKETS[-1] // 1024}KiB"
+
+
+def _summary(row: dict[str, float]) -> dict[str, Any]:
+    responses = row["responses"]
+    return {
+        "responses": int(responses),
+        "bytes_in": int(row["bytes_in"]),
+        "bytes_out": int(row["bytes_out"]),
+        "ratio": round(row["bytes_out"] / row["bytes_in"], 3) if row["bytes_in"] else None,
+        "cpu_ms": round(row["cpu_seconds"] * 1000, 2),
+        "cpu_ms_per_response": round(row["cpu_seconds"] * 1000 / responses, 3) if responses else None,
+        "saved_bytes_per_response": int((row["bytes_in"] - row["bytes_out"]) / responses) if responses else None,
+    }
+
+
+class CompressionStats:
+    """CPU time and bytes saved, per coding and per body size, plus why responses were left alone."""
+
+    def __init__(self) -> None:
+        self.encodings: dict[str, dict[str, float]] = defaultdict(self._row)
+        self.sizes: dict[str, dict[str, float]] = defaultdict(self._row)
+        self.skipped: Counter[str] = Counter()
+
+    @staticmethod
+    def _row() -> dict[str, float]:
+        return {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        for row in (self.encodings[encoding], self.sizes[size_bucket(bytes_in)]):
+            row["responses"] += 1
+            row["bytes_in"] += bytes_in
+            row["bytes_out"] += bytes_out
+            row["cpu_seconds"] += cpu_seconds
+
+    def skip(self, reason: str) -> None:
+        self.skipped[reason] += 1
+
+    def stats(self) -> dict[str, Any]:
+        buckets = [size_bucket(limit - 1) for limit in SIZE_BUCKETS] + [size_bucket(SIZE_BUCKETS[-1])]
+        return {
+            "enabled": settings.compression_enabled,
+            "encodings_offered": available_encodings(),
+            "minimum_size": settings.compression_minimum_size,
+            "by_encoding": {name: _summary(row) for name, row in self.encodings.items()},
+            "by_size": {bucket: _summary(self.sizes[bucket]) for bucket in buckets if bucket in self.sizes},
+            "skipped": dict(self.skipped),
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses with the best coding both sides support."""
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int | None = None, encodings: Sequence[str] | None = None
+    ) -> None:
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+        self.encodings = available_encodings(encodings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""), self.encodings)
+        responder = _CompressingResponder(
+            send, encoding, self.minimum_size, request_headers.get("if-none-match", "")
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Holds ``http.response.start`` until the first body chunk shows whether to compress."""
+
+    def __init__(self, send: Send, encoding: str | None, minimum_size: int, if_none_match: str = "") -> None:
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.if_none_match = if_none_match
+        self.start: Message | None = None
+        self.compressor: Compressor | None = None
+        self.bytes_in = self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def _skip_reason(self, headers: MutableHeaders, size: int | None) -> str | None:
+        if "content-encoding" in headers:
+            return "encoded"
+        if "content-range" in headers:
+            return "partial"
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("text/event-stream"):
+            return "event_stream"
+        if not _compressible(content_type):
+            return "media_type"
+        if "no-transform" in headers.get("cache-control", ""):
+            return "no_transform"
+        # From here on the body depends on the request: a later, larger body of the same resource
+        # may be compressed, so even small ones vary.
+        headers.add_vary_header("Accept-Encoding")
+        if size is not None and size < self.minimum_size:
+            return "small"
+        if self.encoding is None:
+            return "not_accepted"
+        return None
+
+    def _compress(self, data: bytes, finish: bool) -> bytes:
+        started = time.thread_time()
+        output = self.compressor.compress(data)
+        if finish:
+            output += self.compressor.flush()
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(data)
+        self.bytes_out += len(output)
+        return output
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.start is not None:
+            await self._first_body(body, more_body)
+            return
+        if self.compressor is None:
+            await self._send(message)
+            return
+        await self._send({**message, "body": self._compress(body, finish=not more_body)})
+        if not more_body:
+            compression_stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+
+    def _not_modified(self, headers: MutableHeaders) -> None:
+        """Give a 304 the tag the client validated with: the encoded one if it sent that."""
+        etag = headers.get("etag")
+        if etag is None:
+            return
+        headers.add_vary_header("Accept-Encoding")
+        listed = {tag.strip().removeprefix("W/") for tag in self.if_none_match.split(",")}
+        if self.encoding and encoded_etag(etag, self.encoding) in listed:
+            headers["ETag"] = encoded_etag(etag, self.encoding)
+
+    async def _first_body(self, body: bytes, more_body: bool) -> None:
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        if start["status"] == 304:
+            self._not_modified(headers)
+            await self._send({**start, "headers": headers.raw})
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+        if more_body:
+            declared = headers.get("content-length")
+            size = int(declared) if declared and declared.isdigit() else None
+        else:
+            size = len(body)
+        reason = self._skip_reason(headers, size)
+        if reason is not None:
+            compression_stats.skip(reason)
+            await self._send({**start, "headers": headers.raw})
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+        self.compressor = new_compressor(self.encoding)
+        compressed = self._compress(body, finish=not more_body)
+        headers["Content-Encoding"] = self.encoding
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+            headers.append("Server-Timing", f'compress;dur={self.cpu_seconds * 1000:.3f};desc="{self.encoding}"')
+            compression_stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+        await self._send({**start, "headers": headers.raw})
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
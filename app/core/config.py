@@ -16,12 +16,106 @@ class Settings(BaseSettings):
     secret_key: str = Field(default="change-me")
     access_token_expire_minutes: int = 60 * 24
     jwt_algorithm: str = "HS256"
+    principal_cache_enabled: bool = Field(default=True, description="Cache authenticated users by token subject.")
+    principal_cache_size: int = 1024
+    principal_cache_ttl_seconds: float = 300.0
+    password_hash_executor: str = Field(default="thread", description="thread|process|inline")
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64
     database_url: str = Field(default="sqlite+aiosqlite:///./travel_planner.db")
+    database_profile: str = Field(
+        default="production", description="production|basic; basic leaves SQLAlchemy's defaults (for comparison)."
+    )
+    sqlite_busy_timeout_ms: int = Field(default=5000, description="How long a writer waits for the lock.")
+    sqlite_pool_size: int = Field(default=4, description="Connections per process; SQLite has a single writer.")
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    database_pool_size: int = Field(default=10, description="Postgres connections kept per process.")
+    database_max_overflow: int = 20
+    database_pool_timeout_seconds: float = 30.0
+    database_pool_recycle_seconds: int = 1800
+    database_statement_timeout_ms: int = Field(default=30_000, description="Postgres statement_timeout per session.")
+    query_count_header: bool = Field(default=False, description="Expose X-Query-Count on every response.")
+
+    compression_enabled: bool = Field(default=True, description="Compress responses per the client's Accept-Encoding.")
+    compression_encodings: list[str] = Field(
+        default_factory=lambda: ["zstd", "br", "gzip"],
+        description="Preference order; zstd needs zstandard and br needs brotli, otherwise they are skipped.",
+    )
+    compression_minimum_size: int = Field(default=1024, description="Smaller bodies are sent uncompressed.")
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
 
     llm_provider: str = Field(default="mock", description="mock|dashscope|openai")
     llm_model: str = Field(default="qwen-turbo")
     llm_endpoint: str | None = None
     llm_api_key: str | None = None
+    llm_fallback_providers: list[str] = Field(
+        default_factory=list, description="Providers tried in order when the primary fails, e.g. [\"openai\", \"mock\"]."
+    )
+    llm_provider_api_keys: dict[str, str] = Field(default_factory=dict, description="API keys for fallback providers.")
+    llm_provider_endpoints: dict[str, str] = Field(default_factory=dict, description="Endpoints for fallback providers.")
+    llm_max_retries: int = 2
+    llm_retry_backoff_seconds: float = 0.5
+    llm_retry_backoff_max_seconds: float = 8.0
+    llm_rate_limit_per_minute: dict[str, int] = Field(default_factory=lambda: {"dashscope": 60, "openai": 60})
+    llm_rate_limit_burst: int = 5
+    llm_rate_limit_max_wait_seconds: float = 2.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_recovery_seconds: float = 30.0
+    llm_mock_stream_chunk_size: int = Field(default=64, description="Characters per chunk when the mock provider streams.")
+    llm_mock_stream_delay_seconds: float = Field(default=0.0, description="Delay between mock streaming chunks.")
+
+    plan_cache_enabled: bool = True
+    plan_cache_ttl_seconds: float = 7 * 24 * 3600
+    plan_cache_memory_size: int = 256
+    plan_cache_max_entries: int = 5000
+
+    raw_plan_codec: str = Field(default="zlib", description="zstd|zlib|none; zstd needs the zstandard package.")
+    raw_plan_compression_level: int = 9
+    raw_plan_blob_grace_seconds: float = Field(
+        default=3600.0, description="compact-raw-plans keeps younger unreferenced blobs; their plan may not be committed yet."
+    )
+
+    plan_job_workers: int = Field(default=8, description="Maximum plan generation jobs running at once.")
+    plan_job_provider_concurrency: dict[str, int] = Field(
+        default_factory=lambda: {"dashscope": 2, "openai": 2, "mock": 8}
+    )
+    plan_job_default_concurrency: int = 2
+    plan_job_lease_seconds: float = Field(
+        default=300.0, description="Jobs whose worker has not renewed their lease for this long are taken over."
+    )
+    plan_job_sweep_interval_seconds: float = Field(
+        default=60.0, description="How often each worker renews its jobs' leases and takes over expired ones."
+    )
+
+    expense_import_batch_size: int = Field(default=500, description="Rows inserted per statement during bulk import.")
+    expense_import_max_errors: int = Field(default=100, description="Row errors listed in an import report.")
+    expense_export_batch_size: int = Field(default=1000, description="Rows fetched per round trip during export.")
+
+    exchange_rate_base: str = Field(default="CNY", description="Currency the rate table is quoted against.")
+    exchange_rate_file: str | None = Field(
+        default=None, description="JSON or CSV rate table; when unset, rates come from the exchangerate table."
+    )
+    exchange_rate_reload_seconds: float = Field(
+        default=30.0,
+        description="Reload the rate table this often, so every worker picks up updates; 0 disables.",
+    )
+    expense_summary_cache_size: int = 1024
+    expense_summary_cache_ttl_seconds: float = 300.0
+
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_connect_timeout_seconds: float = 5.0
+    http_read_timeout_seconds: float = 45.0
+    http_write_timeout_seconds: float = 10.0
+    http_pool_timeout_seconds: float = 5.0
+    http_max_clients: int = Field(
+        default=32, description="Clients kept for upstreams other than the configured ones; least recently used first out."
+    )
+    http2_enabled: bool = Field(default=True, description="Negotiate HTTP/2 when the h2 package is installed.")
 
     speech_provider: str = Field(default="web", description="web|iflytek")
     iflytek_app_id: str | None = None
@@ -29,6 +123,27 @@ class Settings(BaseSettings):
     iflytek_api_secret: str | None = None
 
     amap_api_key: str | None = None
+    geocoding_provider: str = Field(
+        default="auto", description="auto|amap|local|none; auto uses AMap when AMAP_API_KEY is set."
+    )
+    geocoding_concurrency: int = Field(default=4, description="Provider lookups in flight at once.")
+    geocoding_timeout_seconds: float = Field(default=3.0, description="Budget for geocoding one plan.")
+    geocode_cache_memory_size: int = 4096
+    geocode_cache_ttl_seconds: float = 24 * 3600
+    geocode_negative_ttl_seconds: float = Field(
+        default=24 * 3600, description="How long an address the provider could not place is remembered."
+    )
+    route_optimization_enabled: bool = Field(
+        default=False, description="Reorder each day's activities into the shortest walk after generation."
+    )
+
+    internal_stats_token: str | None = Field(
+        default=None,
+        description=(
+            "Token required in X-Internal-Token for /internal endpoints in production; "
+            "write endpoints always require it and are refused while it is unset."
+        ),
+    )
 
     static_dir: Path = Field(default=Path("app/static"))
     template_dir: Path = Field(default=Path("app/templates"))
@@ -0,0 +1,69 @@
+import hashlib
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """Strong, opaque entity tag for the given version components."""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+# Content codings the compression middleware applies; see ``encoded_etag``.
+CODINGS = ("gzip", "br", "zstd")
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """The tag of the ``coding``-compressed representation: ``"abc"`` becomes ``"abc-gzip"``.
+
+    A strong tag identifies exact bytes, so the compressed body must not reuse the identity
+    body's tag. Tags from :func:`make_etag` are hex, so the suffix cannot be mistaken for them.
+    """
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _without_coding(tag: str) -> str:
+    for coding in CODINGS:
+        if tag.endswith(f'-{coding}"'):
+            return tag[: -len(coding) - 2] + '"'
+    return tag
+
+
+def _listed_tags(header: str) -> list[str]:
+    """The tags in an If-Match/If-None-Match header, with any content-coding suffix removed.
+
+    Preconditions are about the resource, so a tag received with a compressed body matches the
+    tag the endpoint computes for the identity body.
+    """
+    return [_without_coding(tag.strip()) for tag in header.split(",") if tag.strip()]
+
+
+def matches_if_none_match(request: Request, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 prescribes for If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = _listed_tags(header)
+    return "*" in tags or etag in {tag.removeprefix("W/") for tag in tags}
+
+
+def check_if_match(header: str | None, etag: str) -> None:
+    """Strong comparison for If-Match; raise 412 when the client's copy is out of date."""
+    if not header:
+        return
+    tags = _listed_tags(header)
+    if "*" not in tags and etag not in tags:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Plan has been modified; fetch it again before updating",
+            headers={"ETag": etag},
+        )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag))
+
+
+def validator_headers(etag: str) -> dict[str, str]:
+    # "no-cache" lets browsers keep the body but revalidate it (If-None-Match) on every use.
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
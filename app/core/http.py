@@ -0,0 +1,91 @@
+import asyncio
+from collections import OrderedDict
+from importlib.util import find_spec
+from typing import Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import settings
+
+HTTP2_AVAILABLE = find_spec("h2") is not None
+# An evicted client may still be serving a request (an LLM stream can run for minutes), so it is
+# closed this many seconds later rather than at once.
+EVICTED_CLOSE_DELAY_SECONDS = 300.0
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HTTPClientPool:
+    """Long-lived ``httpx.AsyncClient`` instances, one per upstream origin.
+
+    Origins passed to :meth:`startup` (the configured upstreams) keep their client. Any other
+    origin, e.g. a user's own LLM endpoint, gets one of ``max_clients`` slots; beyond that the
+    least recently used client is evicted and closed.
+    """
+
+    def __init__(self, max_clients: int | None = None) -> None:
+        self.max_clients = settings.http_max_clients if max_clients is None else max_clients
+        self._pinned: dict[str, httpx.AsyncClient] = {}
+        self._clients: OrderedDict[str, httpx.AsyncClient] = OrderedDict()
+        self._evicted: dict[asyncio.Task, httpx.AsyncClient] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.http2_enabled and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.http_connect_timeout_seconds,
+                read=settings.http_read_timeout_seconds,
+                write=settings.http_write_timeout_seconds,
+                pool=settings.http_pool_timeout_seconds,
+            ),
+        )
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        origin = _origin(url)
+        client = self._pinned.get(origin)
+        if client is not None and not client.is_closed:
+            return client
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[origin] = client
+            while len(self._clients) > self.max_clients:
+                self._evict(self._clients.popitem(last=False)[1])
+        self._clients.move_to_end(origin)
+        return client
+
+    def _evict(self, client: httpx.AsyncClient) -> None:
+        async def close() -> None:
+            await asyncio.sleep(EVICTED_CLOSE_DELAY_SECONDS)
+            await client.aclose()
+
+        task = asyncio.get_running_loop().create_task(close())
+        self._evicted[task] = client
+        task.add_done_callback(lambda done: self._evicted.pop(done, None))
+
+    async def startup(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            origin = _origin(url)
+            self._pinned[origin] = self._clients.pop(origin, None) or self._build_client()
+
+    async def aclose(self) -> None:
+        clients = [*self._pinned.values(), *self._clients.values(), *self._evicted.values()]
+        for task in self._evicted:
+            task.cancel()
+        self._pinned.clear()
+        self._clients.clear()
+        self._evicted.clear()
+        for client in clients:
+            await client.aclose()
+
+
+http_clients = HTTPClientPool()
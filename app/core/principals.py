@@ -0,0 +1,24 @@
+from ..schemas.auth import CurrentUser
+from .cache import TTLCache
+from .config import settings
+
+principal_cache: TTLCache[str, CurrentUser] = TTLCache(
+    settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+)
+
+
+def get_cached_principal(subject: str) -> CurrentUser | None:
+    if not settings.principal_cache_enabled:
+        return None
+    return principal_cache.get(subject)
+
+
+def cache_principal(principal: CurrentUser) -> None:
+    if settings.principal_cache_enabled:
+        principal_cache.set(principal.email, principal)
+
+
+def invalidate_principal(subject: str) -> None:
+    """Drop a cached principal; call whenever the user's profile row changes."""
+    principal_cache.pop(subject)
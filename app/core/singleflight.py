@@ -0,0 +1,51 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Collapse concurrent calls that share a key into a single in-flight awaitable.
+
+    The shared work runs in its own task, so a caller that disconnects does not cancel the
+    upstream call for everyone else waiting on the same key.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task[T]] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return ``(result, leader)``; ``leader`` is true for the caller that triggered the work.
+
+        Every caller, the leader included, receives its own deep copy: callers resume in no
+        particular order, so one editing the shared result would change what the others see.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        leader = task is None
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result), leader
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[T]") -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark as retrieved when every caller has gone away
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models import TravelPlan
+from ..repositories.blob_repository import BlobRepository
+from ..repositories.plan_repository import TravelPlanRepository
+from ..repositories.search_repository import SearchRepository
+from ..services.blob_store import BlobStore
+from ..services.plan_search import PlanSearchService
+
+
+async def backfill_search_index(session: AsyncSession, *, batch_size: int = 200) -> int:
+    """Index plans missing from ``plansearch`` (created before it existed). Returns how many."""
+    plans = TravelPlanRepository(session)
+    search = PlanSearchService(session)
+    missing = SearchRepository(session)
+    indexed = 0
+    last_id = 0
+    while True:
+        plan_ids = await missing.unindexed_plan_ids(last_id, batch_size)
+        if not plan_ids:
+            return indexed
+        await search.index_plans(await plans.get_many_for_search(plan_ids))
+        await session.commit()
+        session.expunge_all()  # the loaded plans are not needed again; keep memory flat
+        indexed += len(plan_ids)
+        last_id = plan_ids[-1]
+
+
+async def compact_raw_plans(session: AsyncSession, *, batch_size: int = 200) -> dict[str, int]:
+    """Move inline ``travelplan.raw_plan_text`` into compressed, deduplicated planblob rows.
+
+    Also drops blobs no plan references any more (their plans were deleted). Idempotent;
+    returns what was moved and what the blob table holds afterwards.
+    """
+    store = BlobStore(session)
+    plans = inline_bytes = 0
+    last_id = 0
+    while True:
+        result = await session.execute(
+            select(TravelPlan.id, TravelPlan.raw_plan_legacy)
+            .where(TravelPlan.id > last_id, TravelPlan.raw_plan_legacy.is_not(None))
+            .order_by(TravelPlan.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            break
+        for plan_id, text in rows:
+            digest = await store.put_text(text)
+            await session.execute(
+                update(TravelPlan)
+                .where(TravelPlan.id == plan_id)
+                # Storage-only change: the plan's content, version and updated_at stay as they were.
+                .values(raw_plan_digest=digest, raw_plan_legacy=None, updated_at=TravelPlan.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            plans += 1
+            inline_bytes += len(text.encode("utf-8"))
+        await session.commit()
+        last_id = rows[-1].id
+    blobs = BlobRepository(session)
+    grace = timedelta(seconds=settings.raw_plan_blob_grace_seconds)
+    removed = await blobs.delete_unreferenced(datetime.now(timezone.utc) - grace)
+    await session.commit()
+    count, size, stored = await blobs.totals()
+    return {
+        "plans_compacted": plans,
+        "inline_bytes": inline_bytes,
+        "blobs_removed": removed,
+        "blobs": count,
+        "blob_bytes": size,
+        "blob_stored_bytes": stored,
+    }
@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.engine.url import URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from ..core.config import settings
+
+PROFILES = ("production", "basic")
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Options for ``create_async_engine`` plus the PRAGMAs run on every new SQLite connection."""
+
+    name: str
+    engine_options: dict[str, Any] = field(default_factory=dict)
+    sqlite_pragmas: tuple[tuple[str, Any], ...] = ()
+
+
+def engine_profile(database_url: str, name: str | None = None) -> EngineProfile:
+    """Resolve a named profile for the URL's backend.
+
+    ``production`` tunes the backend: a connection pool, WAL and friends for SQLite; a sized,
+    pre-pinged pool and a statement timeout for Postgres. ``basic`` keeps SQLAlchemy's defaults.
+    Both turn on SQLite foreign keys, which the schema's ``ON DELETE CASCADE`` clauses depend on.
+    """
+    name = (name or settings.database_profile).lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile {name!r}; expected one of {', '.join(PROFILES)}")
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        pragmas: list[tuple[str, Any]] = [("foreign_keys", "ON")]
+        options: dict[str, Any] = {}
+        if name == "production":
+            if url.database and url.database != ":memory:" and "mode=memory" not in str(url):
+                # aiosqlite defaults to NullPool: a new connection (and thread) per session. A few
+                # pooled connections make excess writers queue fairly in the pool instead of
+                # sleep-polling the file lock inside SQLite, where they time out as "database is locked".
+                options = {
+                    "poolclass": AsyncAdaptedQueuePool,
+                    "pool_size": settings.sqlite_pool_size,
+                    "max_overflow": 0,
+                    "pool_timeout": settings.database_pool_timeout_seconds,
+                }
+            pragmas += [
+                ("journal_mode", "WAL"),  # readers no longer block the writer (and vice versa)
+                ("synchronous", "NORMAL"),  # durable at checkpoints; safe with WAL
+                ("busy_timeout", settings.sqlite_busy_timeout_ms),
+                ("mmap_size", settings.sqlite_mmap_size_bytes),
+                ("cache_size", -settings.sqlite_cache_size_kib),  # negative means KiB, not pages
+                ("temp_store", "MEMORY"),
+            ]
+        return EngineProfile(name, options, tuple(pragmas))
+    if backend == "postgresql" and name == "production":
+        timeout_ms = str(settings.database_statement_timeout_ms)
+        if url.get_driver_name() == "asyncpg":
+            connect_args: dict[str, Any] = {"server_settings": {"statement_timeout": timeout_ms}}
+        else:
+            connect_args = {"options": f"-c statement_timeout={timeout_ms}"}
+        return EngineProfile(
+            name,
+            {
+                "pool_size": settings.database_pool_size,
+                "max_overflow": settings.database_max_overflow,
+                "pool_timeout": settings.database_pool_timeout_seconds,
+                "pool_recycle": settings.database_pool_recycle_seconds,
+                "pool_pre_ping": True,
+                "connect_args": connect_args,
+            },
+        )
+    return EngineProfile(name)
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: tuple[tuple[str, Any], ...]) -> None:
+    """Run ``pragmas`` on each DBAPI connection as the pool opens it (they are per-connection state)."""
+    if not pragmas:
+        return
+
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas:
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", set_pragmas)
+
+
+def daemon_aiosqlite_creator(url: URL, connect_args: dict[str, Any] | None = None) -> Callable[[], Awaitable[Any]]:
+    """Open aiosqlite connections whose worker thread is a daemon.
+
+    Each aiosqlite connection runs its own thread. SQLAlchemy marks it as a daemon, but since
+    aiosqlite 0.20 the thread lives in ``Connection._thread`` and the flag lands on the wrong
+    object, so any process that exits without ``engine.dispose()`` (a failed startup, a script,
+    a CLI command) hangs on its pooled connections.
+    """
+    import aiosqlite
+    from sqlalchemy.dialects.sqlite.aiosqlite import SQLiteDialect_aiosqlite
+
+    cargs, cparams = SQLiteDialect_aiosqlite().create_connect_args(url)
+    cparams.update(connect_args or {})
+
+    async def connect() -> Any:
+        connection = aiosqlite.connect(*cargs, **cparams)
+        getattr(connection, "_thread", connection).daemon = True  # older releases: the Connection is the Thread
+        return await connection
+
+    return connect
+
+
+def build_engine(database_url: str | None = None, profile: str | None = None, **overrides: Any) -> AsyncEngine:
+    database_url = database_url or settings.database_url
+    selected = engine_profile(database_url, profile)
+    options = {**selected.engine_options, **overrides}
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.get_driver_name() == "aiosqlite" and "async_creator" not in options:
+        options["async_creator"] = daemon_aiosqlite_creator(url, options.pop("connect_args", None))
+    engine = create_async_engine(database_url, **options)
+    install_sqlite_pragmas(engine.sync_engine, selected.sqlite_pragmas)
+    return engine
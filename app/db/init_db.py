@@ -1,12 +1,12 @@
-from sqlalchemy import text
-
-from ..models import *  # noqa: F401,F403
-from .base import Base
+from .migrations import check_schema, upgrade
 from .session import engine
 
 
 async def init_db() -> None:
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        if conn.dialect.name == "sqlite":
-            await conn.execute(text("PRAGMA foreign_keys=ON"))
+    """Migrate the database to the latest revision, as ``python -m app upgrade`` does."""
+    await upgrade(engine)
+
+
+async def verify_db() -> str:
+    """Fail unless the database is already at the latest revision; returns that revision."""
+    return await check_schema(engine)
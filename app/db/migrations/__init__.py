@@ -0,0 +1,190 @@
+"""Versioned schema migrations.
+
+Each module in :mod:`.versions` is one revision: ``revision``/``down_revision`` chain them, and
+``upgrade(connection)``/``downgrade(connection)`` run synchronously on a SQLAlchemy
+``Connection``. A revision may also define ``async def backfill(session)`` for data changes;
+it runs after the DDL and before the revision is recorded, so it must be idempotent.
+
+The applied revision is the single row of ``schema_version``. Run migrations with
+``python -m app upgrade``; the server only calls :func:`check_schema` on startup.
+
+Each revision is applied in one transaction that first takes the migration lock (an advisory
+lock on Postgres, ``BEGIN IMMEDIATE`` on SQLite) and then re-reads the applied revision, so
+several processes upgrading at once apply every revision exactly once.
+"""
+import importlib
+import pkgutil
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from . import versions
+
+VERSION_TABLE = "schema_version"
+HEAD = "head"
+BASE = "base"
+# Key of the Postgres advisory lock that serializes migrations; any constant unique to this app.
+LOCK_KEY = 0x74726176656C
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+class SchemaOutOfDateError(MigrationError):
+    def __init__(self, current: str | None, head: str):
+        self.current = current
+        self.head = head
+        super().__init__(
+            f"Database schema is at revision {current or 'none'}, this release needs {head}; "
+            "run `python -m app upgrade` first"
+        )
+
+
+def load_revisions() -> list[ModuleType]:
+    """All revision modules, oldest first, following the ``down_revision`` chain."""
+    modules = [
+        importlib.import_module(f"{versions.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versions.__path__)
+    ]
+    children: dict[str | None, ModuleType] = {}
+    for module in modules:
+        if module.down_revision in children:
+            raise MigrationError(
+                f"Revisions {children[module.down_revision].revision} and {module.revision} "
+                f"both follow {module.down_revision or BASE}"
+            )
+        children[module.down_revision] = module
+    ordered: list[ModuleType] = []
+    parent: str | None = None
+    while parent in children:
+        ordered.append(children.pop(parent))
+        parent = ordered[-1].revision
+    if children:
+        raise MigrationError(f"Revisions not reachable from {BASE}: {sorted(m.revision for m in children.values())}")
+    return ordered
+
+
+def head_revision() -> str | None:
+    revisions = load_revisions()
+    return revisions[-1].revision if revisions else None
+
+
+async def _read_revision(conn: AsyncConnection) -> str | None:
+    return await conn.scalar(text(f"SELECT revision FROM {VERSION_TABLE}"))
+
+
+async def _write_revision(conn: AsyncConnection, revision: str | None) -> None:
+    await conn.execute(text(f"DELETE FROM {VERSION_TABLE}"))
+    if revision is not None:
+        await conn.execute(
+            text(f"INSERT INTO {VERSION_TABLE} (revision) VALUES (:revision)"), {"revision": revision}
+        )
+
+
+@asynccontextmanager
+async def _locked(conn: AsyncConnection) -> AsyncIterator[None]:
+    """Run the block in a transaction holding the migration lock; commit it if the block succeeds.
+
+    SQLite's ``BEGIN IMMEDIATE`` takes the database write lock up front, so a second migrator
+    waits (``busy_timeout``) instead of reading a revision that is about to change. The Postgres
+    lock is released with the transaction.
+    """
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif dialect == "postgresql":
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+    try:
+        yield
+    except BaseException:
+        await conn.rollback()
+        raise
+    await conn.commit()
+
+
+async def current_revision(engine: AsyncEngine) -> str | None:
+    """The applied revision; None for an empty database or one that predates migrations."""
+    try:
+        async with engine.connect() as conn:
+            return await _read_revision(conn)
+    except DBAPIError:  # no version table yet
+        return None
+
+
+def _position(revisions: list[ModuleType], target: str | None) -> int:
+    """Index just past ``target`` in ``revisions`` (0 for base)."""
+    if target in (None, BASE):
+        return 0
+    for index, module in enumerate(revisions):
+        if module.revision == target:
+            return index + 1
+    raise MigrationError(f"Unknown revision {target!r}")
+
+
+async def upgrade(engine: AsyncEngine, target: str = HEAD) -> list[str]:
+    """Apply revisions after the current one up to ``target``; returns those applied.
+
+    Each revision's DDL, backfill and version row commit together, so an interrupted upgrade
+    resumes at the first revision that did not finish.
+    """
+    revisions = load_revisions()
+    stop = len(revisions) if target == HEAD else _position(revisions, target)
+    applied = []
+    async with engine.connect() as conn:
+        while True:
+            async with _locked(conn):
+                await conn.execute(
+                    text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (revision VARCHAR(32) NOT NULL)")
+                )
+                current = await _read_revision(conn)
+                start = _position(revisions, current)
+                if stop < start and not applied:
+                    raise MigrationError(f"Revision {target} is older than the current {current}; use downgrade")
+                if start >= stop:
+                    break
+                module = revisions[start]
+                await conn.run_sync(module.upgrade)
+                if hasattr(module, "backfill"):
+                    # Bound to the open transaction: the backfill's own commits do not end it.
+                    async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+                        await module.backfill(session)
+                await _write_revision(conn, module.revision)
+            applied.append(module.revision)
+    return applied
+
+
+async def downgrade(engine: AsyncEngine, target: str) -> list[str]:
+    """Revert revisions newer than ``target`` (a revision, ``-1`` for one step, or ``base``)."""
+    revisions = load_revisions()
+    current = await current_revision(engine)
+    end = _position(revisions, current)
+    if target == "-1":
+        stop = max(end - 1, 0)
+    else:
+        stop = _position(revisions, target)
+    if stop > end:
+        raise MigrationError(f"Revision {target} is newer than the current {current}; use upgrade")
+    reverted = []
+    async with engine.connect() as conn:
+        for module in reversed(revisions[stop:end]):
+            async with _locked(conn):
+                await conn.run_sync(module.downgrade)
+                if module.down_revision is None:
+                    await conn.execute(text(f"DROP TABLE IF EXISTS {VERSION_TABLE}"))
+                else:
+                    await _write_revision(conn, module.down_revision)
+            reverted.append(module.revision)
+    return reverted
+
+
+async def check_schema(engine: AsyncEngine) -> str:
+    """Raise :class:`SchemaOutOfDateError` unless the database is at the head revision (one query)."""
+    current, head = await current_revision(engine), head_revision()
+    if current != head:
+        raise SchemaOutOfDateError(current, head or BASE)
+    return current
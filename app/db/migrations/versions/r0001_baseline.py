@@ -0,0 +1,433 @@
+"""Baseline: the schema as of the first migration.
+
+Also adopts databases that ``create_all`` built before migrations existed. Tables and indexes
+are created only when missing; the travelplan columns added since the first release are
+added; the old single-column expense index is dropped. Embedded itinerary days are then
+moved into rows, and plans are indexed for search.
+
+The tables are declared here rather than imported from ``app.models``, and the backfill works
+on them with copies of the itinerary and search-document code as it was at this revision, so
+later model or service changes cannot rewrite what upgrading through it does.
+"""
+import datetime as dt
+import json
+import re
+from collections import defaultdict
+from typing import Any, Callable
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    cast,
+    column,
+    func,
+    insert,
+    inspect,
+    select,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+revision = "0001"
+down_revision = None
+
+metadata = MetaData()
+
+Table(
+    "user",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), nullable=False, unique=True, index=True),
+    Column("full_name", String(255)),
+    Column("hashed_password", String(255), nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+Table(
+    "planblob",
+    metadata,
+    Column("digest", String(64), primary_key=True),
+    Column("codec", String(16), nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("data", LargeBinary, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+Table(
+    "travelplan",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("owner_id", ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("title", String(255), nullable=False),
+    Column("destination", String(255), nullable=False),
+    Column("start_date", Date),
+    Column("end_date", Date),
+    Column("duration_days", Integer),
+    Column("travelers", Integer),
+    Column("budget_amount", Float),
+    Column("currency", String(8), nullable=False),
+    Column("preferences", JSON),
+    Column("itinerary", JSON),
+    Column("budget_breakdown", JSON),
+    Column("notes", Text),
+    Column("raw_plan_digest", ForeignKey("planblob.digest"), index=True),
+    Column("raw_plan_text", Text),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("version", Integer, nullable=False, server_default="1"),
+    Column("expenses_version", Integer, nullable=False, server_default="0"),
+    Index("ix_travelplan_owner_created", "owner_id", "created_at", "id"),
+)
+Table(
+    "expense",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("plan_id", ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False),
+    Column("category", String(100), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("currency", String(8), nullable=False),
+    Column("note", Text),
+    Column("incurred_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("ix_expense_plan_incurred", "plan_id", "incurred_at", "category", "currency", "amount"),
+)
+Table(
+    "itineraryday",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("plan_id", ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("day", Integer),
+    Column("date", Date, index=True),
+    Column("headline", Text),
+    Column("extra", JSON),
+    Index("ix_itineraryday_plan_position", "plan_id", "position"),
+)
+Table(
+    "itineraryitem",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("day_id", ForeignKey("itineraryday.id", ondelete="CASCADE"), nullable=False),
+    Column("plan_id", ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("time", Text),
+    Column("title", Text),
+    Column("description", Text),
+    Column("location", Text),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("estimated_cost", Float),
+    Column("extra", JSON),
+    Index("ix_itineraryitem_day_position", "day_id", "position"),
+    Index("ix_itineraryitem_plan", "plan_id"),
+    Index("ix_itineraryitem_location", "location"),
+    Index("ix_itineraryitem_coordinates", "latitude", "longitude"),
+)
+Table(
+    "plancacheentry",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("cache_key", String(64), nullable=False, unique=True, index=True),
+    Column("provider", String(32), nullable=False),
+    Column("model", String(100)),
+    Column("payload", JSON, nullable=False),
+    Column("hit_count", Integer, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("last_used_at", DateTime(timezone=True), nullable=False, index=True),
+    Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+)
+Table(
+    "planjob",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("owner_id", ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("status", String(16), nullable=False, index=True),
+    Column("provider", String(32), nullable=False),
+    Column("request", JSON, nullable=False),
+    Column("requires_api_key", Boolean, nullable=False),
+    Column("plan_id", ForeignKey("travelplan.id", ondelete="SET NULL")),
+    Column("error", Text),
+    Column("attempts", Integer, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("started_at", DateTime(timezone=True)),
+    Column("finished_at", DateTime(timezone=True)),
+)
+Table(
+    "exchangerate",
+    metadata,
+    Column("currency", String(8), primary_key=True),
+    Column("per_base", Float, nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+Table(
+    "geocodecacheentry",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("provider", String(32), nullable=False),
+    Column("address_key", String(512), nullable=False),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    Column("formatted_address", Text),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("expires_at", DateTime(timezone=True)),
+    UniqueConstraint("provider", "address_key", name="uq_geocodecacheentry_provider_address"),
+)
+
+# Columns the first release's travelplan lacks, as portable ALTER TABLE clauses.
+TRAVELPLAN_COLUMNS = {
+    "version": "INTEGER NOT NULL DEFAULT 1",
+    "expenses_version": "INTEGER NOT NULL DEFAULT 0",
+    "raw_plan_digest": "VARCHAR(64) REFERENCES planblob (digest)",
+}
+OBSOLETE_INDEXES = {"expense": ("ix_expense_plan_id",)}
+
+# The search index is dialect-specific, so it is plain DDL: an FTS5 table on SQLite, a
+# tsvector column with a GIN index on Postgres.
+SQLITE_SEARCH = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS plansearch USING fts5("
+    "title, destination, activities, notes, owner, source UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+)
+POSTGRES_SEARCH = (
+    "CREATE TABLE IF NOT EXISTS plansearch ("
+    "plan_id INTEGER PRIMARY KEY REFERENCES travelplan (id) ON DELETE CASCADE, "
+    "owner_id INTEGER NOT NULL, document TSVECTOR NOT NULL, source JSONB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_plansearch_document ON plansearch USING GIN (document)",
+    "CREATE INDEX IF NOT EXISTS ix_plansearch_owner ON plansearch (owner_id)",
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection)  # skips tables that exist, with their indexes
+    inspector = inspect(connection)
+    present = {column["name"] for column in inspector.get_columns("travelplan")}
+    for name, definition in TRAVELPLAN_COLUMNS.items():
+        if name not in present:
+            connection.execute(text(f"ALTER TABLE travelplan ADD COLUMN {name} {definition}"))
+    for table in metadata.sorted_tables:
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for name in OBSOLETE_INDEXES.get(table.name, ()):
+            if name in indexes:
+                connection.execute(text(f"DROP INDEX {name}"))
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+    for statement in POSTGRES_SEARCH if connection.dialect.name == "postgresql" else SQLITE_SEARCH:
+        connection.execute(text(statement))
+
+
+BATCH_SIZE = 200
+
+# JSON key -> (column, converter) for the typed itinerary columns; anything else goes to ``extra``.
+Fields = dict[str, tuple[str, Callable[[Any], Any]]]
+
+
+def _as_float(value: Any) -> float | None:
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return None if value is None else float(value)
+
+
+def _as_int(value: Any) -> int | None:
+    if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+        raise ValueError(value)
+    return value
+
+
+def _as_text(value: Any) -> str | None:
+    if value is not None and not isinstance(value, str):
+        raise ValueError(value)
+    return value
+
+
+def _as_date(value: Any) -> dt.date | None:
+    return None if value is None else dt.date.fromisoformat(value)
+
+
+DAY_FIELDS: Fields = {"day": ("day", _as_int), "date": ("date", _as_date), "headline": ("headline", _as_text)}
+ITEM_FIELDS: Fields = {
+    "time": ("time", _as_text),
+    "title": ("title", _as_text),
+    "description": ("description", _as_text),
+    "location": ("location", _as_text),
+    "latitude": ("latitude", _as_float),
+    "longitude": ("longitude", _as_float),
+    "estimated_cost": ("estimated_cost", _as_float),
+}
+
+
+def _split(data: dict[str, Any], fields: Fields) -> dict[str, Any]:
+    """Column values for one day or activity, with every column present and the rest in ``extra``."""
+    values: dict[str, Any] = {name: None for name, _convert in fields.values()}
+    extra: dict[str, Any] = {}
+    for key, value in data.items():
+        if key not in fields:
+            extra[key] = value
+            continue
+        name, convert = fields[key]
+        try:
+            values[name] = convert(value)
+        except (TypeError, ValueError):
+            extra[key] = value
+    values["extra"] = extra or None
+    return values
+
+
+CJK_CHAR = re.compile("([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff])")
+SQLITE_SEARCH_UPSERT = (
+    "INSERT OR REPLACE INTO plansearch (rowid, title, destination, activities, notes, owner, source) "
+    "VALUES (:plan_id, :title, :destination, :activities, :notes, :owner, :source)"
+)
+POSTGRES_SEARCH_UPSERT = (
+    "INSERT INTO plansearch (plan_id, owner_id, document, source) VALUES (:plan_id, :owner_id, "
+    "setweight(to_tsvector('simple', :title), 'A') "
+    "|| setweight(to_tsvector('simple', :destination), 'B') "
+    "|| setweight(to_tsvector('simple', :activities), 'C') "
+    "|| setweight(to_tsvector('simple', :notes), 'D'), CAST(:source AS JSONB)) "
+    "ON CONFLICT (plan_id) DO NOTHING"
+)
+
+
+def _index_text(value: str | None) -> str:
+    return CJK_CHAR.sub(r" \1 ", value) if value else ""
+
+
+def _move_days_to_rows(session: Session) -> None:
+    """Move days still embedded in ``travelplan.itinerary`` JSON into the itinerary tables.
+
+    Plans that already have day rows are skipped, and a converted plan's JSON no longer has a
+    ``days`` key, so this can run again safely. The plan's version is left alone: its content
+    does not change.
+    """
+    plans, days, items = (metadata.tables[name] for name in ("travelplan", "itineraryday", "itineraryitem"))
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(plans.c.id, plans.c.itinerary)
+            .where(plans.c.id > last_id, cast(plans.c.itinerary, String).like('%"days"%'))
+            .order_by(plans.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        converted = set(session.scalars(select(days.c.plan_id).where(days.c.plan_id.in_([row.id for row in rows]))))
+        for plan_id, itinerary in rows:
+            if plan_id in converted or not isinstance(itinerary, dict) or not isinstance(itinerary.get("days"), list):
+                continue
+            meta = dict(itinerary)
+            embedded = [day for day in meta.pop("days") if isinstance(day, dict)]
+            for position, day in enumerate(embedded):
+                day = dict(day)
+                activities = day.pop("activities", None)
+                if activities is not None and not isinstance(activities, list):
+                    day["activities"], activities = activities, None
+                day_id = session.execute(
+                    insert(days).values(plan_id=plan_id, position=position, **_split(day, DAY_FIELDS))
+                ).inserted_primary_key[0]
+                activity_rows = [
+                    {"day_id": day_id, "plan_id": plan_id, "position": index, **_split(activity, ITEM_FIELDS)}
+                    for index, activity in enumerate(a for a in activities or [] if isinstance(a, dict))
+                ]
+                if activity_rows:
+                    session.execute(insert(items), activity_rows)
+            session.execute(update(plans).where(plans.c.id == plan_id).values(itinerary=meta))
+        session.commit()
+        last_id = rows[-1].id
+
+
+def _index_plans(session: Session) -> None:
+    """Add plans missing from ``plansearch`` (created before it existed) to the index."""
+    plans, days, items = (metadata.tables[name] for name in ("travelplan", "itineraryday", "itineraryitem"))
+    postgres = session.get_bind().dialect.name == "postgresql"
+    key = "plan_id" if postgres else "rowid"
+    indexed = table("plansearch", column(key))
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(
+                plans.c.id,
+                plans.c.owner_id,
+                plans.c.title,
+                plans.c.destination,
+                plans.c.notes,
+                plans.c.start_date,
+                plans.c.end_date,
+            )
+            .where(plans.c.id > last_id, plans.c.id.not_in(select(indexed.c[key])))
+            .order_by(plans.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        activities: dict[int, list[list[Any]]] = defaultdict(list)
+        for plan_id, day_index, activity_index, *parts in session.execute(
+            select(
+                items.c.plan_id,
+                days.c.position,
+                items.c.position,
+                items.c.title,
+                items.c.location,
+                items.c.description,
+            )
+            .join(days, days.c.id == items.c.day_id)
+            .where(items.c.plan_id.in_([row.id for row in rows]))
+            .order_by(items.c.plan_id, days.c.position, items.c.position)
+        ):
+            summary = " · ".join(part.strip() for part in parts if isinstance(part, str) and part.strip())
+            if summary:
+                activities[plan_id].append([day_index, activity_index, summary])
+        params = []
+        for row in rows:
+            source = {
+                "title": row.title,
+                "destination": row.destination,
+                "notes": row.notes,
+                "start_date": row.start_date.isoformat() if row.start_date else None,
+                "end_date": row.end_date.isoformat() if row.end_date else None,
+                "activities": activities[row.id],
+            }
+            params.append(
+                {
+                    "plan_id": row.id,
+                    "owner_id": row.owner_id,
+                    "owner": f"u{row.owner_id}",
+                    "source": json.dumps(source, ensure_ascii=False),
+                    "title": _index_text(row.title),
+                    "destination": _index_text(row.destination),
+                    "activities": "\n".join(_index_text(entry[2]) for entry in activities[row.id]),
+                    "notes": _index_text(row.notes),
+                }
+            )
+        session.execute(text(POSTGRES_SEARCH_UPSERT if postgres else SQLITE_SEARCH_UPSERT), params)
+        session.commit()
+        last_id = rows[-1].id
+
+
+def _backfill(session: Session) -> None:
+    _move_days_to_rows(session)
+    _index_plans(session)
+
+
+async def backfill(session: AsyncSession) -> None:
+    await session.run_sync(_backfill)
+
+
+def downgrade(connection: Connection) -> None:
+    connection.execute(text("DROP TABLE IF EXISTS plansearch"))
+    metadata.drop_all(connection)
@@ -0,0 +1,26 @@
+"""Record each itinerary day's and activity's key layout.
+
+Adds ``layout`` to ``itineraryday`` and ``itineraryitem``: the keys of the source dict in
+order, and which of them held JSON integers, so a stored itinerary reads back exactly as it
+was written. Existing rows keep a NULL layout and read back as before.
+"""
+from sqlalchemy import JSON, inspect, text
+from sqlalchemy.engine import Connection
+
+revision = "0002"
+down_revision = "0001"
+
+TABLES = ("itineraryday", "itineraryitem")
+
+
+def upgrade(connection: Connection) -> None:
+    inspector = inspect(connection)
+    column_type = JSON().compile(dialect=connection.dialect)
+    for table in TABLES:
+        if "layout" not in {column["name"] for column in inspector.get_columns(table)}:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN layout {column_type}"))
+
+
+def downgrade(connection: Connection) -> None:
+    for table in TABLES:
+        connection.execute(text(f"ALTER TABLE {table} DROP COLUMN layout"))
@@ -0,0 +1,29 @@
+"""Drop a plan's search document together with the plan.
+
+On Postgres ``plansearch.plan_id`` already cascades from ``travelplan``. An FTS5 table cannot
+have a foreign key, so on SQLite a trigger does the same; it also fires for plans removed by the
+cascade from a deleted user, which left their documents behind. Documents already orphaned that
+way are removed here.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+revision = "0003"
+down_revision = "0002"
+
+SQLITE_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS travelplan_delete_search AFTER DELETE ON travelplan "
+    "BEGIN DELETE FROM plansearch WHERE rowid = old.id; END"
+)
+
+
+def upgrade(connection: Connection) -> None:
+    if connection.dialect.name == "postgresql":
+        return
+    connection.execute(text(SQLITE_TRIGGER))
+    connection.execute(text("DELETE FROM plansearch WHERE rowid NOT IN (SELECT id FROM travelplan)"))
+
+
+def downgrade(connection: Connection) -> None:
+    if connection.dialect.name != "postgresql":
+        connection.execute(text("DROP TRIGGER IF EXISTS travelplan_delete_search"))
@@ -0,0 +1,25 @@
+"""Lease plan jobs to the worker responsible for them.
+
+Adds ``lease_token`` and ``heartbeat_at`` to ``planjob``. Unfinished jobs keep both NULL, which
+counts as an expired lease: the first worker to sweep takes them over, as it did before.
+"""
+from sqlalchemy import DateTime, String, inspect, text
+from sqlalchemy.engine import Connection
+
+revision = "0004"
+down_revision = "0003"
+
+COLUMNS = {"lease_token": String(36), "heartbeat_at": DateTime(timezone=True)}
+
+
+def upgrade(connection: Connection) -> None:
+    existing = {column["name"] for column in inspect(connection).get_columns("planjob")}
+    for name, column_type in COLUMNS.items():
+        if name not in existing:
+            compiled = column_type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE planjob ADD COLUMN {name} {compiled}"))
+
+
+def downgrade(connection: Connection) -> None:
+    for name in COLUMNS:
+        connection.execute(text(f"ALTER TABLE planjob DROP COLUMN {name}"))
@@ -1,12 +1,14 @@
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..core.config import settings
 from .base import Base
+from .engine import build_engine
+from .query_counter import install_query_counter
 
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+engine = build_engine()
+install_query_counter(engine.sync_engine)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
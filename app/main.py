@@ -3,8 +3,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .api.v1.router import api_router
+from .core.compression import CompressionMiddleware
 from .core.config import settings
-from .db.init_db import init_db
+from .core.http import http_clients
+from .core.security import password_hasher
+from .db.init_db import verify_db
+from .db.query_counter import QueryCountMiddleware
+from .db.session import AsyncSessionLocal, engine
+from .services.currency import exchange_rates
+from .services.llm_client import LLMClient
+from .services.plan_job_service import plan_job_queue
+from .services.speech_service import IFLYTEK_IAT_ENDPOINT
 from .views.router import view_router
 
 
@@ -24,8 +33,15 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "X-Query-Count"],
     )
 
+    if settings.query_count_header:
+        app.add_middleware(QueryCountMiddleware)
+
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+
     app.include_router(api_router, prefix="/api/v1")
     app.include_router(view_router)
 
@@ -37,7 +53,21 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     async def _startup() -> None:
-        await init_db()
+        await verify_db()  # migrations run separately: python -m app upgrade
+        async with AsyncSessionLocal() as session:
+            await exchange_rates.load(session)
+        upstreams = [LLMClient().default_endpoint]
+        if settings.speech_provider.lower() == "iflytek":
+            upstreams.append(IFLYTEK_IAT_ENDPOINT)
+        await http_clients.startup(url for url in upstreams if url)
+        await plan_job_queue.start()
+
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        await plan_job_queue.stop()
+        await http_clients.aclose()
+        password_hasher.shutdown()
+        await engine.dispose()
 
     return app
 
@@ -1,9 +1,22 @@
+from .exchange_rate import ExchangeRate
 from .expense import Expense
+from .geocode_cache import GeocodeCacheEntry
+from .itinerary import ItineraryDay, ItineraryItem
+from .plan_blob import PlanBlob
+from .plan_cache import PlanCacheEntry
+from .plan_job import PlanJob
 from .travel_plan import TravelPlan
 from .user import User
 
 __all__ = [
+    "ExchangeRate",
     "Expense",
+    "GeocodeCacheEntry",
+    "ItineraryDay",
+    "ItineraryItem",
+    "PlanBlob",
+    "PlanCacheEntry",
+    "PlanJob",
     "TravelPlan",
     "User",
 ]
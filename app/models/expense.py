@@ -2,19 +2,25 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, String, Text, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..db.base import Base
 
 
 class Expense(Base):
+    # Leading (plan_id, incurred_at) serves per-plan listing; the trailing columns let the
+    # expense summaries aggregate from the index without touching the table.
+    __table_args__ = (
+        Index("ix_expense_plan_incurred", "plan_id", "incurred_at", "category", "currency", "amount"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    plan_id: Mapped[int] = mapped_column(ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False, index=True)
+    plan_id: Mapped[int] = mapped_column(ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False)
     category: Mapped[str] = mapped_column(String(100), nullable=False)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
     incurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
-    plan: Mapped["TravelPlan"] = relationship(back_populates="expenses", lazy="joined")
+    plan: Mapped["TravelPlan"] = relationship(back_populates="expenses", lazy="raise")
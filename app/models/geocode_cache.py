@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.base import Base
+
+
+class GeocodeCacheEntry(Base):
+    """A provider's answer for one normalized address; null coordinates record "not found"."""
+
+    __table_args__ = (UniqueConstraint("provider", "address_key", name="uq_geocodecacheentry_provider_address"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    provider: Mapped[str] = mapped_column(String(32), nullable=False)
+    address_key: Mapped[str] = mapped_column(String(512), nullable=False)
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    formatted_address: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Only misses expire, so an address the provider could not place is retried later.
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from typing import Any, Callable, ClassVar
+
+from sqlalchemy import JSON, Date, Float, ForeignKey, Index, Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm.attributes import flag_modified
+
+from ..db.base import Base
+
+
+def _as_float(value: Any) -> float | None:
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError(value)
+    if isinstance(value, int) and float(value) != value:
+        raise ValueError(value)  # too large to survive the trip through a float column
+    return None if value is None else float(value)
+
+
+def _as_int(value: Any) -> int | None:
+    if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+        raise ValueError(value)
+    return value
+
+
+def _as_text(value: Any) -> str | None:
+    if value is not None and not isinstance(value, str):
+        raise ValueError(value)
+    return value
+
+
+def _as_date(value: Any) -> dt.date | None:
+    if value is None:
+        return None
+    parsed = dt.date.fromisoformat(value)
+    if parsed.isoformat() != value:
+        raise ValueError(value)  # e.g. "20260101": would come back as "2026-01-01"
+    return parsed
+
+
+# JSON key -> (attribute, converter). Keys outside the mapping are kept in ``extra``.
+Fields = dict[str, tuple[str, Callable[[Any], Any]]]
+
+
+def _split(data: dict[str, Any], fields: Fields) -> tuple[dict[str, Any], dict[str, Any], list[str]]:
+    """Separate the keys that map onto typed columns from the rest of an LLM-produced dict.
+
+    Values that do not fit their column (``"estimated_cost": "about 100"``) stay in the extra
+    dict, so ``to_dict`` reproduces them unchanged. Also returns the keys whose float column
+    holds a JSON integer, so ``to_dict`` can give back ``100`` rather than ``100.0``.
+    """
+    columns: dict[str, Any] = {}
+    extra: dict[str, Any] = {}
+    ints: list[str] = []
+    for key, value in data.items():
+        if key not in fields:
+            extra[key] = value
+            continue
+        attribute, convert = fields[key]
+        try:
+            columns[attribute] = convert(value)
+        except (TypeError, ValueError):
+            extra[key] = value
+            continue
+        if convert is _as_float and isinstance(value, int):
+            ints.append(key)
+    return columns, extra, ints
+
+
+def _assign(row: "ItineraryDay | ItineraryItem", position: int, data: dict[str, Any], keys: list[str]) -> None:
+    # Unchanged values are not dirty, so rows that the edit did not touch produce no UPDATE.
+    columns, extra, ints = _split(data, row.FIELDS)
+    for attribute, _convert in row.FIELDS.values():
+        setattr(row, attribute, columns.get(attribute))
+    row.position = position
+    changed = json.dumps(row.extra) != json.dumps(extra or None)
+    row.extra = extra or None
+    if changed:
+        flag_modified(row, "extra")  # the ORM compares JSON with ==, so 1 -> true would not be written
+    row.layout = {"keys": keys, "ints": ints} if ints else {"keys": keys}
+
+
+def _export(row: "ItineraryDay | ItineraryItem", values: dict[str, Any]) -> dict[str, Any]:
+    """Rebuild the source dict from the typed ``values`` and ``extra``, with the source's keys in its order.
+
+    Rows written before layouts were recorded have none; they list every typed key, then ``extra``.
+    """
+    extra = row.extra or {}
+    if row.layout is None:
+        return {**values, **extra}
+    ints = row.layout.get("ints", ())
+    data: dict[str, Any] = {}
+    for key in row.layout["keys"]:
+        if key in extra:
+            data[key] = extra[key]
+        elif key in values:
+            value = values[key]
+            data[key] = int(value) if key in ints and value is not None else value
+    return data
+
+
+class ItineraryDay(Base):
+    __table_args__ = (
+        Index("ix_itineraryday_plan_position", "plan_id", "position"),
+        Index("ix_itineraryday_date", "date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    plan_id: Mapped[int] = mapped_column(ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    day_date: Mapped[dt.date | None] = mapped_column("date", Date, nullable=True)
+    headline: Mapped[str | None] = mapped_column(Text, nullable=True)
+    extra: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    # The source dict's keys in order, and which of them held JSON integers; see ``to_dict``.
+    layout: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+
+    plan: Mapped["TravelPlan"] = relationship(back_populates="days", lazy="raise")
+    items: Mapped[list["ItineraryItem"]] = relationship(
+        back_populates="day_entry",
+        cascade="all, delete-orphan",
+        order_by="ItineraryItem.position",
+        lazy="raise",
+        passive_deletes=True,
+    )
+
+    FIELDS: ClassVar[Fields] = {"day": ("day", _as_int), "date": ("day_date", _as_date), "headline": ("headline", _as_text)}
+
+    @classmethod
+    def from_dict(cls, plan: "TravelPlan", position: int, data: dict[str, Any]) -> "ItineraryDay":
+        day = cls(items=[])
+        day.assign(plan, position, data)
+        return day
+
+    def assign(self, plan: "TravelPlan", position: int, data: dict[str, Any]) -> None:
+        """Overwrite this row (and its activity rows, matched by position) from ``data``.
+
+        Rows are updated in place rather than replaced, so an edit to one activity flushes as a
+        single UPDATE instead of deleting and re-inserting the whole itinerary.
+        """
+        data = dict(data)
+        keys = list(data)
+        activities = data.pop("activities", None)
+        if activities is not None and not isinstance(activities, list):
+            data["activities"], activities = activities, None
+        _assign(self, position, data, keys)
+        activities = [activity for activity in activities or [] if isinstance(activity, dict)]
+        items = self.items
+        for index, activity in enumerate(activities):
+            if index < len(items):
+                items[index].assign(index, activity)
+            else:
+                items.append(ItineraryItem.from_dict(plan, index, activity))
+        del items[len(activities):]
+
+    def assign_members(self, data: dict[str, Any], keys: list[str]) -> None:
+        """Overwrite the day's own members from ``data``, leaving its activity rows as they are.
+
+        ``keys`` orders the members and names ``activities`` where the activity list sits.
+        """
+        _assign(self, self.position, data, keys)
+
+    def to_dict(self) -> dict[str, Any]:
+        return _export(
+            self,
+            {
+                "day": self.day,
+                "date": self.day_date.isoformat() if self.day_date else None,
+                "headline": self.headline,
+                "activities": [item.to_dict() for item in self.items],
+            },
+        )
+
+
+class ItineraryItem(Base):
+    __table_args__ = (
+        Index("ix_itineraryitem_day_position", "day_id", "position"),
+        Index("ix_itineraryitem_plan", "plan_id"),
+        Index("ix_itineraryitem_coordinates", "latitude", "longitude"),
+        Index("ix_itineraryitem_location", "location"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day_id: Mapped[int] = mapped_column(ForeignKey("itineraryday.id", ondelete="CASCADE"), nullable=False)
+    # Denormalised so plan-wide activity queries do not have to join through the days table.
+    plan_id: Mapped[int] = mapped_column(ForeignKey("travelplan.id", ondelete="CASCADE"), nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    time: Mapped[str | None] = mapped_column(Text, nullable=True)
+    title: Mapped[str | None] = mapped_column(Text, nullable=True)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    location: Mapped[str | None] = mapped_column(Text, nullable=True)
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    estimated_cost: Mapped[float | None] = mapped_column(Float, nullable=True)
+    extra: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    layout: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+
+    day_entry: Mapped[ItineraryDay] = relationship(back_populates="items", lazy="raise")
+    plan: Mapped["TravelPlan"] = relationship(lazy="raise")
+
+    FIELDS: ClassVar[Fields] = {
+        "time": ("time", _as_text),
+        "title": ("title", _as_text),
+        "description": ("description", _as_text),
+        "location": ("location", _as_text),
+        "latitude": ("latitude", _as_float),
+        "longitude": ("longitude", _as_float),
+        "estimated_cost": ("estimated_cost", _as_float),
+    }
+
+    @classmethod
+    def from_dict(cls, plan: "TravelPlan", position: int, data: dict[str, Any]) -> "ItineraryItem":
+        item = cls(plan=plan)
+        item.assign(position, data)
+        return item
+
+    def assign(self, position: int, data: dict[str, Any]) -> None:
+        _assign(self, position, data, list(data))
+
+    def to_dict(self) -> dict[str, Any]:
+        return _export(self, {key: getattr(self, attribute) for key, (attribute, _convert) in self.FIELDS.items()})
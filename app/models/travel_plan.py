@@ -3,13 +3,16 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Any
 
-from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, JSON, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm.attributes import flag_modified
 
 from ..db.base import Base
 
 
 class TravelPlan(Base):
+    __table_args__ = (Index("ix_travelplan_owner_created", "owner_id", "created_at", "id"),)
+
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     owner_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
 
@@ -24,20 +27,80 @@ class TravelPlan(Base):
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
 
     preferences: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
-    itinerary: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    # Everything in the itinerary except its days (tips, summary ...); days live in ItineraryDay rows.
+    itinerary_meta: Mapped[dict[str, Any] | None] = mapped_column("itinerary", JSON, nullable=True)
     budget_breakdown: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    raw_plan_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Raw LLM output lives compressed in planblob; it is only read for ``?include=raw``.
+    raw_plan_digest: Mapped[str | None] = mapped_column(ForeignKey("planblob.digest"), nullable=True, index=True)
+    # Pre-compaction copy of the raw output (see ``python -m app compact-raw-plans``); never loaded implicitly.
+    raw_plan_legacy: Mapped[str | None] = mapped_column(
+        "raw_plan_text", Text, nullable=True, deferred=True, deferred_raiseload=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+    # Row version for ETags and optimistic locking: updated_at only has second resolution on SQLite.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    # Bumped whenever the plan's expense set changes, which does not touch the plan row otherwise.
+    expenses_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
-    owner: Mapped["User"] = relationship(back_populates="plans", lazy="joined")
+    owner: Mapped["User"] = relationship(back_populates="plans", lazy="raise")
+    # passive_deletes: deleting a plan leaves its expenses and itinerary rows to ON DELETE CASCADE
+    # instead of loading them first.
     expenses: Mapped[list["Expense"]] = relationship(
         back_populates="plan",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
+    )
+    days: Mapped[list["ItineraryDay"]] = relationship(
+        back_populates="plan",
+        cascade="all, delete-orphan",
+        order_by="ItineraryDay.position",
+        lazy="raise",
+        passive_deletes=True,
     )
+
+    # eager_defaults: INSERT/UPDATE fetch created_at/updated_at with RETURNING, not a second SELECT.
+    __mapper_args__ = {"version_id_col": version, "eager_defaults": True}
+
+    @property
+    def itinerary(self) -> dict[str, Any] | None:
+        """The itinerary document in its original JSON shape, assembled from the day/activity rows."""
+        meta = self.itinerary_meta
+        if meta is None and not self.days:
+            return None
+        meta = dict(meta or {})
+        if "days" in meta and not self.days:
+            # Not migrated yet (see migration 0001): the days are still embedded in the JSON.
+            return meta
+        meta["days"] = [day.to_dict() for day in self.days]
+        return meta
+
+    @itinerary.setter
+    def itinerary(self, value: dict[str, Any] | None) -> None:
+        from .itinerary import ItineraryDay
+
+        if value is None:
+            self.itinerary_meta = None
+            self.days = []
+            return
+        meta = dict(value)
+        days = meta.pop("days", None)
+        if days is not None and not isinstance(days, list):
+            meta["days"], days = days, None
+        self.itinerary_meta = meta
+        # Always write the plan row, so edits that only touch days still bump version/updated_at.
+        flag_modified(self, "itinerary_meta")
+        days = [day for day in days or [] if isinstance(day, dict)]
+        rows = self.days
+        for position, day in enumerate(days):
+            if position < len(rows):
+                rows[position].assign(self, position, day)
+            else:
+                rows.append(ItineraryDay.from_dict(self, position, day))
+        del rows[len(days):]
@@ -18,4 +18,4 @@ class User(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
-    plans: Mapped[list["TravelPlan"]] = relationship(back_populates="owner", lazy="selectin")
+    plans: Mapped[list["TravelPlan"]] = relationship(back_populates="owner", lazy="raise")
@@ -1,5 +1,7 @@
-__all__ = ["UserRepository", "TravelPlanRepository", "ExpenseRepository"]
+__all__ = ["UserRepository", "TravelPlanRepository", "ExpenseRepository", "PlanCacheRepository", "PlanJobRepository"]
 
 from .expense_repository import ExpenseRepository  # noqa: F401
+from .plan_cache_repository import PlanCacheRepository  # noqa: F401
+from .plan_job_repository import PlanJobRepository  # noqa: F401
 from .plan_repository import TravelPlanRepository  # noqa: F401
 from .user_repository import UserRepository  # noqa: F401
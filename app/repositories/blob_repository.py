@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Iterable, Sequence
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PlanBlob, TravelPlan
+
+
+class BlobRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def touch(self, digest: str) -> bool:
+        """Whether the blob exists; if so, restart its grace period as if it had just been stored."""
+        result = await self.session.execute(
+            update(PlanBlob).where(PlanBlob.digest == digest).values(created_at=func.now())
+        )
+        return result.rowcount > 0
+
+    async def add(self, digest: str, *, codec: str, size: int, data: bytes) -> None:
+        # A concurrent writer may store the same content first; its row is identical, so keep it.
+        try:
+            async with self.session.begin_nested():
+                await self.session.execute(
+                    insert(PlanBlob).values(digest=digest, codec=codec, size=size, data=data)
+                )
+        except IntegrityError:
+            pass
+
+    async def get_many(self, digests: Iterable[str]) -> Sequence[Row]:
+        result = await self.session.execute(
+            select(PlanBlob.digest, PlanBlob.codec, PlanBlob.data).where(PlanBlob.digest.in_(set(digests)))
+        )
+        return result.all()
+
+    async def delete_unreferenced(self, stored_before: datetime) -> int:
+        """Delete blobs no plan references that were stored before ``stored_before``.
+
+        Newer ones are kept: a plan is written after its blob, possibly in a transaction that has
+        not committed yet.
+        """
+        referenced = select(TravelPlan.raw_plan_digest).where(TravelPlan.raw_plan_digest.is_not(None))
+        result = await self.session.execute(
+            delete(PlanBlob).where(PlanBlob.created_at < stored_before, PlanBlob.digest.not_in(referenced))
+        )
+        return result.rowcount
+
+    async def totals(self) -> tuple[int, int, int]:
+        """Number of blobs, their uncompressed size and their stored size in bytes."""
+        result = await self.session.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(PlanBlob.size), 0),
+                func.coalesce(func.sum(func.length(PlanBlob.data)), 0),
+            )
+        )
+        count, size, stored = result.one()
+        return count, size, stored
@@ -0,0 +1,22 @@
+from typing import Mapping
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ExchangeRate
+
+
+class ExchangeRateRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def load(self) -> dict[str, float]:
+        result = await self.session.execute(select(ExchangeRate.currency, ExchangeRate.per_base))
+        return {currency: per_base for currency, per_base in result.all()}
+
+    async def replace(self, rates: Mapping[str, float]) -> None:
+        await self.session.execute(delete(ExchangeRate))
+        if rates:
+            await self.session.execute(
+                insert(ExchangeRate), [{"currency": code, "per_base": rate} for code, rate in rates.items()]
+            )
@@ -1,10 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
 
-from ..models import Expense
+from ..models import Expense, TravelPlan
 
 
 class ExpenseRepository:
@@ -17,6 +17,52 @@ class ExpenseRepository:
         )
         return list(result.scalars().all())
 
+    async def stream_for_plan(self, plan_id: int, *, batch_size: int) -> AsyncScalarResult[Expense]:
+        """Iterate a plan's expenses through a server-side cursor, ``batch_size`` rows per fetch."""
+        return await self.session.stream_scalars(
+            select(Expense)
+            .where(Expense.plan_id == plan_id)
+            .order_by(Expense.incurred_at.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+    async def totals_for_plan(self, plan_id: int) -> Sequence[Row]:
+        """Sum amounts per (category, day, currency); coarser roll-ups are folded from these rows."""
+        day = func.date(Expense.incurred_at)
+        result = await self.session.execute(
+            select(
+                Expense.category,
+                day.label("day"),
+                Expense.currency,
+                func.sum(Expense.amount).label("total"),
+                func.count().label("count"),
+            )
+            .where(Expense.plan_id == plan_id)
+            .group_by(Expense.category, day, Expense.currency)
+            .order_by(day)
+        )
+        return result.all()
+
+    async def totals_for_user(self, user_id: int) -> Sequence[Row]:
+        """Sum amounts per (plan, category, currency) across every plan the user owns."""
+        grouped = (
+            select(
+                Expense.plan_id,
+                Expense.category,
+                Expense.currency,
+                func.sum(Expense.amount).label("total"),
+                func.count().label("count"),
+            )
+            .where(Expense.plan_id.in_(select(TravelPlan.id).where(TravelPlan.owner_id == user_id)))
+            .group_by(Expense.plan_id, Expense.category, Expense.currency)
+            .subquery()
+        )
+        # Titles are joined onto the (small) grouped result rather than onto every expense row.
+        result = await self.session.execute(
+            select(grouped, TravelPlan.title).join(TravelPlan, TravelPlan.id == grouped.c.plan_id)
+        )
+        return result.all()
+
     async def create_for_plan(
         self,
         plan_id: int,
@@ -33,6 +79,13 @@ class ExpenseRepository:
         await self.session.refresh(expense)
         return expense
 
+    async def insert_many(self, plan_id: int, rows: list[dict[str, Any]]) -> int:
+        """Insert rows with a single executemany; nothing is loaded back into the session."""
+        if not rows:
+            return 0
+        await self.session.execute(insert(Expense), [{**row, "plan_id": plan_id} for row in rows])
+        return len(rows)
+
     async def get(self, expense_id: int, plan_id: int) -> Optional[Expense]:
         result = await self.session.execute(
             select(Expense).where(Expense.id == expense_id, Expense.plan_id == plan_id)
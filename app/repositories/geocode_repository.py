@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import GeocodeCacheEntry
+
+
+class GeocodeRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_many(self, provider: str, address_keys: Iterable[str]) -> Sequence[GeocodeCacheEntry]:
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            select(GeocodeCacheEntry).where(
+                GeocodeCacheEntry.provider == provider,
+                GeocodeCacheEntry.address_key.in_(set(address_keys)),
+                or_(GeocodeCacheEntry.expires_at.is_(None), GeocodeCacheEntry.expires_at > now),
+            )
+        )
+        return result.scalars().all()
+
+    async def upsert_many(self, rows: list[dict[str, Any]]) -> None:
+        """Insert or overwrite entries keyed by (provider, address_key) in one statement."""
+        if not rows:
+            return
+        insert = postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        statement = insert(GeocodeCacheEntry).values(rows)
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[GeocodeCacheEntry.provider, GeocodeCacheEntry.address_key],
+                set_={
+                    "latitude": statement.excluded.latitude,
+                    "longitude": statement.excluded.longitude,
+                    "formatted_address": statement.excluded.formatted_address,
+                    "expires_at": statement.excluded.expires_at,
+                },
+            )
+        )
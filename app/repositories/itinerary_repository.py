@@ -0,0 +1,52 @@
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ItineraryDay, ItineraryItem, TravelPlan
+
+
+class ItineraryRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def list_activities_for_user(
+        self,
+        user_id: int,
+        *,
+        on_date: date | None = None,
+        plan_id: int | None = None,
+        with_coordinates: bool = False,
+        limit: int = 500,
+    ) -> Sequence[Row]:
+        query = (
+            select(
+                ItineraryItem.id,
+                ItineraryItem.plan_id,
+                TravelPlan.title.label("plan_title"),
+                ItineraryDay.day_date.label("date"),
+                ItineraryDay.position.label("day_index"),
+                ItineraryItem.position.label("activity_index"),
+                ItineraryItem.time,
+                ItineraryItem.title,
+                ItineraryItem.location,
+                ItineraryItem.latitude,
+                ItineraryItem.longitude,
+                ItineraryItem.estimated_cost,
+            )
+            .join(ItineraryDay, ItineraryDay.id == ItineraryItem.day_id)
+            .join(TravelPlan, TravelPlan.id == ItineraryItem.plan_id)
+            .where(TravelPlan.owner_id == user_id)
+        )
+        if on_date is not None:
+            query = query.where(ItineraryDay.day_date == on_date)
+        if plan_id is not None:
+            query = query.where(ItineraryItem.plan_id == plan_id)
+        if with_coordinates:
+            query = query.where(ItineraryItem.latitude.is_not(None), ItineraryItem.longitude.is_not(None))
+        query = query.order_by(
+            ItineraryDay.day_date, ItineraryItem.plan_id, ItineraryDay.position, ItineraryItem.position
+        ).limit(limit)
+        result = await self.session.execute(query)
+        return result.all()
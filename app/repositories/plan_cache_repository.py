@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PlanCacheEntry
+
+
+class PlanCacheRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_valid(self, cache_key: str) -> Optional[PlanCacheEntry]:
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            select(PlanCacheEntry).where(PlanCacheEntry.cache_key == cache_key, PlanCacheEntry.expires_at > now)
+        )
+        entry = result.scalar_one_or_none()
+        if entry is not None:
+            entry.hit_count += 1
+            entry.last_used_at = now
+        return entry
+
+    async def upsert(
+        self,
+        cache_key: str,
+        *,
+        provider: str,
+        model: str | None,
+        payload: dict[str, Any],
+        ttl_seconds: float,
+    ) -> None:
+        """Insert or overwrite the entry in one statement, so concurrent writers of a key cannot collide.
+
+        An overwritten entry holds a new payload, so its hit count starts again from zero.
+        """
+        now = datetime.now(timezone.utc)
+        insert = postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        statement = insert(PlanCacheEntry).values(
+            cache_key=cache_key,
+            provider=provider,
+            model=model,
+            payload=payload,
+            hit_count=0,
+            last_used_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds),
+        )
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[PlanCacheEntry.cache_key],
+                set_={
+                    "provider": statement.excluded.provider,
+                    "model": statement.excluded.model,
+                    "payload": statement.excluded.payload,
+                    "hit_count": statement.excluded.hit_count,
+                    "last_used_at": statement.excluded.last_used_at,
+                    "expires_at": statement.excluded.expires_at,
+                },
+            )
+        )
+
+    async def evict(self, max_entries: int) -> int:
+        """Drop expired rows, then the least recently used ones beyond ``max_entries``."""
+        now = datetime.now(timezone.utc)
+        expired = await self.session.execute(delete(PlanCacheEntry).where(PlanCacheEntry.expires_at <= now))
+        removed = expired.rowcount or 0
+        total = await self.session.scalar(select(func.count()).select_from(PlanCacheEntry))
+        overflow = (total or 0) - max_entries
+        if overflow > 0:
+            stale_ids = select(PlanCacheEntry.id).order_by(PlanCacheEntry.last_used_at.asc()).limit(overflow)
+            trimmed = await self.session.execute(
+                delete(PlanCacheEntry).where(PlanCacheEntry.id.in_(stale_ids))
+            )
+            removed += trimmed.rowcount or 0
+        return removed
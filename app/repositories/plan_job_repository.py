@@ -0,0 +1,132 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Collection, Mapping, Optional
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PlanJob
+
+
+ACTIVE = ("queued", "running")
+
+
+def new_lease_token() -> str:
+    return str(uuid.uuid4())
+
+
+class PlanJobRepository:
+    """Plan jobs and their leases.
+
+    The worker responsible for a job, whether waiting for a slot or running it, holds its lease:
+    a token in ``lease_token`` that it renews by touching ``heartbeat_at``. Claiming and finishing
+    a job require the token, so a worker whose lease was taken over cannot run or finish it.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_for_user(
+        self, user_id: int, *, provider: str, request: dict[str, Any], requires_api_key: bool, lease_token: str
+    ) -> PlanJob:
+        job = PlanJob(
+            id=str(uuid.uuid4()),
+            owner_id=user_id,
+            status="queued",
+            provider=provider,
+            request=request,
+            requires_api_key=requires_api_key,
+            attempts=0,
+            lease_token=lease_token,
+            heartbeat_at=datetime.now(timezone.utc),
+        )
+        self.session.add(job)
+        await self.session.flush()
+        await self.session.refresh(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[PlanJob]:
+        result = await self.session.execute(select(PlanJob).where(PlanJob.id == job_id))
+        return result.scalar_one_or_none()
+
+    async def get_for_user(self, user_id: int, job_id: str) -> Optional[PlanJob]:
+        result = await self.session.execute(
+            select(PlanJob).where(PlanJob.id == job_id, PlanJob.owner_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def claim(self, job_id: str, lease_token: str) -> bool:
+        """Move a queued job to running; False unless it is still queued under this lease."""
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            update(PlanJob)
+            .where(PlanJob.id == job_id, PlanJob.status == "queued", PlanJob.lease_token == lease_token)
+            .values(status="running", started_at=now, heartbeat_at=now, attempts=PlanJob.attempts + 1)
+        )
+        return result.rowcount == 1
+
+    async def finish(
+        self, job_id: str, lease_token: str, *, plan_id: int | None = None, error: str | None = None
+    ) -> bool:
+        """Record the outcome; False if the lease was taken over, in which case nothing is written."""
+        result = await self.session.execute(
+            update(PlanJob)
+            .where(PlanJob.id == job_id, PlanJob.status.in_(ACTIVE), PlanJob.lease_token == lease_token)
+            .values(
+                status="failed" if error else "succeeded",
+                plan_id=plan_id,
+                error=error,
+                finished_at=datetime.now(timezone.utc),
+            )
+        )
+        return result.rowcount == 1
+
+    async def renew(self, leases: Mapping[str, str]) -> None:
+        """Touch ``heartbeat_at`` of the jobs still held under the given ``{job_id: lease_token}``."""
+        if not leases:
+            return
+        jobs = PlanJob.__table__
+        await self.session.execute(
+            update(jobs)
+            .where(
+                jobs.c.id == bindparam("job_id"),
+                jobs.c.lease_token == bindparam("token"),
+                jobs.c.status.in_(ACTIVE),
+            )
+            .values(heartbeat_at=datetime.now(timezone.utc)),
+            [{"job_id": job_id, "token": token} for job_id, token in leases.items()],
+        )
+
+    async def release(self, leases: Mapping[str, str]) -> None:
+        """Give up leases, e.g. on shutdown; the jobs go back to the queue for any worker to take."""
+        for job_id, token in leases.items():
+            await self.session.execute(
+                update(PlanJob)
+                .where(PlanJob.id == job_id, PlanJob.lease_token == token, PlanJob.status.in_(ACTIVE))
+                .values(status="queued", started_at=None, lease_token=None, heartbeat_at=None)
+            )
+
+    async def take_over_expired(self, lease_seconds: float, exclude: Collection[str] = ()) -> dict[str, str]:
+        """Take the lease of unfinished jobs whose holder stopped renewing it; returns the new leases.
+
+        Queued and running jobs alike go back to queued under a new token. Each job is taken with
+        its own update that re-checks the expiry, so of two workers sweeping at once only one gets it.
+        Jobs in ``exclude`` (the caller's own) are left alone.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=lease_seconds)
+        expired = PlanJob.status.in_(ACTIVE) & or_(PlanJob.heartbeat_at.is_(None), PlanJob.heartbeat_at < cutoff)
+        query = select(PlanJob.id).where(expired)
+        if exclude:
+            query = query.where(PlanJob.id.not_in(list(exclude)))
+        result = await self.session.execute(query.order_by(PlanJob.created_at.asc()))
+        taken: dict[str, str] = {}
+        for job_id in result.scalars().all():
+            token = new_lease_token()
+            updated = await self.session.execute(
+                update(PlanJob)
+                .where(PlanJob.id == job_id, expired)
+                .values(status="queued", started_at=None, lease_token=token, heartbeat_at=datetime.now(timezone.utc))
+            )
+            if updated.rowcount == 1:
+                taken[job_id] = token
+        return taken
@@ -1,50 +1,216 @@
-from typing import Any, Optional
+from datetime import datetime
+from typing import Any, Optional, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Row, Select, and_, func, or_, select, update
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models import TravelPlan
+from ..models import Expense, ItineraryDay, TravelPlan
+
+PlanCursor = tuple[int, datetime]
+
+# TravelPlan.itinerary is assembled from these rows, so every query that serializes a plan needs them.
+# Days and their activities come back in one query, joined.
+ITINERARY_LOADER = selectinload(TravelPlan.days).joinedload(ItineraryDay.items)
+
+SEARCH_COLUMNS = (
+    TravelPlan.title,
+    TravelPlan.destination,
+    TravelPlan.notes,
+    TravelPlan.start_date,
+    TravelPlan.end_date,
+)
+
+SUMMARY_COLUMNS = (
+    TravelPlan.id,
+    TravelPlan.title,
+    TravelPlan.destination,
+    TravelPlan.start_date,
+    TravelPlan.end_date,
+    TravelPlan.duration_days,
+    TravelPlan.travelers,
+    TravelPlan.budget_amount,
+    TravelPlan.currency,
+    TravelPlan.created_at,
+    TravelPlan.updated_at,
+)
 
 
 class TravelPlanRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def list_for_user(self, user_id: int) -> list[TravelPlan]:
-        result = await self.session.execute(
-            select(TravelPlan)
-            .options(selectinload(TravelPlan.expenses))
-            .where(TravelPlan.owner_id == user_id)
-            .order_by(TravelPlan.created_at.desc())
+    async def list_for_user(
+        self, user_id: int, *, limit: int | None = None, before: PlanCursor | None = None
+    ) -> list[TravelPlan]:
+        query = select(TravelPlan).options(joinedload(TravelPlan.expenses), ITINERARY_LOADER)
+        result = await self.session.execute(self._page(query, user_id, limit, before))
+        return list(result.unique().scalars().all())
+
+    async def list_summaries_for_user(
+        self, user_id: int, *, limit: int | None = None, before: PlanCursor | None = None
+    ) -> Sequence[RowMapping]:
+        """List columns only, with per-plan expense count and total aggregated in SQL."""
+        expense_count = (
+            select(func.count(Expense.id))
+            .where(Expense.plan_id == TravelPlan.id)
+            .correlate(TravelPlan)
+            .scalar_subquery()
+        )
+        expense_total = (
+            select(func.coalesce(func.sum(Expense.amount), 0.0))
+            .where(Expense.plan_id == TravelPlan.id)
+            .correlate(TravelPlan)
+            .scalar_subquery()
+        )
+        query = select(
+            *SUMMARY_COLUMNS,
+            expense_count.label("expense_count"),
+            expense_total.label("expense_total"),
+        )
+        result = await self.session.execute(self._page(query, user_id, limit, before))
+        return result.mappings().all()
+
+    def _page(self, query: Select, user_id: int, limit: int | None, before: PlanCursor | None) -> Select:
+        query = query.where(TravelPlan.owner_id == user_id).order_by(
+            TravelPlan.created_at.desc(), TravelPlan.id.desc()
         )
-        return list(result.scalars().all())
+        if before is not None:
+            plan_id, created_at = before
+            # Compare against the anchor row's stored value rather than a bound datetime: SQLite keeps
+            # server-default timestamps as text without microseconds, which bound values always carry.
+            anchor = func.coalesce(
+                select(TravelPlan.created_at).where(TravelPlan.id == plan_id).scalar_subquery(),
+                created_at,
+            )
+            query = query.where(
+                or_(
+                    TravelPlan.created_at < anchor,
+                    and_(TravelPlan.created_at == anchor, TravelPlan.id < plan_id),
+                )
+            )
+        if limit is not None:
+            query = query.limit(limit)
+        return query
 
     async def get_for_user(self, user_id: int, plan_id: int) -> Optional[TravelPlan]:
         result = await self.session.execute(
             select(TravelPlan)
-            .options(selectinload(TravelPlan.expenses))
+            .options(joinedload(TravelPlan.expenses), ITINERARY_LOADER)
             .where(
                 TravelPlan.id == plan_id,
                 TravelPlan.owner_id == user_id,
             )
         )
+        return result.unique().scalar_one_or_none()
+
+    async def get_row_for_user(self, user_id: int, plan_id: int) -> Optional[TravelPlan]:
+        """The plan row without its expenses or itinerary, e.g. to delete it under the version check."""
+        result = await self.session.execute(
+            select(TravelPlan)
+            .options(load_only(TravelPlan.id, TravelPlan.owner_id, TravelPlan.version))
+            .where(TravelPlan.id == plan_id, TravelPlan.owner_id == user_id)
+        )
         return result.scalar_one_or_none()
 
+    async def get_itinerary_for_user(self, user_id: int, plan_id: int) -> Optional[TravelPlan]:
+        """Load just enough of the plan to edit its itinerary under the version check, in one query."""
+        result = await self.session.execute(
+            select(TravelPlan)
+            .options(
+                load_only(
+                    TravelPlan.id,
+                    TravelPlan.owner_id,
+                    TravelPlan.itinerary_meta,
+                    TravelPlan.version,
+                    TravelPlan.expenses_version,
+                    # Server-default columns left unloaded are fetched by a SELECT after the UPDATE.
+                    TravelPlan.created_at,
+                    # Read when the edited itinerary is re-indexed for search.
+                    *SEARCH_COLUMNS,
+                ),
+                joinedload(TravelPlan.days).joinedload(ItineraryDay.items),
+            )
+            .where(TravelPlan.id == plan_id, TravelPlan.owner_id == user_id)
+        )
+        return result.unique().scalar_one_or_none()
+
+    async def get_many_for_search(self, plan_ids: Sequence[int]) -> Sequence[TravelPlan]:
+        result = await self.session.execute(
+            select(TravelPlan)
+            .options(load_only(TravelPlan.id, TravelPlan.owner_id, TravelPlan.itinerary_meta, *SEARCH_COLUMNS))
+            .options(ITINERARY_LOADER)
+            .where(TravelPlan.id.in_(plan_ids))
+        )
+        return result.scalars().all()
+
+    async def exists_for_user(self, user_id: int, plan_id: int) -> bool:
+        result = await self.session.execute(
+            select(TravelPlan.id).where(TravelPlan.id == plan_id, TravelPlan.owner_id == user_id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def get_versions_for_user(self, user_id: int, plan_id: int) -> Optional[Row]:
+        result = await self.session.execute(
+            select(TravelPlan.id, TravelPlan.version, TravelPlan.expenses_version).where(
+                TravelPlan.id == plan_id, TravelPlan.owner_id == user_id
+            )
+        )
+        return result.one_or_none()
+
+    async def list_versions_for_user(
+        self, user_id: int, *, limit: int | None = None, before: PlanCursor | None = None
+    ) -> Sequence[Row]:
+        """The same page as :meth:`list_for_user`, reduced to the columns an ETag is built from."""
+        query = select(TravelPlan.id, TravelPlan.version, TravelPlan.expenses_version)
+        result = await self.session.execute(self._page(query, user_id, limit, before))
+        return result.all()
+
+    async def bump_expenses_version(self, plan_id: int) -> None:
+        await self.session.execute(
+            update(TravelPlan)
+            .where(TravelPlan.id == plan_id)
+            # Keep updated_at: it reflects edits to the plan itself, not to its ledger.
+            .values(expenses_version=TravelPlan.expenses_version + 1, updated_at=TravelPlan.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_budget_for_user(self, user_id: int, plan_id: int) -> Optional[RowMapping]:
+        result = await self.session.execute(
+            select(
+                TravelPlan.budget_amount,
+                TravelPlan.currency,
+                TravelPlan.budget_breakdown,
+                TravelPlan.expenses_version,
+            ).where(TravelPlan.id == plan_id, TravelPlan.owner_id == user_id)
+        )
+        return result.mappings().one_or_none()
+
     async def create_for_user(self, user_id: int, data: dict[str, Any]) -> TravelPlan:
-        plan = TravelPlan(owner_id=user_id, **data)
+        # A new plan has no expenses; initialising the collection avoids a load on serialization.
+        plan = TravelPlan(owner_id=user_id, expenses=[], **data)
         self.session.add(plan)
-        await self.session.flush()
-        await self.session.refresh(plan)
+        await self.session.flush()  # created_at/updated_at come back with the INSERT (eager_defaults)
         return plan
 
     async def update(self, plan: TravelPlan, data: dict[str, Any]) -> TravelPlan:
         for key, value in data.items():
             setattr(plan, key, value)
         self.session.add(plan)
-        await self.session.flush()
-        await self.session.refresh(plan)
+        await self.session.flush()  # updated_at comes back with the UPDATE (eager_defaults)
         return plan
 
+    async def get_raw_plan_legacy(self, plan_ids: Sequence[int]) -> dict[int, str]:
+        """Raw LLM output of plans that still keep it inline (not yet compacted into planblob)."""
+        result = await self.session.execute(
+            select(TravelPlan.id, TravelPlan.raw_plan_legacy).where(
+                TravelPlan.id.in_(plan_ids),
+                TravelPlan.raw_plan_digest.is_(None),
+                TravelPlan.raw_plan_legacy.is_not(None),
+            )
+        )
+        return {plan_id: text for plan_id, text in result.all()}
+
     async def delete(self, plan: TravelPlan) -> None:
         await self.session.delete(plan)
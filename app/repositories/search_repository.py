@@ -0,0 +1,89 @@
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import Row, column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import TravelPlan
+
+
+def owner_token(owner_id: int) -> str:
+    return f"u{owner_id}"
+
+
+class SearchRepository:
+    """Writes and queries the ``plansearch`` index; the query syntax is built by the caller.
+
+    The index has one document per plan. Its shape is dialect-specific (an FTS5 table on SQLite,
+    a tsvector column on Postgres), so the migrations create it rather than the ORM metadata.
+    A document is dropped with its plan, by the foreign key on Postgres and by a trigger on
+    SQLite (migration 0003), so deletes need no statement here.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.postgres = session.bind.dialect.name == "postgresql"
+
+    async def upsert(self, documents: list[tuple[int, int, dict[str, str], dict[str, Any]]]) -> None:
+        """Write ``(plan_id, owner_id, fields, source)`` documents, replacing existing ones."""
+        params = [
+            {
+                "plan_id": plan_id,
+                "owner_id": owner_id,
+                "owner": owner_token(owner_id),
+                "source": json.dumps(source, ensure_ascii=False),
+                **fields,
+            }
+            for plan_id, owner_id, fields, source in documents
+        ]
+        if self.postgres:
+            statement = (
+                "INSERT INTO plansearch (plan_id, owner_id, document, source) VALUES (:plan_id, :owner_id, "
+                "setweight(to_tsvector('simple', :title), 'A') "
+                "|| setweight(to_tsvector('simple', :destination), 'B') "
+                "|| setweight(to_tsvector('simple', :activities), 'C') "
+                "|| setweight(to_tsvector('simple', :notes), 'D'), CAST(:source AS JSONB)) "
+                "ON CONFLICT (plan_id) DO UPDATE SET owner_id = excluded.owner_id, "
+                "document = excluded.document, source = excluded.source"
+            )
+        else:
+            statement = (
+                "INSERT OR REPLACE INTO plansearch (rowid, title, destination, activities, notes, owner, source) "
+                "VALUES (:plan_id, :title, :destination, :activities, :notes, :owner, :source)"
+            )
+        await self.session.execute(text(statement), params)
+
+    @property
+    def key(self) -> str:
+        return "plan_id" if self.postgres else "rowid"
+
+    async def search(self, owner_id: int, query: str, limit: int) -> Sequence[Row]:
+        """Best matches first as ``(plan_id, score, source)`` rows; higher scores rank higher."""
+        if self.postgres:
+            statement = (
+                "SELECT plan_id, ts_rank_cd(document, query) AS score, source "
+                "FROM plansearch, to_tsquery('simple', :query) AS query "
+                "WHERE owner_id = :owner_id AND document @@ query ORDER BY score DESC LIMIT :limit"
+            )
+        else:
+            # The owner is an indexed token, so FTS5 intersects postings instead of scoring every
+            # user's matches. bm25() is lower for better matches; the weights favour the title.
+            statement = (
+                "SELECT rowid AS plan_id, -bm25(plansearch, 8.0, 4.0, 2.0, 1.0, 0.0) AS score, source "
+                "FROM plansearch WHERE plansearch MATCH :query ORDER BY score DESC LIMIT :limit"
+            )
+            query = f"owner : {owner_token(owner_id)} AND ({query})"
+        result = await self.session.execute(
+            text(statement), {"query": query, "owner_id": owner_id, "limit": limit}
+        )
+        return result.all()
+
+    async def unindexed_plan_ids(self, after_id: int, limit: int) -> list[int]:
+        indexed = table("plansearch", column(self.key))
+        result = await self.session.execute(
+            select(TravelPlan.id)
+            .where(TravelPlan.id > after_id, TravelPlan.id.not_in(select(indexed.c[self.key])))
+            .order_by(TravelPlan.id)
+            .limit(limit)
+        )
+        return list(result.scalars())
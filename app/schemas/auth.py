@@ -32,3 +32,14 @@ class UserProfile(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class CurrentUser(BaseModel):
+    """Lightweight snapshot of the authenticated principal, safe to cache across requests."""
+
+    id: int
+    email: EmailStr
+    full_name: str | None = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True, "frozen": True}
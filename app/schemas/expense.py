@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, Field
 
@@ -20,3 +20,89 @@ class ExpenseRead(ExpenseBase):
     incurred_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ExpenseImportError(BaseModel):
+    line: int
+    message: str
+
+
+class ExpenseImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: list[ExpenseImportError] = Field(
+        default_factory=list, description="Per-row errors, truncated to the configured maximum."
+    )
+
+
+class ExpenseTotal(BaseModel):
+    total: float
+    count: int
+
+
+class CurrencyTotal(ExpenseTotal):
+    currency: str
+
+
+class CategoryTotal(ExpenseTotal):
+    category: str
+    currency: str
+
+
+class DailyTotal(ExpenseTotal):
+    day: date
+    currency: str
+
+
+class PlanTotal(ExpenseTotal):
+    plan_id: int
+    title: str
+    currency: str
+
+
+class ConvertedTotal(BaseModel):
+    """Every expense converted into one currency with the offline rate table."""
+
+    currency: str
+    total: float = 0.0
+    count: int = 0
+    rates_version: str
+    unconverted_currencies: list[str] = Field(
+        default_factory=list, description="Currencies without a rate; their expenses are excluded from the total."
+    )
+
+
+class BudgetLine(BaseModel):
+    category: str
+    planned: float | None = None
+    spent: float = 0.0
+    remaining: float | None = None
+
+
+class BudgetComparison(BaseModel):
+    """Spending, converted into the budget currency, against the LLM-produced ``budget_breakdown.summary``."""
+
+    currency: str
+    planned: float | None = None
+    spent: float = 0.0
+    remaining: float | None = None
+    items: list[BudgetLine] = Field(default_factory=list)
+
+
+class ExpenseSummary(BaseModel):
+    plan_id: int
+    expense_count: int = 0
+    by_currency: list[CurrencyTotal] = Field(default_factory=list)
+    by_category: list[CategoryTotal] = Field(default_factory=list)
+    by_day: list[DailyTotal] = Field(default_factory=list)
+    converted: ConvertedTotal | None = None
+    budget: BudgetComparison | None = None
+
+
+class ExpenseRollup(BaseModel):
+    plan_count: int = 0
+    expense_count: int = 0
+    by_currency: list[CurrencyTotal] = Field(default_factory=list)
+    by_category: list[CategoryTotal] = Field(default_factory=list)
+    by_plan: list[PlanTotal] = Field(default_factory=list)
+    converted: ConvertedTotal | None = None
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class PlanJobRead(BaseModel):
+    id: str
+    status: str
+    provider: str
+    plan_id: int | None = None
+    error: str | None = None
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = {"from_attributes": True}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, validator
 
@@ -68,6 +68,7 @@ class PlanGenerationRequest(PlanIntent):
     llm_model: str | None = Field(default=None, description="Optional model override for the selected provider.")
     llm_endpoint: str | None = Field(default=None, description="Optional API endpoint override.")
     llm_api_key: str | None = Field(default=None, description="Optional API key override for the provider.")
+    bypass_cache: bool = Field(default=False, description="Skip cached LLM output and generate a fresh plan.")
 
 
 class PlanGenerationResponse(BaseModel):
@@ -87,7 +88,6 @@ class TravelPlanBase(BaseModel):
     itinerary: dict[str, Any] | None = None
     budget_breakdown: dict[str, Any] | None = None
     notes: str | None = None
-    raw_plan_text: str | None = None
 
 
 class TravelPlanCreate(TravelPlanBase):
@@ -108,12 +108,115 @@ class TravelPlanUpdate(BaseModel):
     notes: str | None = None
 
 
+class ItineraryOperation(BaseModel):
+    """One RFC 6902 (JSON Patch) operation; paths are JSON pointers into ``itinerary``."""
+
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str = Field(examples=["/days/0/activities/1"])
+    from_: str | None = Field(default=None, alias="from")
+    value: Any = None
+
+    model_config = {"populate_by_name": True}
+
+
+class ItineraryChange(BaseModel):
+    """The fragment an operation produced: the value now at ``path`` (absent for ``remove``)."""
+
+    op: str
+    path: str
+    from_: str | None = Field(default=None, alias="from")
+    value: Any = None
+
+    model_config = {"populate_by_name": True, "validate_assignment": True}
+
+
+class ItineraryPatchResult(BaseModel):
+    changes: list[ItineraryChange]
+
+
+class ActivityRead(BaseModel):
+    """One itinerary activity with the plan and day it belongs to (``day_index``/``activity_index``
+    are its position in ``itinerary.days[...].activities[...]``)."""
+
+    id: int
+    plan_id: int
+    plan_title: str
+    date: dt.date | None = None
+    day_index: int
+    activity_index: int
+    time: str | None = None
+    title: str | None = None
+    location: str | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+    estimated_cost: float | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class SearchSnippet(BaseModel):
+    """An HTML-escaped excerpt of a matching field with the matched terms wrapped in ``<mark>``."""
+
+    field: Literal["title", "destination", "activity", "notes"]
+    text: str
+    day_index: int | None = None
+    activity_index: int | None = None
+
+
+class PlanSearchHit(BaseModel):
+    id: int
+    title: str
+    destination: str
+    start_date: dt.date | None = None
+    end_date: dt.date | None = None
+    score: float = Field(description="Relevance; higher is better, comparable only within one response.")
+    snippets: list[SearchSnippet] = []
+
+
+class DayRouteRead(BaseModel):
+    """``order`` lists the day's original activity indexes in their new visiting order."""
+
+    day_index: int
+    order: list[int]
+    changed: bool
+    distance_km_before: float
+    distance_km_after: float
+
+
+class RouteOptimizationResult(BaseModel):
+    applied: bool = Field(description="False for a dry run or when no day could be shortened.")
+    distance_km_before: float
+    distance_km_after: float
+    days: list[DayRouteRead]
+
+
 class TravelPlanRead(TravelPlanBase):
     id: int
     owner_id: int
     created_at: dt.datetime
     updated_at: dt.datetime
     expenses: list[ExpenseRead] | None = None
+    raw_plan_text: str | None = Field(default=None, description="Raw LLM output; only returned with ?include=raw.")
+
+    model_config = {"from_attributes": True}
+
+
+class TravelPlanSummary(BaseModel):
+    """List-view projection of a plan: no itinerary, budget breakdown or expenses."""
+
+    id: int
+    title: str
+    destination: str
+    start_date: dt.date | None = None
+    end_date: dt.date | None = None
+    duration_days: int | None = None
+    travelers: int | None = None
+    budget_amount: float | None = None
+    currency: str = "CNY"
+    created_at: dt.datetime
+    updated_at: dt.datetime
+    expense_count: int = 0
+    expense_total: float = 0.0
 
     model_config = {"from_attributes": True}
 
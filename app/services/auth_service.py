@@ -1,10 +1,15 @@
+from typing import Awaitable, TypeVar
+
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core import security
+from ..core.principals import invalidate_principal
 from ..repositories.user_repository import UserRepository
 from ..schemas.auth import UserRegister
 
+T = TypeVar("T")
+
 
 class AuthService:
     def __init__(self, session: AsyncSession):
@@ -15,19 +20,30 @@ class AuthService:
         existing = await self.repo.get_by_email(payload.email)
         if existing:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-        hashed_password = security.get_password_hash(payload.password)
+        hashed_password = await self._run_hasher(security.password_hasher.hash(payload.password))
         user = await self.repo.create(
             email=payload.email,
             hashed_password=hashed_password,
             full_name=payload.full_name,
         )
         await self.session.commit()
+        invalidate_principal(user.email)
         return user
 
     async def authenticate(self, email: str, password: str):
         user = await self.repo.get_by_email(email)
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
-        if not security.verify_password(password, user.hashed_password):
+        if not await self._run_hasher(security.password_hasher.verify(password, user.hashed_password)):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
         return user
+
+    async def _run_hasher(self, call: Awaitable[T]) -> T:
+        try:
+            return await call
+        except security.PasswordHasherBusy as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            ) from exc
@@ -0,0 +1,74 @@
+import hashlib
+import zlib
+from importlib.util import find_spec
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..repositories.blob_repository import BlobRepository
+
+ZSTD_AVAILABLE = find_spec("zstandard") is not None
+
+CODECS = ("zstd", "zlib", "none")
+
+
+def resolve_codec(name: str | None = None) -> str:
+    """The configured codec, falling back to zlib when ``zstandard`` is not installed."""
+    codec = (name or settings.raw_plan_codec).lower()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown blob codec: {codec}")
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        return "zlib"
+    return codec
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=settings.raw_plan_compression_level).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, min(settings.raw_plan_compression_level, 9))
+    return data
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required to read zstd-compressed blobs")
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "none":
+        return data
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Content-addressed text storage: ``put_text`` returns the key later passed to ``get_texts``."""
+
+    def __init__(self, session: AsyncSession):
+        self.repo = BlobRepository(session)
+
+    async def put_text(self, text: str) -> str:
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        if await self.repo.touch(digest):
+            return digest
+        codec = resolve_codec()
+        data = compress(raw, codec)
+        if len(data) >= len(raw):
+            codec, data = "none", raw
+        await self.repo.add(digest, codec=codec, size=len(raw), data=data)
+        return digest
+
+    async def get_texts(self, digests: Iterable[str]) -> dict[str, str]:
+        rows = await self.repo.get_many(digests)
+        return {row.digest: decompress(row.data, row.codec).decode("utf-8") for row in rows}
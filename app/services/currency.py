@@ -0,0 +1,129 @@
+import csv
+import hashlib
+import json
+import logging
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..repositories.exchange_rate_repository import ExchangeRateRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RateTable:
+    """Immutable offline rate table: one ``array('d')`` of units-per-base, indexed by currency code."""
+
+    def __init__(self, base: str, rates: Mapping[str, float], *, source: str = "empty") -> None:
+        base = base.upper()
+        per_base = {code.upper(): float(rate) for code, rate in rates.items() if float(rate) > 0}
+        per_base[base] = 1.0
+        codes = sorted(per_base)
+        self.base = base
+        self.source = source
+        self._index = {code: position for position, code in enumerate(codes)}
+        self._per_base = array("d", (per_base[code] for code in codes))
+        fingerprint = json.dumps([base, [[code, per_base[code]] for code in codes]])
+        self.version = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+    def __contains__(self, code: str) -> bool:
+        return code.upper() in self._index
+
+    def rate(self, source: str, target: str) -> float | None:
+        """Multiplier turning an amount in ``source`` into ``target``; ``None`` if either is unknown."""
+        source_index = self._index.get(source.upper())
+        target_index = self._index.get(target.upper())
+        if source_index is None or target_index is None:
+            return None
+        return self._per_base[target_index] / self._per_base[source_index]
+
+    def convert_column(
+        self, amounts: Sequence[float], currencies: Sequence[str], target: str
+    ) -> list[float | None]:
+        """Convert a column of amounts in one pass, resolving each distinct currency's factor once."""
+        factors = {code: self.rate(code, target) for code in set(currencies)}
+        return [
+            None if factors[currency] is None else amount * factors[currency]
+            for amount, currency in zip(amounts, currencies)
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "base": self.base,
+            "version": self.version,
+            "source": self.source,
+            "rates": {code: self._per_base[position] for code, position in self._index.items()},
+        }
+
+
+def read_rate_file(path: Path) -> tuple[str | None, dict[str, float]]:
+    """Read ``{"base": ..., "rates": {...}}`` JSON, or CSV rows of ``currency,per_base``."""
+    if path.suffix.lower() == ".json":
+        document = json.loads(path.read_text(encoding="utf-8"))
+        if "rates" in document:
+            return document.get("base"), {code: float(rate) for code, rate in document["rates"].items()}
+        return None, {code: float(rate) for code, rate in document.items()}
+    rates: dict[str, float] = {}
+    with path.open(newline="", encoding="utf-8-sig") as handle:
+        for row in csv.reader(handle):
+            if len(row) < 2 or not row[0].strip():
+                continue
+            try:
+                rates[row[0].strip()] = float(row[1])
+            except ValueError:
+                continue  # header row
+    return None, rates
+
+
+class ExchangeRates:
+    """Process-wide holder of the current :class:`RateTable`, loaded without any network access.
+
+    Each worker holds its own table. An update through :meth:`replace` reloads only the worker
+    that handled it, so :meth:`current` reloads any table older than
+    ``exchange_rate_reload_seconds``; the other workers follow within that interval.
+    """
+
+    def __init__(self) -> None:
+        self.table = RateTable(settings.exchange_rate_base, {})
+        self.loaded_at = time.monotonic()
+
+    @property
+    def file_backed(self) -> bool:
+        return bool(settings.exchange_rate_file)
+
+    async def load(self, session: AsyncSession) -> RateTable:
+        if settings.exchange_rate_file:
+            path = Path(settings.exchange_rate_file)
+            base, rates = read_rate_file(path)
+            source = f"file:{path.name}"
+        else:
+            base, rates = None, await ExchangeRateRepository(session).load()
+            source = "database"
+        self.table = RateTable(base or settings.exchange_rate_base, rates, source=source)
+        self.loaded_at = time.monotonic()
+        return self.table
+
+    async def current(self, session: AsyncSession) -> RateTable:
+        """The table, reloaded first when it is older than the reload interval."""
+        interval = settings.exchange_rate_reload_seconds
+        if interval > 0 and time.monotonic() - self.loaded_at >= interval:
+            try:
+                return await self.load(session)
+            except (OSError, ValueError, SQLAlchemyError):
+                # Keep serving the last good table rather than failing the request; retry next interval.
+                logger.exception("Could not reload exchange rates")
+                self.loaded_at = time.monotonic()
+        return self.table
+
+    async def replace(self, session: AsyncSession, rates: Mapping[str, float]) -> RateTable:
+        await ExchangeRateRepository(session).replace({code.upper(): rate for code, rate in rates.items()})
+        await session.commit()
+        return await self.load(session)
+
+
+exchange_rates = ExchangeRates()
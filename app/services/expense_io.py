@@ -0,0 +1,116 @@
+import codecs
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterable, Literal
+
+from ..models import Expense
+
+ExpenseFormat = Literal["csv", "ndjson"]
+
+EXPORT_COLUMNS = ("id", "category", "amount", "currency", "note", "incurred_at")
+MEDIA_TYPES: dict[str, str] = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@dataclass(frozen=True)
+class ParsedRow:
+    line: int
+    fields: dict[str, Any] | None = None
+    error: str | None = None
+
+
+def detect_format(content_type: str | None) -> ExpenseFormat | None:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in {"text/csv", "application/csv"}:
+        return "csv"
+    if media_type in {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"}:
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 (BOM tolerated) and yield it line by line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def parse_rows(lines: AsyncIterator[str], fmt: ExpenseFormat) -> AsyncIterator[ParsedRow]:
+    parser = _parse_csv if fmt == "csv" else _parse_ndjson
+    async for row in parser(lines):
+        yield row
+
+
+async def _parse_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as exc:
+            yield ParsedRow(number, error=f"invalid JSON: {exc.msg}")
+            continue
+        if not isinstance(fields, dict):
+            yield ParsedRow(number, error="expected a JSON object")
+            continue
+        yield ParsedRow(number, fields=fields)
+
+
+async def _parse_csv(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    header: list[str] | None = None
+    record: list[str] = []
+    start = number = 0
+    async for line in lines:
+        number += 1
+        if not record:
+            start = number
+        record.append(line)
+        # A quoted field may span lines; wait until the quotes balance before parsing the record.
+        if sum(part.count('"') for part in record) % 2:
+            continue
+        text, record = "\n".join(record), []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        if len(values) != len(header):
+            yield ParsedRow(start, error=f"expected {len(header)} columns, got {len(values)}")
+            continue
+        # Empty cells fall back to the schema defaults (currency, note, incurred_at).
+        yield ParsedRow(start, fields={name: value for name, value in zip(header, values) if value != ""})
+    if record:
+        yield ParsedRow(start, error="unterminated quoted field")
+
+
+def expense_record(expense: Expense) -> dict[str, Any]:
+    return {
+        "id": expense.id,
+        "category": expense.category,
+        "amount": expense.amount,
+        "currency": expense.currency,
+        "note": expense.note,
+        "incurred_at": expense.incurred_at.isoformat() if expense.incurred_at else None,
+    }
+
+
+def format_records(records: Iterable[dict[str, Any]], fmt: ExpenseFormat, *, header: bool = False) -> str:
+    if fmt == "ndjson":
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue()
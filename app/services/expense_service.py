@@ -1,11 +1,50 @@
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Hashable, Iterable, Sequence
 
 from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.etags import make_etag
 from ..repositories.expense_repository import ExpenseRepository
 from ..repositories.plan_repository import TravelPlanRepository
-from ..schemas.expense import ExpenseCreate
+from ..schemas.expense import (
+    BudgetComparison,
+    BudgetLine,
+    CategoryTotal,
+    ConvertedTotal,
+    CurrencyTotal,
+    DailyTotal,
+    ExpenseCreate,
+    ExpenseImportError,
+    ExpenseImportResult,
+    ExpenseRollup,
+    ExpenseSummary,
+    PlanTotal,
+)
+from .currency import RateTable, exchange_rates
+from .expense_io import ExpenseFormat, ParsedRow, expense_record, format_records
+
+
+@dataclass(frozen=True)
+class PlanLedger:
+    """Grouped (category, day, currency) totals of one plan, plus each group converted to the rate base."""
+
+    rows: Sequence[Row]
+    base_totals: list[float | None]
+
+
+# Keyed by (plan id, expenses_version, rates version): every expense write bumps the plan's
+# expenses_version, so a ledger cached by any worker is never served after the ledger changes.
+ledger_cache: TTLCache[tuple[int, int, str], PlanLedger] = TTLCache(
+    settings.expense_summary_cache_size,
+    ttl=settings.expense_summary_cache_ttl_seconds,
+)
 
 
 class ExpenseService:
@@ -13,35 +52,280 @@ class ExpenseService:
         self.session = session
         self.repo = ExpenseRepository(session)
         self.plan_repo = TravelPlanRepository(session)
+        self._owned_plans: set[int] = set()
 
     async def list_expenses(self, user_id: int, plan_id: int):
-        plan = await self.plan_repo.get_for_user(user_id, plan_id)
-        if not plan:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
-        return await self.repo.list_for_plan(plan.id)
+        await self.ensure_plan(user_id, plan_id)
+        return await self.repo.list_for_plan(plan_id)
 
     async def add_expense(self, user_id: int, plan_id: int, payload: ExpenseCreate):
-        plan = await self.plan_repo.get_for_user(user_id, plan_id)
-        if not plan:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        await self.ensure_plan(user_id, plan_id)
         incurred_at = payload.incurred_at or datetime.now(timezone.utc)
         expense = await self.repo.create_for_plan(
-            plan.id,
+            plan_id,
             category=payload.category,
             amount=payload.amount,
             currency=payload.currency,
             note=payload.note,
             incurred_at=incurred_at,
         )
+        await self.plan_repo.bump_expenses_version(plan_id)
         await self.session.commit()
         return expense
 
+    async def import_expenses(
+        self, user_id: int, plan_id: int, rows: AsyncIterator[ParsedRow], *, atomic: bool = False
+    ) -> ExpenseImportResult:
+        """Validate rows as they are parsed and insert them in batches within one transaction.
+
+        Invalid rows are reported and skipped; with ``atomic`` any invalid row rolls back the
+        whole import instead.
+        """
+        await self.ensure_plan(user_id, plan_id)
+        result = ExpenseImportResult()
+        now = datetime.now(timezone.utc)
+        batch: list[dict[str, Any]] = []
+        async for row in rows:
+            error = row.error
+            if error is None:
+                try:
+                    payload = ExpenseCreate.model_validate(row.fields)
+                except ValidationError as exc:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in exc.errors()
+                    )
+            if error is not None:
+                result.failed += 1
+                if len(result.errors) < settings.expense_import_max_errors:
+                    result.errors.append(ExpenseImportError(line=row.line, message=error))
+                continue
+            if atomic and result.failed:
+                # The import will be rolled back; keep validating for the report but stop inserting.
+                continue
+            batch.append({**payload.model_dump(), "incurred_at": payload.incurred_at or now})
+            if len(batch) >= settings.expense_import_batch_size:
+                result.imported += await self.repo.insert_many(plan_id, batch)
+                batch = []
+        if atomic and result.failed:
+            await self.session.rollback()
+            result.imported = 0
+            return result
+        result.imported += await self.repo.insert_many(plan_id, batch)
+        if result.imported:
+            await self.plan_repo.bump_expenses_version(plan_id)
+        await self.session.commit()
+        return result
+
+    async def export_expenses(self, plan_id: int, fmt: ExpenseFormat) -> AsyncIterator[str]:
+        """Yield the ledger as CSV or NDJSON text, one chunk per cursor batch.
+
+        Ownership must be checked (:meth:`ensure_plan`) before the stream is started.
+        """
+        result = await self.repo.stream_for_plan(plan_id, batch_size=settings.expense_export_batch_size)
+        if fmt == "csv":
+            yield format_records([], fmt, header=True)
+        async for partition in result.partitions():
+            yield format_records((expense_record(expense) for expense in partition), fmt)
+
     async def delete_expense(self, user_id: int, plan_id: int, expense_id: int) -> None:
-        plan = await self.plan_repo.get_for_user(user_id, plan_id)
-        if not plan:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
-        expense = await self.repo.get(expense_id, plan.id)
+        await self.ensure_plan(user_id, plan_id)
+        expense = await self.repo.get(expense_id, plan_id)
         if not expense:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
         await self.repo.delete(expense)
+        await self.plan_repo.bump_expenses_version(plan_id)
         await self.session.commit()
+
+    async def summarize_plan(self, user_id: int, plan_id: int) -> ExpenseSummary:
+        plan = await self.plan_repo.get_budget_for_user(user_id, plan_id)
+        if plan is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        rates = await exchange_rates.current(self.session)
+        ledger = await self._ledger(plan_id, plan["expenses_version"], rates)
+        rows = ledger.rows
+        budget_summary = _budget_summary(plan)
+        currency = budget_summary.get("currency") or plan["currency"]
+        amounts = _in_currency(ledger, rates, currency)
+        return ExpenseSummary(
+            plan_id=plan_id,
+            expense_count=sum(row.count for row in rows),
+            by_currency=[
+                CurrencyTotal(currency=currency, total=total, count=count)
+                for (currency,), (total, count) in _by_total(_fold(rows, lambda row: (row.currency,)))
+            ],
+            by_category=[
+                CategoryTotal(category=category, currency=currency, total=total, count=count)
+                for (category, currency), (total, count) in _by_total(
+                    _fold(rows, lambda row: (row.category, row.currency))
+                )
+            ],
+            by_day=[
+                DailyTotal(day=day, currency=currency, total=total, count=count)
+                for (day, currency), (total, count) in _fold(rows, lambda row: (row.day, row.currency)).items()
+            ],
+            converted=_converted_total(rows, amounts, rates, currency),
+            budget=_compare_budget(plan, budget_summary, currency, rows, amounts),
+        )
+
+    async def _ledger(self, plan_id: int, expenses_version: int, rates: RateTable) -> PlanLedger:
+        key = (plan_id, expenses_version, rates.version)
+        ledger = ledger_cache.get(key)
+        if ledger is None:
+            rows = await self.repo.totals_for_plan(plan_id)
+            base_totals = rates.convert_column(
+                [row.total or 0.0 for row in rows], [row.currency for row in rows], rates.base
+            )
+            ledger = PlanLedger(rows=rows, base_totals=base_totals)
+            ledger_cache.set(key, ledger)
+        return ledger
+
+    async def summarize_user(self, user_id: int) -> ExpenseRollup:
+        rates = await exchange_rates.current(self.session)
+        rows = await self.repo.totals_for_user(user_id)
+        by_plan = _fold(rows, lambda row: (row.plan_id, row.title, row.currency))
+        return ExpenseRollup(
+            plan_count=len({row.plan_id for row in rows}),
+            expense_count=sum(row.count for row in rows),
+            by_currency=[
+                CurrencyTotal(currency=currency, total=total, count=count)
+                for (currency,), (total, count) in _by_total(_fold(rows, lambda row: (row.currency,)))
+            ],
+            by_category=[
+                CategoryTotal(category=category, currency=currency, total=total, count=count)
+                for (category, currency), (total, count) in _by_total(
+                    _fold(rows, lambda row: (row.category, row.currency))
+                )
+            ],
+            by_plan=[
+                PlanTotal(plan_id=plan_id, title=title, currency=currency, total=total, count=count)
+                for (plan_id, title, currency), (total, count) in by_plan.items()
+            ],
+            converted=_converted_total(
+                rows,
+                rates.convert_column([row.total or 0.0 for row in rows], [row.currency for row in rows], rates.base),
+                rates,
+                rates.base,
+            ),
+        )
+
+    async def list_etag(self, user_id: int, plan_id: int) -> str:
+        row = await self._versions(user_id, plan_id)
+        return make_etag("expenses", plan_id, row.expenses_version)
+
+    async def summary_etag(self, user_id: int, plan_id: int) -> str:
+        # The summary also depends on the plan's budget (row version) and on the rate table.
+        row = await self._versions(user_id, plan_id)
+        rates = await exchange_rates.current(self.session)
+        return make_etag("summary", plan_id, row.version, row.expenses_version, rates.version)
+
+    async def _versions(self, user_id: int, plan_id: int) -> Row:
+        row = await self.plan_repo.get_versions_for_user(user_id, plan_id)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        self._owned_plans.add(plan_id)
+        return row
+
+    async def ensure_plan(self, user_id: int, plan_id: int) -> None:
+        # Ownership check only: selects the id instead of loading the plan and its expenses.
+        if plan_id in self._owned_plans:
+            return
+        if not await self.plan_repo.exists_for_user(user_id, plan_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        self._owned_plans.add(plan_id)
+
+
+def _fold(rows: Iterable[Any], key) -> dict[Hashable, tuple[float, int]]:
+    """Re-aggregate grouped (total, count) rows under a coarser key, preserving first-seen order."""
+    totals: dict[Hashable, list] = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        bucket = totals[key(row)]
+        bucket[0] += row.total or 0.0
+        bucket[1] += row.count
+    return {group: (round(total, 2), count) for group, (total, count) in totals.items()}
+
+
+def _by_total(totals: dict[Hashable, tuple[float, int]]) -> list[tuple[Hashable, tuple[float, int]]]:
+    return sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+
+
+def _budget_summary(plan: Any) -> dict[str, Any]:
+    return (plan["budget_breakdown"] or {}).get("summary") or {}
+
+
+def _in_currency(ledger: PlanLedger, rates: RateTable, currency: str) -> list[float | None]:
+    """Each ledger group's total in ``currency``; ``None`` where no rate is available."""
+    factor = rates.rate(rates.base, currency)
+    if factor is None:
+        # Target currency missing from the table: only same-currency spending is comparable.
+        return [row.total if row.currency.upper() == currency.upper() else None for row in ledger.rows]
+    return [None if total is None else total * factor for total in ledger.base_totals]
+
+
+def _converted_total(
+    rows: Sequence[Row], amounts: Sequence[float | None], rates: RateTable, currency: str
+) -> ConvertedTotal:
+    total = 0.0
+    count = 0
+    unconverted: set[str] = set()
+    for row, amount in zip(rows, amounts):
+        if amount is None:
+            unconverted.add(row.currency)
+            continue
+        total += amount
+        count += row.count
+    return ConvertedTotal(
+        currency=currency,
+        total=round(total, 2),
+        count=count,
+        rates_version=rates.version,
+        unconverted_currencies=sorted(unconverted),
+    )
+
+
+def _compare_budget(
+    plan: Any,
+    summary: dict[str, Any],
+    currency: str,
+    rows: Sequence[Row],
+    amounts: Sequence[float | None],
+) -> BudgetComparison | None:
+    planned_total = _as_amount(summary.get("total"))
+    if planned_total is None:
+        planned_total = plan["budget_amount"]
+    items = [item for item in summary.get("items") or [] if isinstance(item, dict)]
+    if planned_total is None and not items:
+        return None
+    # Spending is converted into the budget currency; budget categories match case-insensitively.
+    spent_by_category: dict[str, list] = {}
+    for row, amount in zip(rows, amounts):
+        if amount is not None:
+            entry = spent_by_category.setdefault(row.category.casefold(), [row.category, 0.0])
+            entry[1] += amount
+    lines: list[BudgetLine] = []
+    for item in items:
+        category = str(item.get("category") or "")
+        _label, spent = spent_by_category.pop(category.casefold(), (category, 0.0))
+        lines.append(_budget_line(category, _as_amount(item.get("amount")), spent))
+    lines.extend(_budget_line(label, None, spent) for label, spent in spent_by_category.values())
+    spent_total = round(sum(line.spent for line in lines), 2)
+    return BudgetComparison(
+        currency=currency,
+        planned=planned_total,
+        spent=spent_total,
+        remaining=round(planned_total - spent_total, 2) if planned_total is not None else None,
+        items=lines,
+    )
+
+
+def _budget_line(category: str, planned: float | None, spent: float) -> BudgetLine:
+    spent = round(spent, 2)
+    remaining = round(planned - spent, 2) if planned is not None else None
+    return BudgetLine(category=category, planned=planned, spent=spent, remaining=remaining)
+
+
+def _as_amount(value: Any) -> float | None:
+    # Budget figures come from LLM output and are not guaranteed to be numeric.
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
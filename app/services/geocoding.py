@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Protocol
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.http import http_clients
+from ..core.singleflight import SingleFlight
+from ..repositories.geocode_repository import GeocodeRepository
+
+logger = logging.getLogger(__name__)
+
+AMAP_GEOCODE_ENDPOINT = "https://restapi.amap.com/v3/geocode/geo"
+
+# Stored in the memory tier for addresses the provider could not place (TTLCache.get returns None on a miss).
+NOT_FOUND = "not-found"
+
+
+class GeocodingError(RuntimeError):
+    """The provider could not be asked (network, quota, bad key); nothing is cached for the address."""
+
+
+@dataclass(frozen=True)
+class GeocodeResult:
+    latitude: float
+    longitude: float
+    formatted_address: str | None = None
+
+
+def _clean(value: str) -> str:
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return " ".join(re.sub(r"[^\w\s]+", " ", value).split())
+
+
+def normalize_address(location: str, city: str | None = None) -> str:
+    """Cache key for a location: case, width, punctuation and spacing folded, scoped to the city.
+
+    "Old Town" in Lisbon and in Prague must not share coordinates, so the plan's destination is
+    part of the key unless the location already names it.
+    """
+    key = _clean(location)
+    scope = _clean(city) if city else ""
+    if scope and scope not in key:
+        key = f"{key} | {scope}"
+    return key[:512]
+
+
+class GeocodingProvider(Protocol):
+    name: str
+
+    async def geocode(self, address: str, city: str | None) -> GeocodeResult | None:
+        """Coordinates for ``address``, or None when the provider has no match."""
+        ...
+
+
+class LocalGeocoder:
+    """Offline stand-in for tests and demos: stable pseudo-coordinates, clustered per city."""
+
+    name = "local"
+
+    @staticmethod
+    def _unit(text: str) -> tuple[float, float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2**32, int.from_bytes(digest[4:8], "big") / 2**32
+
+    async def geocode(self, address: str, city: str | None) -> GeocodeResult | None:
+        if not _clean(address):
+            return None
+        lat, lng = self._unit(_clean(city or address))
+        d_lat, d_lng = self._unit(normalize_address(address, city))
+        return GeocodeResult(
+            latitude=round(lat * 120 - 60 + (d_lat - 0.5) * 0.1, 6),
+            longitude=round(lng * 360 - 180 + (d_lng - 0.5) * 0.1, 6),
+            formatted_address=address,
+        )
+
+
+class AMapGeocoder:
+    """AMap web-service geocoding; coordinates are GCJ-02, the datum the AMap JS map expects."""
+
+    name = "amap"
+
+    def __init__(self, api_key: str, endpoint: str = AMAP_GEOCODE_ENDPOINT) -> None:
+        self.api_key = api_key
+        self.endpoint = endpoint
+
+    async def geocode(self, address: str, city: str | None) -> GeocodeResult | None:
+        params = {"key": self.api_key, "address": address, "output": "JSON"}
+        if city:
+            params["city"] = city
+        try:
+            response = await http_clients.get(self.endpoint).get(self.endpoint, params=params)
+        except httpx.HTTPError as exc:
+            raise GeocodingError(f"AMap request failed: {exc}") from exc
+        if response.status_code >= 400:
+            raise GeocodingError(f"AMap error: {response.status_code}")
+        payload: dict[str, Any] = response.json()
+        if str(payload.get("status")) != "1":
+            raise GeocodingError(f"AMap error: {payload.get('info')}")
+        geocodes = payload.get("geocodes") or []
+        if not geocodes or not geocodes[0].get("location"):
+            return None
+        longitude, latitude = geocodes[0]["location"].split(",")
+        return GeocodeResult(float(latitude), float(longitude), geocodes[0].get("formatted_address") or None)
+
+
+def build_provider(name: str | None = None) -> GeocodingProvider | None:
+    name = (name or settings.geocoding_provider).lower()
+    if name == "auto":
+        name = "amap" if settings.amap_api_key else "none"
+    if name == "amap":
+        if not settings.amap_api_key:
+            raise ValueError("GEOCODING_PROVIDER=amap requires AMAP_API_KEY")
+        return AMapGeocoder(settings.amap_api_key)
+    if name == "local":
+        return LocalGeocoder()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown geocoding provider: {name}")
+
+
+class Geocoder:
+    """Resolves locations through a process-local LRU, the ``geocodecacheentry`` table, then the provider.
+
+    Provider lookups for one batch run concurrently (bounded by ``GEOCODING_CONCURRENCY`` across all
+    requests), identical in-flight lookups are shared, and the whole batch gives up after
+    ``GEOCODING_TIMEOUT_SECONDS`` so a slow provider never holds up plan generation.
+    """
+
+    def __init__(self, provider: GeocodingProvider | None = None) -> None:
+        self.provider = provider if provider is not None else build_provider()
+        self.memory: TTLCache[tuple[str, str], GeocodeResult | str] = TTLCache(
+            settings.geocode_cache_memory_size, ttl=settings.geocode_cache_ttl_seconds
+        )
+        self.flights: SingleFlight[GeocodeResult | None] = SingleFlight()
+        self.semaphore = asyncio.Semaphore(settings.geocoding_concurrency)
+        self.db_hits = 0
+        self.provider_lookups = 0
+        self.failures = 0
+
+    def _remember(self, provider: str, key: str, result: GeocodeResult | None) -> None:
+        if result is None:
+            self.memory.set((provider, key), NOT_FOUND, ttl=settings.geocode_negative_ttl_seconds)
+        else:
+            self.memory.set((provider, key), result)
+
+    async def resolve(
+        self, session: AsyncSession, queries: Iterable[tuple[str, str | None]]
+    ) -> dict[str, GeocodeResult | None]:
+        """Results keyed by ``normalize_address``; addresses that could not be looked up are absent."""
+        provider = self.provider
+        if provider is None:
+            return {}
+        pending = {normalize_address(location, city): (location, city) for location, city in queries}
+        results: dict[str, GeocodeResult | None] = {}
+        for key in list(pending):
+            cached = self.memory.get((provider.name, key))
+            if cached is not None:
+                results[key] = None if cached == NOT_FOUND else cached
+                del pending[key]
+        if not pending:
+            return results
+        repo = GeocodeRepository(session)
+        for entry in await repo.get_many(provider.name, pending):
+            found = entry.latitude is not None and entry.longitude is not None
+            result = GeocodeResult(entry.latitude, entry.longitude, entry.formatted_address) if found else None
+            self._remember(provider.name, entry.address_key, result)
+            results[entry.address_key] = result
+            pending.pop(entry.address_key, None)
+            self.db_hits += 1
+        if not pending:
+            return results
+        fetched = await self._fetch(provider, pending)
+        now = datetime.now(timezone.utc)
+        await repo.upsert_many(
+            [
+                {
+                    "provider": provider.name,
+                    "address_key": key,
+                    "latitude": result.latitude if result else None,
+                    "longitude": result.longitude if result else None,
+                    "formatted_address": result.formatted_address if result else None,
+                    "expires_at": None if result else now + timedelta(seconds=settings.geocode_negative_ttl_seconds),
+                }
+                for key, result in fetched.items()
+            ]
+        )
+        for key, result in fetched.items():
+            self._remember(provider.name, key, result)
+        results.update(fetched)
+        return results
+
+    async def _fetch(
+        self, provider: GeocodingProvider, pending: dict[str, tuple[str, str | None]]
+    ) -> dict[str, GeocodeResult | None]:
+        async def lookup(key: str, location: str, city: str | None) -> tuple[str, GeocodeResult | None]:
+            async with self.semaphore:
+                self.provider_lookups += 1
+                result, _leader = await self.flights.do(
+                    (provider.name, key), lambda: provider.geocode(location, city)
+                )
+            return key, result
+
+        tasks = [asyncio.ensure_future(lookup(key, *query)) for key, query in pending.items()]
+        done, unfinished = await asyncio.wait(tasks, timeout=settings.geocoding_timeout_seconds)
+        for task in unfinished:
+            task.cancel()
+        fetched: dict[str, GeocodeResult | None] = {}
+        for task in done:
+            error = task.exception()
+            if error is not None:
+                self.failures += 1
+                logger.warning("Geocoding failed: %s", error)
+                continue
+            key, result = task.result()
+            fetched[key] = result
+        self.failures += len(unfinished)
+        return fetched
+
+    async def fill_itinerary(self, session: AsyncSession, itinerary: dict[str, Any] | None, city: str | None) -> int:
+        """Set coordinates on activities that name a location but have none; returns how many were set."""
+        targets = [
+            activity
+            for day in (itinerary or {}).get("days") or []
+            if isinstance(day, dict) and isinstance(day.get("activities"), list)
+            for activity in day["activities"]
+            if isinstance(activity, dict)
+            and isinstance(activity.get("location"), str)
+            and activity["location"].strip()
+            and (activity.get("latitude") is None or activity.get("longitude") is None)
+        ]
+        if not targets:
+            return 0
+        results = await self.resolve(session, [(activity["location"], city) for activity in targets])
+        filled = 0
+        for activity in targets:
+            result = results.get(normalize_address(activity["location"], city))
+            if result is not None:
+                activity["latitude"], activity["longitude"] = result.latitude, result.longitude
+                filled += 1
+        return filled
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "provider": self.provider.name if self.provider else None,
+            "memory": self.memory.stats(),
+            "db_hits": self.db_hits,
+            "provider_lookups": self.provider_lookups,
+            "failures": self.failures,
+            "inflight": self.flights.stats(),
+        }
+
+
+geocoder = Geocoder()
@@ -0,0 +1,167 @@
+"""The itinerary document of a plan, backed by its ItineraryDay/ItineraryItem rows.
+
+:func:`~app.services.itinerary_patch.apply_itinerary_patch` edits the document in place. Days
+and activities in it are views of their rows, so a patch moves, edits and removes rows rather
+than rewriting the itinerary: moving an activity re-parents its row, editing a title updates that
+one row, and rows the patch did not touch are not written at all. :meth:`ItineraryDocument.sync`
+writes the edited document back to the rows.
+"""
+import copy
+import json
+from collections.abc import Iterator, Mapping, MutableMapping
+from typing import Any
+
+from sqlalchemy.orm.attributes import flag_modified
+
+from ..models import ItineraryDay, ItineraryItem, TravelPlan
+
+
+def plain(value: Any) -> Any:
+    """``value`` with every view replaced by a plain dict, e.g. to compare or return it."""
+    if isinstance(value, Mapping):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
+
+class _RowView(MutableMapping):
+    """A day or activity of the document, remembering the row it was read from.
+
+    ``data`` must not share nested values with the row: edited in place, they would look
+    unchanged to the ORM and never be written.
+    """
+
+    def __init__(self, row: ItineraryDay | ItineraryItem, data: dict[str, Any]) -> None:
+        self.row = row
+        self.data = data
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.data[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return repr(self.data)
+
+
+class _ItemView(_RowView):
+    def __init__(self, row: ItineraryItem) -> None:
+        super().__init__(row, copy.deepcopy(row.to_dict()))
+        self.original = _encoded(self.data)
+
+    def changed(self) -> bool:
+        return _encoded(self.data) != self.original
+
+
+class _DayView(_RowView):
+    def __init__(self, row: ItineraryDay) -> None:
+        data = {
+            key: [_ItemView(item) for item in row.items]
+            if key == "activities" and isinstance(value, list)
+            else copy.deepcopy(value)
+            for key, value in row.to_dict().items()
+        }
+        super().__init__(row, data)
+        self.original = _encoded(_members(self.data))
+
+
+def _encoded(value: Any) -> str:
+    # Compared as JSON: key order counts, and True, 1 and 1.0 differ, unlike with ``==``.
+    return json.dumps(plain(value))
+
+
+def _members(day: Mapping[str, Any]) -> tuple[list[str], dict[str, Any]]:
+    """A day's keys in order and its members other than a list of activities."""
+    members = {key: plain(value) for key, value in day.items() if key != "activities"}
+    if "activities" in day and not isinstance(day["activities"], list):
+        members["activities"] = plain(day["activities"])
+    return list(day), members
+
+
+def _moved(row: ItineraryDay | ItineraryItem, **values: Any) -> None:
+    """Set ``values`` on a row, writing all of them when any changed.
+
+    Every re-positioned activity then updates the same columns, so the ORM sends them as one
+    executemany instead of one UPDATE per column set.
+    """
+    if all(getattr(row, name) == value for name, value in values.items()):
+        return
+    for name, value in values.items():
+        setattr(row, name, value)
+        if row.id is not None:
+            flag_modified(row, name)
+
+
+class ItineraryDocument:
+    """The plan's itinerary as a dict whose ``days`` and ``activities`` hold row views."""
+
+    def __init__(self, plan: TravelPlan) -> None:
+        self.plan = plan
+        meta = plan.itinerary_meta
+        # Not migrated yet (see migration 0001): the days are still embedded in the JSON.
+        self.legacy = meta is not None and "days" in meta and not plan.days
+        if self.legacy:
+            self.document = copy.deepcopy(meta)
+        else:
+            self.document = copy.deepcopy(meta or {})
+            if plan.days or meta is not None:
+                self.document["days"] = [_DayView(day) for day in plan.days]
+
+    def sync(self) -> None:
+        """Write the edited document back to the plan and its rows; a plan write is always made.
+
+        The plan row is written even when only days changed, so its version and updated_at move.
+        """
+        plan = self.plan
+        if self.legacy:
+            plan.itinerary = plain(self.document)
+            return
+        meta = {key: plain(value) for key, value in self.document.items() if key != "days"}
+        days = self.document.get("days")
+        if days is not None and not isinstance(days, list):
+            meta["days"], days = plain(days), None
+        plan.itinerary_meta = meta
+        flag_modified(plan, "itinerary_meta")
+        rows: list[ItineraryDay] = []
+        for position, entry in enumerate(day for day in days or [] if isinstance(day, Mapping)):
+            keys, members = _members(entry)
+            if isinstance(entry, _DayView) and entry.row not in rows:
+                row = entry.row
+                _moved(row, position=position)
+                if _encoded((keys, members)) != entry.original:
+                    row.assign_members(members, keys)
+            else:
+                row = ItineraryDay(items=[])
+                row.position = position
+                row.assign_members(members, keys)
+            rows.append(row)
+            activities = entry.get("activities")
+            self._sync_items(row, activities if isinstance(activities, list) else [])
+        plan.days = rows
+
+    def _sync_items(self, day: ItineraryDay, activities: list[Any]) -> None:
+        items: list[ItineraryItem] = []
+        for position, activity in enumerate(entry for entry in activities if isinstance(entry, Mapping)):
+            if isinstance(activity, _ItemView) and activity.row not in items:
+                item = activity.row
+                if day.id is None:  # a new day: the relationship sets day_id once the day is inserted
+                    _moved(item, position=position)
+                else:
+                    _moved(item, day_id=day.id, position=position)
+                if activity.changed():
+                    item.assign(position, plain(activity))
+            else:
+                item = ItineraryItem.from_dict(self.plan, position, plain(activity))
+            items.append(item)
+        day.items = items
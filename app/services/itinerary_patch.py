@@ -0,0 +1,158 @@
+import copy
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Iterable
+
+from ..schemas.plan import ItineraryChange, ItineraryOperation
+from .itinerary_document import plain
+
+
+class ItineraryPatchError(ValueError):
+    """An operation is malformed or does not apply to the current document."""
+
+
+class ItineraryPatchConflict(ItineraryPatchError):
+    """A ``test`` operation failed: the document is not in the state the client expected."""
+
+
+def parse_pointer(pointer: str) -> list[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ItineraryPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def format_pointer(tokens: Iterable[str]) -> str:
+    return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+
+def _list_index(container: list, token: str, *, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise ItineraryPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise ItineraryPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _parent(document: Any, tokens: list[str]) -> tuple[Any, str]:
+    node = document
+    for depth, token in enumerate(tokens[:-1]):
+        if isinstance(node, Mapping) and token in node:
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token, allow_end=False)]
+        else:
+            raise ItineraryPatchError(f"Path not found: {format_pointer(tokens[: depth + 1])}")
+    return node, tokens[-1]
+
+
+def _get(document: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        return document
+    parent, key = _parent(document, tokens)
+    if isinstance(parent, Mapping):
+        if key not in parent:
+            raise ItineraryPatchError(f"Path not found: {format_pointer(tokens)}")
+        return parent[key]
+    if isinstance(parent, list):
+        return parent[_list_index(parent, key, allow_end=False)]
+    raise ItineraryPatchError(f"Path not found: {format_pointer(tokens)}")
+
+
+def _equal(left: Any, right: Any) -> bool:
+    """JSON equality as ``test`` defines it: like ``==``, except that true and 1 differ."""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return type(left) is type(right) and left == right
+    if isinstance(left, Mapping) and isinstance(right, Mapping):
+        return left.keys() == right.keys() and all(_equal(left[key], right[key]) for key in left)
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(map(_equal, left, right))
+    return left == right
+
+
+def _add(document: Any, tokens: list[str], value: Any) -> list[str]:
+    """Insert ``value`` and return the concrete path it landed at (``-`` resolved to an index)."""
+    parent, key = _parent(document, tokens)
+    if isinstance(parent, MutableMapping):
+        parent[key] = value
+        return tokens
+    if isinstance(parent, list):
+        index = _list_index(parent, key, allow_end=True)
+        parent.insert(index, value)
+        return [*tokens[:-1], str(index)]
+    raise ItineraryPatchError(f"Cannot add below a scalar: {format_pointer(tokens)}")
+
+
+def _remove(document: Any, tokens: list[str]) -> Any:
+    parent, key = _parent(document, tokens)
+    if isinstance(parent, MutableMapping):
+        if key not in parent:
+            raise ItineraryPatchError(f"Path not found: {format_pointer(tokens)}")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, key, allow_end=False))
+    raise ItineraryPatchError(f"Path not found: {format_pointer(tokens)}")
+
+
+def apply_itinerary_patch(
+    document: MutableMapping[str, Any], operations: list[ItineraryOperation]
+) -> list[ItineraryChange]:
+    """Apply RFC 6902 operations to ``document`` in place and describe what changed.
+
+    ``document`` may hold mappings other than dicts, such as the row views of an
+    :class:`~app.services.itinerary_document.ItineraryDocument`; values are compared, copied and
+    reported as plain JSON. The whole list is applied or, on the first failing operation, the
+    caller should discard the document: it may be partially modified. The root itself cannot be
+    replaced; edit ``/days/...``, ``/tips`` and so on instead.
+    """
+    changes: list[ItineraryChange] = []
+    for position, operation in enumerate(operations):
+        try:
+            tokens = parse_pointer(operation.path)
+            if not tokens:
+                raise ItineraryPatchError("Operations on the document root are not supported")
+            if operation.op in {"add", "replace", "test"} and "value" not in operation.model_fields_set:
+                raise ItineraryPatchError(f"'{operation.op}' requires a value")
+            if operation.op == "test":
+                if not _equal(_get(document, tokens), operation.value):
+                    raise ItineraryPatchConflict(f"Test failed at {operation.path}")
+                continue
+            if operation.op == "add":
+                landed = _add(document, tokens, copy.deepcopy(operation.value))
+            elif operation.op == "remove":
+                _remove(document, tokens)
+                changes.append(ItineraryChange(op="remove", path=operation.path))
+                continue
+            elif operation.op == "replace":
+                _get(document, tokens)
+                parent, key = _parent(document, tokens)
+                if isinstance(parent, list):
+                    parent[_list_index(parent, key, allow_end=False)] = copy.deepcopy(operation.value)
+                else:
+                    parent[key] = copy.deepcopy(operation.value)
+                landed = tokens
+            else:
+                if operation.from_ is None:
+                    raise ItineraryPatchError(f"'{operation.op}' requires 'from'")
+                source = parse_pointer(operation.from_)
+                if not source:
+                    raise ItineraryPatchError("Operations on the document root are not supported")
+                if operation.op == "move":
+                    if tokens[: len(source)] == source and tokens != source:
+                        raise ItineraryPatchError("Cannot move a value into one of its own children")
+                    value = _remove(document, source)
+                else:
+                    value = copy.deepcopy(plain(_get(document, source)))
+                landed = _add(document, tokens, value)
+        except ItineraryPatchError as exc:
+            raise type(exc)(f"Operation {position}: {exc}") from exc
+        change = ItineraryChange(
+            op=operation.op, path=format_pointer(landed), value=copy.deepcopy(plain(_get(document, landed)))
+        )
+        if operation.from_ is not None:
+            change.from_ = operation.from_
+        changes.append(change)
+    return changes
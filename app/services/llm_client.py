@@ -1,17 +1,35 @@
+import asyncio
 import json
+import random
 from datetime import date, timedelta
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 import httpx
 
 from ..core.config import settings
+from ..core.http import http_clients
 from ..schemas.plan import PlanIntent
+from .provider_health import ProviderHealth, provider_health
+
+DASHSCOPE_ENDPOINT = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+OPENAI_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
 
 
 class LLMClientError(RuntimeError):
     """Raised when the LLM provider fails."""
 
 
+class LLMProviderUnavailable(LLMClientError):
+    """Raised for transient failures (throttling, 5xx, timeouts) that are worth retrying elsewhere."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class LLMClient:
     def __init__(
         self,
@@ -31,8 +49,67 @@ class LLMClient:
             self.model = settings.llm_model
         else:
             self.model = None
+        self.served_by: str | None = None
+
+    @classmethod
+    def for_fallback(cls, provider: str) -> "LLMClient":
+        client = cls(provider=provider)
+        # Never hand the primary provider's credentials to a different vendor.
+        client.api_key = settings.llm_provider_api_keys.get(provider)
+        client.endpoint = settings.llm_provider_endpoints.get(provider)
+        return client
+
+    @property
+    def resolved_model(self) -> str | None:
+        if self.provider == "dashscope":
+            return self.model or "qwen-turbo"
+        if self.provider == "openai":
+            return self.model or "gpt-4o-mini"
+        return self.model
+
+    @property
+    def default_endpoint(self) -> str | None:
+        if self.provider == "dashscope":
+            return self.endpoint or DASHSCOPE_ENDPOINT
+        if self.provider == "openai":
+            return self.endpoint or OPENAI_ENDPOINT
+        return None
 
     async def generate_plan(self, intent: PlanIntent) -> dict[str, Any]:
+        """Generate a plan, retrying transient errors and walking the configured fallback chain."""
+        errors: list[LLMClientError] = []
+        for client in self._provider_chain():
+            try:
+                plan = await client._guarded_call(lambda: client._generate_once(intent))
+            except LLMClientError as exc:
+                errors.append(exc)
+                continue
+            self._record_served_by(client)
+            return plan
+        raise self._chain_error(errors)
+
+    async def stream_plan(self, intent: PlanIntent) -> AsyncIterator[str]:
+        """Yield the raw plan JSON text in chunks as the provider produces it.
+
+        Falls back to the next provider only if the current one fails before emitting anything.
+        """
+        errors: list[LLMClientError] = []
+        for client in self._provider_chain():
+            emitted = False
+            try:
+                async for chunk in client._guarded_stream(intent):
+                    emitted = True
+                    yield chunk
+            except LLMClientError as exc:
+                if emitted:
+                    raise
+                errors.append(exc)
+                continue
+            self._record_served_by(client)
+            return
+        raise self._chain_error(errors)
+
+    async def _generate_once(self, intent: PlanIntent) -> dict[str, Any]:
         if self.provider == "mock":
             return self._mock_plan(intent)
         if self.provider == "dashscope":
@@ -41,6 +118,149 @@ class LLMClient:
             return await self._openai_plan(intent)
         raise LLMClientError(f"Unsupported LLM provider: {self.provider}")
 
+    async def _stream_once(self, intent: PlanIntent) -> AsyncIterator[str]:
+        if self.provider == "mock":
+            stream = self._mock_stream(intent)
+        elif self.provider == "dashscope":
+            stream = self._dashscope_stream(intent)
+        elif self.provider == "openai":
+            stream = self._openai_stream(intent)
+        else:
+            raise LLMClientError(f"Unsupported LLM provider: {self.provider}")
+        async for chunk in stream:
+            yield chunk
+
+    def _provider_chain(self) -> list["LLMClient"]:
+        chain = [self]
+        for name in settings.llm_fallback_providers:
+            name = name.lower()
+            if all(client.provider != name for client in chain):
+                chain.append(LLMClient.for_fallback(name))
+        return chain
+
+    def _record_served_by(self, client: "LLMClient") -> None:
+        self.served_by = client.provider
+        if client is not self:
+            client._health().counters["fallbacks"] += 1
+
+    @staticmethod
+    def _chain_error(errors: list[LLMClientError]) -> LLMClientError:
+        if len(errors) == 1:
+            return errors[0]
+        return LLMClientError("All LLM providers failed: " + "; ".join(str(error) for error in errors))
+
+    def _health(self) -> ProviderHealth:
+        return provider_health.get(self.provider, self.default_endpoint, self.api_key)
+
+    def _admit(self, health: ProviderHealth) -> None:
+        if not health.breaker.allow():
+            health.counters["short_circuited"] += 1
+            raise LLMProviderUnavailable(f"{self.provider} is unhealthy (circuit open); failing fast.")
+
+    async def _take_token(self, health: ProviderHealth) -> None:
+        if health.bucket and not await health.bucket.acquire(settings.llm_rate_limit_max_wait_seconds):
+            health.counters["rate_limited"] += 1
+            health.breaker.release()
+            raise LLMProviderUnavailable(f"{self.provider} local rate limit exceeded.")
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: float | None) -> float:
+        ceiling = min(settings.llm_retry_backoff_max_seconds, settings.llm_retry_backoff_seconds * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return min(delay, settings.llm_retry_backoff_max_seconds)
+
+    async def _guarded_call(self, call: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+        if self.provider == "mock":
+            return await call()
+        health = self._health()
+        self._admit(health)
+        attempt = 0
+        while True:
+            await self._take_token(health)
+            health.counters["requests"] += 1
+            try:
+                result = await call()
+            except LLMProviderUnavailable as exc:
+                health.counters["failures"] += 1
+                if attempt >= settings.llm_max_retries:
+                    health.breaker.record_failure()
+                    raise
+                attempt += 1
+                health.counters["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, exc.retry_after))
+                continue
+            except LLMClientError:
+                health.counters["failures"] += 1
+                health.breaker.release()
+                raise
+            except BaseException:
+                health.breaker.release()
+                raise
+            health.counters["successes"] += 1
+            health.breaker.record_success()
+            return result
+
+    async def _guarded_stream(self, intent: PlanIntent) -> AsyncIterator[str]:
+        if self.provider == "mock":
+            async for chunk in self._stream_once(intent):
+                yield chunk
+            return
+        health = self._health()
+        self._admit(health)
+        attempt = 0
+        while True:
+            await self._take_token(health)
+            health.counters["requests"] += 1
+            emitted = False
+            try:
+                async for chunk in self._stream_once(intent):
+                    emitted = True
+                    yield chunk
+            except LLMProviderUnavailable as exc:
+                health.counters["failures"] += 1
+                if emitted or attempt >= settings.llm_max_retries:
+                    health.breaker.record_failure()
+                    raise
+                attempt += 1
+                health.counters["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, exc.retry_after))
+                continue
+            except LLMClientError:
+                health.counters["failures"] += 1
+                health.breaker.release()
+                raise
+            except BaseException:
+                health.breaker.release()
+                raise
+            health.counters["successes"] += 1
+            health.breaker.record_success()
+            return
+
+    async def _post(self, url: str, label: str, **kwargs: Any) -> httpx.Response:
+        try:
+            response = await http_clients.get(url).post(url, **kwargs)
+        except httpx.TimeoutException as exc:
+            raise LLMProviderUnavailable(f"{label} request timed out: {exc!r}") from exc
+        except httpx.TransportError as exc:
+            raise LLMProviderUnavailable(f"{label} connection failed: {exc!r}") from exc
+        if response.status_code >= 400:
+            raise self._http_error(label, response.status_code, response.text, response.headers)
+        return response
+
+    @staticmethod
+    def _http_error(label: str, status_code: int, body: str, headers: httpx.Headers) -> LLMClientError:
+        message = f"{label} error: {status_code} {body}"
+        if status_code not in RETRYABLE_STATUS_CODES:
+            return LLMClientError(message)
+        retry_after: float | None = None
+        try:
+            retry_after = float(headers.get("retry-after", ""))
+        except ValueError:
+            pass
+        return LLMProviderUnavailable(message, retry_after=retry_after)
+
     def _build_prompt(self, intent: PlanIntent) -> str:
         duration = intent.duration_days or 5
         travel_style = ", ".join(intent.travel_style or intent.interests) or "balanced mix of sightseeing and food"
@@ -70,23 +290,18 @@ class LLMClient:
         if not self.api_key:
             raise LLMClientError("DashScope API key missing (LLM_API_KEY).")
         prompt = self._build_prompt(intent)
-        endpoint = (
-            self.endpoint
-            or "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+        endpoint = self.endpoint or DASHSCOPE_ENDPOINT
+        model_name = self.resolved_model
+        response = await self._post(
+            endpoint,
+            "DashScope",
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            json={
+                "model": model_name,
+                "input": {"prompt": prompt},
+                "parameters": {"result_format": "json"},
+            },
         )
-        model_name = self.model or "qwen-turbo"
-        async with httpx.AsyncClient(timeout=45) as client:
-            response = await client.post(
-                endpoint,
-                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
-                json={
-                    "model": model_name,
-                    "input": {"prompt": prompt},
-                    "parameters": {"result_format": "json"},
-                },
-            )
-        if response.status_code >= 400:
-            raise LLMClientError(f"DashScope error: {response.status_code} {response.text}")
         payload = response.json()
         output = payload.get("output", {})
         output_text = self._extract_dashscope_text(output)
@@ -99,23 +314,21 @@ class LLMClient:
         if not self.api_key:
             raise LLMClientError("OpenAI API key missing (LLM_API_KEY).")
         prompt = self._build_prompt(intent)
-        api_url = self.endpoint or "https://api.openai.com/v1/chat/completions"
-        model_name = self.model or "gpt-4o-mini"
-        async with httpx.AsyncClient(timeout=45) as client:
-            response = await client.post(
-                api_url,
-                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
-                json={
-                    "model": model_name,
-                    "messages": [
-                        {"role": "system", "content": "You are a travel planning assistant that outputs ONLY JSON."},
-                        {"role": "user", "content": prompt},
-                    ],
-                    "response_format": {"type": "json_object"},
-                },
-            )
-        if response.status_code >= 400:
-            raise LLMClientError(f"OpenAI error: {response.status_code} {response.text}")
+        api_url = self.endpoint or OPENAI_ENDPOINT
+        model_name = self.resolved_model
+        response = await self._post(
+            api_url,
+            "OpenAI",
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            json={
+                "model": model_name,
+                "messages": [
+                    {"role": "system", "content": "You are a travel planning assistant that outputs ONLY JSON."},
+                    {"role": "user", "content": prompt},
+                ],
+                "response_format": {"type": "json_object"},
+            },
+        )
         payload = response.json()
         choice = payload.get("choices", [{}])[0]
         output_text = choice.get("message", {}).get("content")
@@ -123,6 +336,76 @@ class LLMClient:
             raise LLMClientError("OpenAI response missing content.")
         return self._parse_plan_json(output_text)
 
+    async def _dashscope_stream(self, intent: PlanIntent) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise LLMClientError("DashScope API key missing (LLM_API_KEY).")
+        endpoint = self.endpoint or DASHSCOPE_ENDPOINT
+        request_body = {
+            "model": self.resolved_model,
+            "input": {"prompt": self._build_prompt(intent)},
+            "parameters": {"result_format": "message", "incremental_output": True},
+        }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "X-DashScope-SSE": "enable",
+        }
+        async for data in self._stream_sse(endpoint, headers, request_body, "DashScope"):
+            text = self._extract_dashscope_text(data.get("output", {}))
+            if text:
+                yield text
+
+    async def _openai_stream(self, intent: PlanIntent) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise LLMClientError("OpenAI API key missing (LLM_API_KEY).")
+        api_url = self.endpoint or OPENAI_ENDPOINT
+        request_body = {
+            "model": self.resolved_model,
+            "messages": [
+                {"role": "system", "content": "You are a travel planning assistant that outputs ONLY JSON."},
+                {"role": "user", "content": self._build_prompt(intent)},
+            ],
+            "response_format": {"type": "json_object"},
+            "stream": True,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        async for data in self._stream_sse(api_url, headers, request_body, "OpenAI"):
+            for choice in data.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+    async def _stream_sse(
+        self, url: str, headers: dict[str, str], body: dict[str, Any], label: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        try:
+            async with http_clients.get(url).stream("POST", url, headers=headers, json=body) as response:
+                if response.status_code >= 400:
+                    detail = (await response.aread()).decode("utf-8", errors="replace")
+                    raise self._http_error(label, response.status_code, detail, response.headers)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if not data or data == "[DONE]":
+                        continue
+                    try:
+                        yield json.loads(data)
+                    except json.JSONDecodeError as exc:
+                        raise LLMClientError(f"{label} sent a malformed stream event: {exc}") from exc
+        except httpx.TimeoutException as exc:
+            raise LLMProviderUnavailable(f"{label} stream timed out: {exc!r}") from exc
+        except httpx.TransportError as exc:
+            raise LLMProviderUnavailable(f"{label} stream connection failed: {exc!r}") from exc
+
+    async def _mock_stream(self, intent: PlanIntent) -> AsyncIterator[str]:
+        text = json.dumps(self._mock_plan(intent), ensure_ascii=False)
+        size = max(settings.llm_mock_stream_chunk_size, 1)
+        for offset in range(0, len(text), size):
+            if settings.llm_mock_stream_delay_seconds:
+                await asyncio.sleep(settings.llm_mock_stream_delay_seconds)
+            yield text[offset:offset + size]
+
     def _parse_plan_json(self, text: str) -> dict[str, Any]:
         try:
             return json.loads(text)
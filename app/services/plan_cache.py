@@ -0,0 +1,108 @@
+import copy
+import hashlib
+import json
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..repositories.plan_cache_repository import PlanCacheRepository
+from ..schemas.plan import PlanIntent
+
+
+def _normalize_text(value: str | None) -> str | None:
+    if value is None:
+        return None
+    collapsed = " ".join(value.split()).lower()
+    return collapsed or None
+
+
+def _normalize_list(values: list[str]) -> list[str]:
+    return sorted({item for item in (_normalize_text(value) for value in values) if item})
+
+
+def canonical_intent(intent: PlanIntent) -> dict[str, Any]:
+    """Reduce an intent to the fields that shape the LLM output.
+
+    Absolute dates are left out on purpose: ``PlanningService._build_plan_data`` re-applies the
+    requested start date to every day, so only the trip length matters for reuse.
+    """
+    span_days = None
+    if intent.start_date and intent.end_date:
+        span_days = (intent.end_date - intent.start_date).days + 1
+    return {
+        "destination": _normalize_text(intent.destination),
+        "duration_days": intent.duration_days or span_days or 5,
+        "budget_amount": round(intent.budget_amount, 2) if intent.budget_amount is not None else None,
+        "currency": (intent.currency or "CNY").upper(),
+        "travelers": intent.travelers or 2,
+        "travel_style": _normalize_list(intent.travel_style),
+        "traveling_with_children": bool(intent.traveling_with_children),
+        "interests": _normalize_list(intent.interests),
+        "custom_request": _normalize_text(intent.custom_request),
+    }
+
+
+def plan_cache_key(intent: PlanIntent, provider: str, model: str | None, endpoint: str | None = None) -> str:
+    """Key for LLM output; the endpoint is part of it, since another endpoint (a proxy, a
+    self-hosted deployment) may serve something else under the same provider and model name."""
+    material = {"intent": canonical_intent(intent), "provider": provider, "model": model, "endpoint": endpoint}
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """Two-tier cache of raw LLM plan output: process-local LRU in front of the ``plancacheentry`` table."""
+
+    def __init__(self) -> None:
+        self.memory: TTLCache[str, dict[str, Any]] = TTLCache(
+            settings.plan_cache_memory_size, ttl=settings.plan_cache_ttl_seconds
+        )
+        self.db_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.plan_cache_enabled
+
+    async def get(self, session: AsyncSession, cache_key: str) -> dict[str, Any] | None:
+        if not self.enabled:
+            return None
+        payload = self.memory.get(cache_key)
+        if payload is None:
+            entry = await PlanCacheRepository(session).get_valid(cache_key)
+            if entry is None:
+                return None
+            self.db_hits += 1
+            payload = entry.payload
+            self.memory.set(cache_key, copy.deepcopy(payload))
+        return copy.deepcopy(payload)
+
+    async def set(
+        self,
+        session: AsyncSession,
+        cache_key: str,
+        payload: dict[str, Any],
+        *,
+        provider: str,
+        model: str | None,
+    ) -> None:
+        if not self.enabled:
+            return
+        snapshot = copy.deepcopy(payload)
+        self.memory.set(cache_key, snapshot)
+        repo = PlanCacheRepository(session)
+        await repo.upsert(
+            cache_key,
+            provider=provider,
+            model=model,
+            payload=copy.deepcopy(snapshot),
+            ttl_seconds=settings.plan_cache_ttl_seconds,
+        )
+        await repo.evict(settings.plan_cache_max_entries)
+
+    def stats(self) -> dict[str, Any]:
+        return {"enabled": self.enabled, "memory": self.memory.stats(), "db_hits": self.db_hits}
+
+
+plan_cache = PlanCache()
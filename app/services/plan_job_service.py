@@ -0,0 +1,217 @@
+import asyncio
+import logging
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import PlanJob, TravelPlan
+from ..repositories.plan_job_repository import PlanJobRepository, new_lease_token
+from ..repositories.user_repository import UserRepository
+from ..schemas.auth import CurrentUser
+from ..schemas.plan import PlanGenerationRequest
+from .planning_service import PlanningService
+
+logger = logging.getLogger(__name__)
+
+
+class PlanJobQueue:
+    """In-process pool that runs queued plan generations with per-provider concurrency caps.
+
+    Jobs are persisted in the ``planjob`` table and leased to the worker that accepted them (see
+    :class:`~app.repositories.plan_job_repository.PlanJobRepository`). A sweeper started by
+    :meth:`start` renews this worker's leases, waiting and running jobs alike, and takes over jobs
+    whose worker died without renewing theirs. :meth:`stop` hands this worker's jobs back to the
+    queue. Database sessions are only held for the short bookkeeping steps, never across the LLM call.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._scheduled: set[str] = set()
+        self._leases: dict[str, str] = {}
+        self._sweeper: asyncio.Task[None] | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._provider_slots: dict[str, asyncio.Semaphore] = {}
+        self._api_keys: dict[str, str] = {}
+
+    async def start(self) -> None:
+        await self._take_over()
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        held = dict(self._leases)
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if held:
+            async with AsyncSessionLocal() as session:
+                await PlanJobRepository(session).release(held)
+                await session.commit()
+            logger.info("Returned %d plan jobs to the queue", len(held))
+
+    async def _take_over(self) -> None:
+        async with AsyncSessionLocal() as session:
+            taken = await PlanJobRepository(session).take_over_expired(
+                settings.plan_job_lease_seconds, exclude=self._leases
+            )
+            await session.commit()
+        for job_id, token in taken.items():
+            self._leases[job_id] = token
+            self.schedule(job_id)
+
+    async def _renew(self) -> None:
+        async with AsyncSessionLocal() as session:
+            await PlanJobRepository(session).renew(dict(self._leases))
+            await session.commit()
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(settings.plan_job_sweep_interval_seconds)
+            try:
+                await self._renew()
+                await self._take_over()
+            except Exception:  # noqa: BLE001
+                logger.exception("Plan job sweep failed")
+
+    async def submit(self, session: AsyncSession, user: CurrentUser, request: PlanGenerationRequest) -> PlanJob:
+        llm_client = PlanningService.build_llm_client(request)
+        token = new_lease_token()
+        job = await PlanJobRepository(session).create_for_user(
+            user.id,
+            provider=llm_client.provider,
+            request=request.model_dump(mode="json", exclude={"llm_api_key"}),
+            requires_api_key=bool(request.llm_api_key),
+            lease_token=token,
+        )
+        await session.commit()
+        self._leases[job.id] = token
+        if request.llm_api_key:
+            self._api_keys[job.id] = request.llm_api_key
+        self.schedule(job.id)
+        return job
+
+    def schedule(self, job_id: str) -> None:
+        if job_id in self._scheduled:
+            return
+        self._scheduled.add(job_id)
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _provider_slot(self, provider: str) -> asyncio.Semaphore:
+        slot = self._provider_slots.get(provider)
+        if slot is None:
+            limit = settings.plan_job_provider_concurrency.get(provider, settings.plan_job_default_concurrency)
+            slot = self._provider_slots[provider] = asyncio.Semaphore(max(limit, 1))
+        return slot
+
+    async def _run(self, job_id: str) -> None:
+        try:
+            await self._execute(job_id)
+        except Exception:  # noqa: BLE001
+            # job.error is shown to the user: the cause stays in the log.
+            logger.exception("Plan job %s failed", job_id)
+            try:
+                await self._fail(job_id, "Plan generation failed")
+            except Exception:  # noqa: BLE001
+                logger.exception("Could not mark plan job %s as failed", job_id)
+        finally:
+            self._scheduled.discard(job_id)
+            self._leases.pop(job_id, None)
+            self._api_keys.pop(job_id, None)
+
+    async def _execute(self, job_id: str) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(settings.plan_job_workers, 1))
+        token = self._leases.get(job_id)
+        if token is None:
+            return
+        async with AsyncSessionLocal() as session:
+            job = await PlanJobRepository(session).get(job_id)
+            if job is None or job.status != "queued" or job.lease_token != token:
+                return
+            provider, owner_id, requires_api_key = job.provider, job.owner_id, job.requires_api_key
+            request = PlanGenerationRequest(**job.request, llm_api_key=self._api_keys.pop(job_id, None))
+        if requires_api_key and not request.llm_api_key:
+            # Only the accepting worker has the key, and it renews its lease while alive: this
+            # worker took the job over because that one died, so the key is gone.
+            await self._fail(job_id, "The API key override is not persisted; please resubmit the request.")
+            return
+
+        llm_client = PlanningService.build_llm_client(request)
+        async with self._provider_slot(provider), self._slots:
+            async with AsyncSessionLocal() as session:
+                if not await PlanJobRepository(session).claim(job_id, token):
+                    return
+                await session.commit()
+                llm_plan = await PlanningService(session).lookup_cached_plan(request, llm_client)
+                await session.commit()
+            fresh = False
+            if llm_plan is None:
+                try:
+                    llm_plan, fresh = await PlanningService.request_llm_plan(request, llm_client)
+                except HTTPException as exc:
+                    await self._fail(job_id, str(exc.detail))
+                    return
+
+        error: str | None = None
+        try:
+            async with AsyncSessionLocal() as session:
+                user = await UserRepository(session).get(owner_id)
+                if user is None:
+                    error = "User not found"
+                else:
+                    plan = await PlanningService(session).save_generated_plan(
+                        CurrentUser.model_validate(user), request, llm_plan, llm_client, fresh=fresh
+                    )
+                    if await PlanJobRepository(session).finish(job_id, token, plan_id=plan.id):
+                        await session.commit()
+                    else:
+                        # Another worker took the job over; keep only its plan.
+                        await session.rollback()
+                        logger.warning("Plan job %s was taken over; discarding this worker's plan", job_id)
+        except Exception:  # noqa: BLE001
+            logger.exception("Plan job %s failed while saving", job_id)
+            error = "Failed to save plan"
+        if error:
+            await self._fail(job_id, error)
+
+    async def _fail(self, job_id: str, error: str) -> None:
+        token = self._leases.get(job_id)
+        if token is None:
+            return
+        async with AsyncSessionLocal() as session:
+            await PlanJobRepository(session).finish(job_id, token, error=error)
+            await session.commit()
+
+
+plan_job_queue = PlanJobQueue()
+
+
+class PlanJobService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.repo = PlanJobRepository(session)
+
+    async def get_job(self, user: CurrentUser, job_id: str) -> PlanJob:
+        job = await self.repo.get_for_user(user.id, job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    async def get_result(self, user: CurrentUser, job_id: str) -> PlanJob | TravelPlan:
+        """Return the generated plan, or the job itself while it is still pending."""
+        job = await self.get_job(user, job_id)
+        if job.status == "failed":
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=job.error or "Job failed")
+        if job.status != "succeeded":
+            return job
+        if job.plan_id is None:
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Generated plan was deleted")
+        return await PlanningService(self.session).get_plan(user, job.plan_id)
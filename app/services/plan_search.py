@@ -0,0 +1,202 @@
+import html
+import json
+import re
+from datetime import date
+from typing import Any, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import TravelPlan
+from ..repositories.search_repository import SearchRepository
+from ..schemas.auth import CurrentUser
+from ..schemas.plan import PlanSearchHit, SearchSnippet
+
+# Han, kana and hangul are written without spaces, so neither FTS5's unicode61 tokenizer nor
+# Postgres' "simple" parser can find a word inside a run of them. Each character is indexed as its
+# own token instead, and a query run such as "拉面" is matched as a phrase of adjacent characters.
+CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+CJK_CHAR = re.compile(f"([{CJK}])")
+CJK_RUN = re.compile(f"([{CJK}]+)")
+WORD = re.compile(r"[^\W_]+")
+
+# Plan fields that feed the index; updates touching none of them leave it alone.
+INDEXED_FIELDS = frozenset({"title", "destination", "notes", "itinerary"})
+MAX_TERMS = 16
+MAX_SNIPPETS = 3
+SNIPPET_CONTEXT = 40
+
+
+def index_text(value: str | None) -> str:
+    return CJK_CHAR.sub(r" \1 ", value) if value else ""
+
+
+def query_terms(query: str) -> list[str]:
+    """Split what the user typed into words and CJK runs; punctuation and operators are dropped."""
+    terms = []
+    for word in WORD.findall(query):
+        terms.extend(part.casefold() for part in CJK_RUN.split(word) if part)
+    return terms[:MAX_TERMS]
+
+
+def _is_cjk(term: str) -> bool:
+    return CJK_RUN.fullmatch(term) is not None
+
+
+def fts5_query(terms: list[str]) -> str:
+    # Terms are quoted, so nothing in them is read as FTS5 syntax; the last word matches as a prefix.
+    parts = []
+    for position, term in enumerate(terms):
+        if _is_cjk(term):
+            parts.append('"' + " ".join(term) + '"')
+        else:
+            parts.append(f'"{term}"' + ("*" if position == len(terms) - 1 else ""))
+    return " ".join(parts)
+
+
+def tsquery(terms: list[str]) -> str:
+    parts = []
+    for position, term in enumerate(terms):
+        if _is_cjk(term):
+            parts.append(" <-> ".join(f"'{char}'" for char in term))
+        else:
+            parts.append(f"'{term}'" + (":*" if position == len(terms) - 1 else ""))
+    return " & ".join(parts)
+
+
+def plan_document(plan: TravelPlan) -> tuple[dict[str, str], dict[str, Any]]:
+    """The text columns to index for a plan, and the original text kept for snippets."""
+    activities: list[list[Any]] = []
+    for day_index, day in enumerate((plan.itinerary or {}).get("days") or []):
+        if not isinstance(day, dict) or not isinstance(day.get("activities"), list):
+            continue
+        for activity_index, activity in enumerate(day["activities"]):
+            if not isinstance(activity, dict):
+                continue
+            parts = [activity.get(key) for key in ("title", "location", "description")]
+            text = " · ".join(part.strip() for part in parts if isinstance(part, str) and part.strip())
+            if text:
+                activities.append([day_index, activity_index, text])
+    source = {
+        "title": plan.title,
+        "destination": plan.destination,
+        "notes": plan.notes,
+        "start_date": plan.start_date.isoformat() if plan.start_date else None,
+        "end_date": plan.end_date.isoformat() if plan.end_date else None,
+        "activities": activities,
+    }
+    fields = {
+        "title": index_text(plan.title),
+        "destination": index_text(plan.destination),
+        "activities": "\n".join(index_text(text) for _day, _index, text in activities),
+        "notes": index_text(plan.notes),
+    }
+    return fields, source
+
+
+def _match_pattern(terms: list[str]) -> re.Pattern[str]:
+    alternatives = []
+    for position, term in enumerate(terms):
+        if _is_cjk(term):
+            alternatives.append(re.escape(term))
+        else:
+            suffix = "" if position == len(terms) - 1 else r"(?![^\W_])"
+            alternatives.append(r"(?<![^\W_])" + re.escape(term) + suffix)
+    alternatives.sort(key=len, reverse=True)
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def snippet(text: str | None, pattern: re.Pattern[str]) -> str | None:
+    """An HTML-escaped excerpt around the first match, with every match wrapped in <mark>."""
+    if not text:
+        return None
+    first = pattern.search(text)
+    if first is None:
+        return None
+    start = max(0, first.start() - SNIPPET_CONTEXT)
+    end = min(len(text), first.end() + 2 * SNIPPET_CONTEXT)
+    window = text[start:end]
+    pieces = []
+    cursor = 0
+    for match in pattern.finditer(window):
+        pieces.append(html.escape(window[cursor : match.start()]))
+        pieces.append(f"<mark>{html.escape(match.group())}</mark>")
+        cursor = match.end()
+    pieces.append(html.escape(window[cursor:]))
+    return ("…" if start else "") + "".join(pieces) + ("…" if end < len(text) else "")
+
+
+def _terms_in(text: str | None, pattern: re.Pattern[str]) -> set[str]:
+    return {match.casefold() for match in pattern.findall(text)} if text else set()
+
+
+def _snippets(source: dict[str, Any], pattern: re.Pattern[str]) -> list[SearchSnippet]:
+    """Highlight title and destination, then the activities and notes that add the most unseen terms.
+
+    "ramen osaka" should surface the ramen shop, not the first few activities that say "Osaka".
+    """
+    found = []
+    seen: set[str] = set()
+    for field in ("title", "destination"):
+        excerpt = snippet(source.get(field), pattern)
+        if excerpt:
+            found.append(SearchSnippet(field=field, text=excerpt))
+            seen |= _terms_in(source[field], pattern)
+    candidates = [
+        (SearchSnippet(field="activity", text=text, day_index=day_index, activity_index=activity_index), terms)
+        for day_index, activity_index, text in source.get("activities") or []
+        if (terms := _terms_in(text, pattern))
+    ]
+    if terms := _terms_in(source.get("notes"), pattern):
+        candidates.append((SearchSnippet(field="notes", text=source["notes"]), terms))
+    for _ in range(MAX_SNIPPETS):
+        if not candidates:
+            break
+        best = max(range(len(candidates)), key=lambda index: len(candidates[index][1] - seen))
+        if found and not candidates[best][1] - seen and found[-1].field in ("activity", "notes"):
+            break
+        chosen, terms = candidates.pop(best)
+        seen |= terms
+        found.append(chosen.model_copy(update={"text": snippet(chosen.text, pattern)}))
+    return found
+
+
+class PlanSearchService:
+    """Keeps the ``plansearch`` index in step with plan writes and answers ranked queries.
+
+    Index writes join the caller's transaction, so they commit or roll back with the plan itself.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.repo = SearchRepository(session)
+
+    async def index_plan(self, plan: TravelPlan) -> None:
+        await self.index_plans([plan])
+
+    async def index_plans(self, plans: Sequence[TravelPlan]) -> None:
+        documents = [(plan.id, plan.owner_id, *plan_document(plan)) for plan in plans]
+        if documents:
+            await self.repo.upsert(documents)
+
+    async def search(self, user: CurrentUser, query: str, *, limit: int = 20) -> list[PlanSearchHit]:
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = tsquery(terms) if self.repo.postgres else fts5_query(terms)
+        rows = await self.repo.search(user.id, match, limit)
+        pattern = _match_pattern(terms)
+        hits = []
+        for plan_id, score, source in rows:
+            if isinstance(source, str):
+                source = json.loads(source)
+            hits.append(
+                PlanSearchHit(
+                    id=plan_id,
+                    title=source["title"],
+                    destination=source["destination"],
+                    start_date=date.fromisoformat(source["start_date"]) if source.get("start_date") else None,
+                    end_date=date.fromisoformat(source["end_date"]) if source.get("end_date") else None,
+                    score=float(score),
+                    snippets=_snippets(source, pattern),
+                )
+            )
+        return hits
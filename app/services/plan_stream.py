@@ -0,0 +1,101 @@
+import json
+from typing import Any
+
+PlanEvent = tuple[str, Any]
+
+
+class IncrementalPlanParser:
+    """Scan streamed LLM text and surface plan sections as soon as they are complete JSON.
+
+    Emits ``("day", {...})`` for every finished element of the top-level ``days`` array and
+    ``("field", (key, value))`` for every other finished top-level member (``budget``, ``tips``,
+    ``title`` ...). Anything before the first ``{`` (for example a Markdown code fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.completed = False
+        self._pos = 0
+        self._root_start: int | None = None
+        self._root_end: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._pending_key: str | None = None
+        self._key: str | None = None
+        self._value_start: int | None = None
+        self._item_start: int | None = None
+
+    @property
+    def document(self) -> str:
+        """The root JSON object text, without any surrounding prose or fences."""
+        if self._root_start is None:
+            return self.text
+        end = self._root_end + 1 if self._root_end is not None else len(self.text)
+        return self.text[self._root_start:end]
+
+    def feed(self, chunk: str) -> list[PlanEvent]:
+        self.text += chunk
+        events: list[PlanEvent] = []
+        text = self.text
+        while self._pos < len(text) and not self.completed:
+            index = self._pos
+            char = text[index]
+            self._pos += 1
+            if self._root_start is None:
+                if char == "{":
+                    self._root_start = index
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._pending_key = json.loads(text[self._string_start:index + 1])
+                        self._expect_key = False
+                continue
+            if char.isspace():
+                continue
+            if self._depth == 1:
+                if char == ":":
+                    self._key, self._value_start = self._pending_key, None
+                    continue
+                if char in ",}":
+                    if self._key is not None and self._value_start is not None:
+                        events.append(self._field(text[self._value_start:index].strip()))
+                    self._key = None
+                    if char == ",":
+                        self._expect_key = True
+                    else:
+                        self._depth = 0
+                        self._root_end = index
+                        self.completed = True
+                    continue
+                if self._key is not None and self._value_start is None:
+                    self._value_start = index
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 3 and self._key == "days":
+                    self._item_start = index
+            elif char in "}]":
+                if self._depth == 3 and self._key == "days" and self._item_start is not None:
+                    events.append(("day", json.loads(text[self._item_start:index + 1])))
+                    self._item_start = None
+                self._depth -= 1
+                if self._depth == 1 and self._key is not None and self._value_start is not None:
+                    events.append(self._field(text[self._value_start:index + 1]))
+                    self._key = None
+        return events
+
+    def _field(self, raw: str) -> PlanEvent:
+        return ("field", (self._key, json.loads(raw)))
@@ -1,14 +1,63 @@
+import base64
+import binascii
+import copy
+import hashlib
 import json
-from datetime import date, timedelta
-from typing import Any
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator
 
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 
-from ..models import TravelPlan, User
-from ..repositories.plan_repository import TravelPlanRepository
-from ..schemas.plan import PlanGenerationRequest
+from ..core.config import settings
+from ..core.etags import check_if_match, make_etag
+from ..core.singleflight import SingleFlight
+from ..models import TravelPlan
+from ..repositories.itinerary_repository import ItineraryRepository
+from ..repositories.plan_repository import PlanCursor, TravelPlanRepository
+from ..schemas.auth import CurrentUser
+from ..schemas.plan import (
+    ActivityRead,
+    DayRouteRead,
+    ItineraryChange,
+    ItineraryOperation,
+    PlanGenerationRequest,
+    PlanSearchHit,
+    RouteOptimizationResult,
+    TravelPlanSummary,
+)
+from .blob_store import BlobStore
+from .geocoding import geocoder
+from .itinerary_document import ItineraryDocument
+from .itinerary_patch import ItineraryPatchConflict, ItineraryPatchError, apply_itinerary_patch
 from .llm_client import LLMClient, LLMClientError
+from .plan_cache import plan_cache, plan_cache_key
+from .plan_search import INDEXED_FIELDS, PlanSearchService, plan_document
+from .plan_stream import IncrementalPlanParser
+from .route_optimizer import optimize_itinerary
+
+plan_generation_flights: SingleFlight[dict[str, Any]] = SingleFlight()
+
+STREAMED_PLAN_FIELDS = ("title", "summary", "budget", "tips")
+
+
+def encode_plan_cursor(plan_id: int, created_at: datetime) -> str:
+    raw = json.dumps([plan_id, created_at.isoformat()]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_plan_cursor(cursor: str) -> PlanCursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        plan_id, created_at = json.loads(raw)
+        return int(plan_id), datetime.fromisoformat(created_at)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def plan_etag(plan_id: int, version: int, expenses_version: int) -> str:
+    return make_etag("plan", plan_id, version, expenses_version)
 
 
 class PlanningService:
@@ -16,49 +65,336 @@ class PlanningService:
         self.session = session
         self.plan_repo = TravelPlanRepository(session)
 
-    async def generate_plan(self, user: User, request: PlanGenerationRequest) -> TravelPlan:
-        overrides = {
-            "provider": request.llm_provider,
-            "api_key": request.llm_api_key,
-            "endpoint": request.llm_endpoint,
-            "model": request.llm_model,
-        }
-        llm_client = LLMClient(
-            **{key: value for key, value in overrides.items() if value}  # pass only explicitly provided overrides
-        )
+    async def generate_plan(self, user: CurrentUser, request: PlanGenerationRequest) -> TravelPlan:
+        llm_client = self.build_llm_client(request)
+        llm_plan = await self.lookup_cached_plan(request, llm_client)
+        fresh = False
+        if llm_plan is None:
+            llm_plan, fresh = await self.request_llm_plan(request, llm_client)
+        plan = await self.save_generated_plan(user, request, llm_plan, llm_client, fresh=fresh)
+        await self.session.commit()
+        return plan
+
+    async def lookup_cached_plan(
+        self, request: PlanGenerationRequest, llm_client: LLMClient
+    ) -> dict[str, Any] | None:
+        if request.bypass_cache:
+            return None
+        return await plan_cache.get(self.session, self._cache_key(request, llm_client))
+
+    @classmethod
+    async def request_llm_plan(
+        cls, request: PlanGenerationRequest, llm_client: LLMClient
+    ) -> tuple[dict[str, Any], bool]:
+        """Call the provider, sharing the upstream call with identical in-flight requests.
+
+        Returns the plan and whether this caller made the upstream call (and should cache it).
+        Does not touch the database session.
+        """
+        cache_key = cls._cache_key(request, llm_client)
+        flight_key = (cache_key, llm_client.endpoint, cls._credential_fingerprint(llm_client.api_key))
         try:
-            llm_plan = await llm_client.generate_plan(request)
+            return await plan_generation_flights.do(flight_key, lambda: llm_client.generate_plan(request))
         except LLMClientError as exc:
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
+    async def save_generated_plan(
+        self,
+        user: CurrentUser,
+        request: PlanGenerationRequest,
+        llm_plan: dict[str, Any],
+        llm_client: LLMClient,
+        *,
+        fresh: bool,
+    ) -> TravelPlan:
+        """Cache fresh LLM output and add the plan to the session; the caller commits."""
+        # Output served by a fallback provider must not be cached under the primary provider's key.
+        if fresh and llm_client.served_by == llm_client.provider:
+            await plan_cache.set(
+                self.session,
+                self._cache_key(request, llm_client),
+                llm_plan,
+                provider=llm_client.provider,
+                model=llm_client.resolved_model,
+            )
+        # Serialized before _build_plan_data dates the days, so cache hits share one stored blob.
+        raw_plan_text = json.dumps(llm_plan, ensure_ascii=False)
         plan_data = self._build_plan_data(user, request, llm_plan)
+        # LLMs rarely return coordinates; resolve them once here so reads never need a lookup.
+        await geocoder.fill_itinerary(self.session, plan_data["itinerary"], plan_data["destination"])
+        if settings.route_optimization_enabled:
+            optimize_itinerary(plan_data["itinerary"])
+        plan_data["raw_plan_digest"] = await BlobStore(self.session).put_text(raw_plan_text)
         plan = await self.plan_repo.create_for_user(user.id, plan_data)
-        await self.session.commit()
+        await PlanSearchService(self.session).index_plan(plan)
         return plan
 
-    async def list_plans(self, user: User) -> list[TravelPlan]:
-        return await self.plan_repo.list_for_user(user.id)
+    async def stream_plan(
+        self, user: CurrentUser, request: PlanGenerationRequest
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Yield ``(event, data)`` pairs while the plan is generated, finishing with ``("plan", TravelPlan)``."""
+        llm_client = self.build_llm_client(request)
+        llm_plan = await self.lookup_cached_plan(request, llm_client)
+        fresh = llm_plan is None
+        if llm_plan is not None:
+            for index, day in enumerate(llm_plan.get("days", [])):
+                yield "day", self._dated_day(request, index, day)
+            for field in STREAMED_PLAN_FIELDS:
+                if field in llm_plan:
+                    yield field, llm_plan[field]
+        else:
+            parser = IncrementalPlanParser()
+            day_index = 0
+            try:
+                async for chunk in llm_client.stream_plan(request):
+                    for kind, value in parser.feed(chunk):
+                        if kind == "day":
+                            yield "day", self._dated_day(request, day_index, value)
+                            day_index += 1
+                        elif value[0] in STREAMED_PLAN_FIELDS:
+                            yield value
+                llm_plan = json.loads(parser.document)
+            except LLMClientError as exc:
+                raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+            except json.JSONDecodeError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to parse LLM JSON: {exc}"
+                ) from exc
+
+        plan = await self.save_generated_plan(user, request, llm_plan, llm_client, fresh=fresh)
+        await self.session.commit()
+        yield "plan", plan
+
+    async def list_plans(
+        self,
+        user: CurrentUser,
+        *,
+        limit: int | None = None,
+        cursor: str | None = None,
+        summary: bool = False,
+    ) -> tuple[list[Any], str | None]:
+        """Return one page of plans (newest first) and the cursor for the next page, if any."""
+        before = decode_plan_cursor(cursor) if cursor else None
+        fetch = limit + 1 if limit is not None else None
+        items: list[Any]
+        if summary:
+            rows = await self.plan_repo.list_summaries_for_user(user.id, limit=fetch, before=before)
+            items = [TravelPlanSummary.model_validate(dict(row)) for row in rows]
+        else:
+            items = await self.plan_repo.list_for_user(user.id, limit=fetch, before=before)
+        if limit is None or len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, encode_plan_cursor(items[-1].id, items[-1].created_at)
+
+    async def raw_plan_texts(self, plans: list[TravelPlan]) -> dict[int, str]:
+        """Raw LLM output per plan id, decompressed from planblob (or read inline for older rows)."""
+        texts = await BlobStore(self.session).get_texts(
+            plan.raw_plan_digest for plan in plans if plan.raw_plan_digest
+        )
+        raw = {plan.id: texts[plan.raw_plan_digest] for plan in plans if plan.raw_plan_digest in texts}
+        legacy = [plan.id for plan in plans if not plan.raw_plan_digest]
+        if legacy:
+            raw.update(await self.plan_repo.get_raw_plan_legacy(legacy))
+        return raw
+
+    async def search_plans(self, user: CurrentUser, query: str, *, limit: int = 20) -> list[PlanSearchHit]:
+        return await PlanSearchService(self.session).search(user, query, limit=limit)
+
+    async def list_activities(
+        self,
+        user: CurrentUser,
+        *,
+        on_date: date | None = None,
+        plan_id: int | None = None,
+        with_coordinates: bool = False,
+        limit: int = 500,
+    ) -> list[ActivityRead]:
+        rows = await ItineraryRepository(self.session).list_activities_for_user(
+            user.id, on_date=on_date, plan_id=plan_id, with_coordinates=with_coordinates, limit=limit
+        )
+        return [ActivityRead.model_validate(row) for row in rows]
+
+    async def list_etag(
+        self, user: CurrentUser, *, limit: int | None = None, cursor: str | None = None, summary: bool = False
+    ) -> str:
+        """ETag of the page :meth:`list_plans` would return, computed from version columns only."""
+        before = decode_plan_cursor(cursor) if cursor else None
+        fetch = limit + 1 if limit is not None else None
+        rows = await self.plan_repo.list_versions_for_user(user.id, limit=fetch, before=before)
+        return make_etag(
+            "plans", user.id, summary, limit, *(f"{row.id}.{row.version}.{row.expenses_version}" for row in rows)
+        )
+
+    async def plan_etag(self, user: CurrentUser, plan_id: int) -> str:
+        row = await self.plan_repo.get_versions_for_user(user.id, plan_id)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        return plan_etag(row.id, row.version, row.expenses_version)
 
-    async def get_plan(self, user: User, plan_id: int) -> TravelPlan:
+    async def get_plan(self, user: CurrentUser, plan_id: int) -> TravelPlan:
         plan = await self.plan_repo.get_for_user(user.id, plan_id)
         if not plan:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
         return plan
 
-    async def update_plan(self, user: User, plan_id: int, data: dict[str, Any]) -> TravelPlan:
+    async def update_plan(
+        self, user: CurrentUser, plan_id: int, data: dict[str, Any], *, if_match: str | None = None
+    ) -> TravelPlan:
         plan = await self.get_plan(user, plan_id)
-        updated = await self.plan_repo.update(plan, data)
-        await self.session.commit()
+        check_if_match(if_match, plan_etag(plan.id, plan.version, plan.expenses_version))
+        try:
+            updated = await self.plan_repo.update(plan, data)
+            if INDEXED_FIELDS.intersection(data):
+                await PlanSearchService(self.session).index_plan(updated)
+            await self.session.commit()
+        except StaleDataError as exc:
+            # Another request updated the row between our read and write (version_id_col check).
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Plan has been modified; fetch it again before updating",
+            ) from exc
         return updated
 
-    async def delete_plan(self, user: User, plan_id: int) -> None:
+    async def patch_itinerary(
+        self, user: CurrentUser, plan_id: int, operations: list[ItineraryOperation], *, if_match: str | None
+    ) -> tuple[TravelPlan, list[ItineraryChange]]:
+        """Apply JSON Patch operations to the itinerary; all of them or none are saved."""
+        if not if_match:
+            raise HTTPException(
+                status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+                detail="Send If-Match with the plan's ETag",
+            )
+        plan = await self.plan_repo.get_itinerary_for_user(user.id, plan_id)
+        if not plan:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        check_if_match(if_match, plan_etag(plan.id, plan.version, plan.expenses_version))
+        # The patch edits views of the day/activity rows, so only the rows it touches are written.
+        document = ItineraryDocument(plan)
+        indexed = plan_document(plan)
+        try:
+            changes = apply_itinerary_patch(document.document, operations)
+        except ItineraryPatchConflict as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+        except ItineraryPatchError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+        if not changes:
+            return plan, changes
+        document.sync()
+        try:
+            await self._reindex(plan, indexed)
+            await self.session.commit()
+        except StaleDataError as exc:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Plan has been modified; fetch it again before updating",
+            ) from exc
+        return plan, changes
+
+    async def geocode_plan(self, user: CurrentUser, plan_id: int, *, if_match: str | None = None) -> TravelPlan:
+        """Fill in coordinates for activities that have a location but none yet (e.g. older plans)."""
+        plan = await self.get_plan(user, plan_id)
+        check_if_match(if_match, plan_etag(plan.id, plan.version, plan.expenses_version))
+        indexed = plan_document(plan)
+        document = copy.deepcopy(plan.itinerary)
+        if not await geocoder.fill_itinerary(self.session, document, plan.destination):
+            await self.session.commit()  # keep newly cached lookups, e.g. addresses with no match
+            return plan
+        try:
+            plan = await self.plan_repo.update(plan, {"itinerary": document})
+            await self._reindex(plan, indexed)
+            await self.session.commit()
+        except StaleDataError as exc:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Plan has been modified; fetch it again before updating",
+            ) from exc
+        return plan
+
+    async def optimize_route(
+        self, user: CurrentUser, plan_id: int, *, if_match: str | None = None, dry_run: bool = False
+    ) -> tuple[TravelPlan, RouteOptimizationResult]:
+        """Reorder each day's located activities into a shorter walk, keeping timed slots in order."""
         plan = await self.get_plan(user, plan_id)
-        await self.plan_repo.delete(plan)
+        check_if_match(if_match, plan_etag(plan.id, plan.version, plan.expenses_version))
+        indexed = plan_document(plan)
+        document = copy.deepcopy(plan.itinerary)
+        routes = optimize_itinerary(document)
+        result = RouteOptimizationResult(
+            applied=not dry_run and any(route.changed for route in routes),
+            distance_km_before=round(sum(route.distance_km_before for route in routes), 3),
+            distance_km_after=round(sum(route.distance_km_after for route in routes), 3),
+            days=[
+                DayRouteRead(
+                    day_index=route.day_index,
+                    order=route.order,
+                    changed=route.changed,
+                    distance_km_before=route.distance_km_before,
+                    distance_km_after=route.distance_km_after,
+                )
+                for route in routes
+            ],
+        )
+        if not result.applied:
+            return plan, result
+        try:
+            plan = await self.plan_repo.update(plan, {"itinerary": document})
+            await self._reindex(plan, indexed)  # snippets point at activities by position
+            await self.session.commit()
+        except StaleDataError as exc:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Plan has been modified; fetch it again before updating",
+            ) from exc
+        return plan, result
+
+    async def delete_plan(self, user: CurrentUser, plan_id: int) -> None:
+        plan = await self.plan_repo.get_row_for_user(user.id, plan_id)
+        if not plan:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        await self.plan_repo.delete(plan)  # its search document goes with it (migration 0003)
         await self.session.commit()
 
+    @staticmethod
+    def build_llm_client(request: PlanGenerationRequest) -> LLMClient:
+        overrides = {
+            "provider": request.llm_provider,
+            "api_key": request.llm_api_key,
+            "endpoint": request.llm_endpoint,
+            "model": request.llm_model,
+        }
+        return LLMClient(
+            **{key: value for key, value in overrides.items() if value}  # pass only explicitly provided overrides
+        )
+
+    @staticmethod
+    def _dated_day(request: PlanGenerationRequest, index: int, day: Any) -> Any:
+        # Mirrors the date rewrite in _build_plan_data so streamed days match the persisted plan.
+        if request.start_date and isinstance(day, dict):
+            return {**day, "date": (request.start_date + timedelta(days=index)).isoformat()}
+        return day
+
+    async def _reindex(self, plan: TravelPlan, indexed: tuple[dict[str, str], dict[str, Any]]) -> None:
+        """Update the plan's search document if an itinerary edit changed it from ``indexed``."""
+        if plan_document(plan) != indexed:  # e.g. edits to tips, times or coordinates leave it as it is
+            await PlanSearchService(self.session).index_plan(plan)
+
+    @staticmethod
+    def _cache_key(request: PlanGenerationRequest, llm_client: LLMClient) -> str:
+        return plan_cache_key(request, llm_client.provider, llm_client.resolved_model, llm_client.default_endpoint)
+
+    @staticmethod
+    def _credential_fingerprint(api_key: str | None) -> str | None:
+        # Requests with different keys must not share an upstream call (or its failure).
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None
+
     def _build_plan_data(
         self,
-        user: User,
+        user: CurrentUser,
         request: PlanGenerationRequest,
         llm_plan: dict[str, Any],
     ) -> dict[str, Any]:
@@ -106,5 +442,4 @@ class PlanningService:
             "itinerary": itinerary_payload,
             "budget_breakdown": {"summary": budget_block},
             "notes": request.notes,
-            "raw_plan_text": json.dumps(llm_plan, ensure_ascii=False),
         }
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlsplit
+
+from ..core.config import settings
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, bursting up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take a token, sleeping up to ``max_wait`` seconds for one; False when that is not enough."""
+        self._refill()
+        if self._tokens < 1:
+            wait = (1 - self._tokens) / self.rate if self.rate > 0 else float("inf")
+            if wait > max_wait:
+                return False
+            # Reserve the token now so concurrent callers queue behind us instead of racing.
+            self._tokens -= 1
+            await asyncio.sleep(wait)
+            return True
+        self._tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and lets one trial call through
+    once ``recovery_seconds`` have passed (half-open)."""
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float) -> None:
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_seconds = recovery_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.opened_at is not None:
+            if time.monotonic() - self.opened_at >= self.recovery_seconds:
+                self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a call that neither proved nor disproved provider health (e.g. a 4xx)."""
+        self._trial_in_flight = False
+
+
+class ProviderHealth:
+    def __init__(self, provider: str) -> None:
+        self.provider = provider
+        per_minute = settings.llm_rate_limit_per_minute.get(provider)
+        self.bucket = (
+            TokenBucket(per_minute / 60.0, settings.llm_rate_limit_burst) if per_minute else None
+        )
+        self.breaker = CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_recovery_seconds)
+        self.counters = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "short_circuited": 0,
+            "fallbacks": 0,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            **self.counters,
+        }
+
+
+def key_fingerprint(api_key: str) -> str:
+    """A short, non-reversible label for an API key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class ProviderHealthRegistry:
+    """Health per provider, endpoint and API key.
+
+    A request that brings its own endpoint or key must not trip the breaker or drain the rate
+    limit of the configured account, nor be short-circuited by another account's failures.
+    Only the ``max_tracked`` most recently used combinations are kept.
+    """
+
+    def __init__(self, max_tracked: int = 256) -> None:
+        self.max_tracked = max_tracked
+        self._providers: OrderedDict[tuple[str, str | None, str | None], ProviderHealth] = OrderedDict()
+
+    def get(self, provider: str, endpoint: str | None = None, api_key: str | None = None) -> ProviderHealth:
+        key = (provider, endpoint, key_fingerprint(api_key) if api_key else None)
+        health = self._providers.get(key)
+        if health is None:
+            health = self._providers[key] = ProviderHealth(provider)
+            while len(self._providers) > self.max_tracked:
+                self._providers.popitem(last=False)
+        else:
+            self._providers.move_to_end(key)
+        return health
+
+    @staticmethod
+    def _label(provider: str, endpoint: str | None, fingerprint: str | None) -> str:
+        label = provider
+        if endpoint:
+            parts = urlsplit(endpoint)
+            label += "@" + (parts.netloc + parts.path if parts.netloc else endpoint)
+        if fingerprint:
+            label += "#" + fingerprint
+        return label
+
+    def stats(self) -> dict[str, Any]:
+        return {self._label(*key): health.stats() for key, health in self._providers.items()}
+
+
+provider_health = ProviderHealthRegistry()
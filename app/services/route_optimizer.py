@@ -0,0 +1,239 @@
+import math
+import re
+from dataclasses import dataclass
+from importlib.util import find_spec
+from typing import Any, Sequence
+
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+
+EARTH_RADIUS_KM = 6371.0088
+# Greedy tours (best first) that get the 2-opt/Or-opt treatment; more buys little but costs linearly.
+IMPROVED_STARTS = 3
+
+# Representative minute of day for the slot names LLMs use; only the order matters.
+SLOT_MINUTES = {
+    "early morning": 7 * 60,
+    "breakfast": 8 * 60,
+    "morning": 9 * 60,
+    "late morning": 11 * 60,
+    "midday": 12 * 60,
+    "noon": 12 * 60,
+    "lunch": 12 * 60,
+    "afternoon": 15 * 60,
+    "late afternoon": 17 * 60,
+    "dinner": 19 * 60,
+    "evening": 19 * 60,
+    "night": 21 * 60,
+    "早上": 7 * 60,
+    "早晨": 7 * 60,
+    "上午": 9 * 60,
+    "中午": 12 * 60,
+    "午餐": 12 * 60,
+    "下午": 15 * 60,
+    "傍晚": 18 * 60,
+    "晚餐": 19 * 60,
+    "晚上": 19 * 60,
+    "夜间": 21 * 60,
+    "夜晚": 21 * 60,
+}
+CLOCK = re.compile(r"\b(\d{1,2})[:：.](\d{2})\s*(am|pm)?", re.IGNORECASE)
+
+
+def slot_minute(value: Any) -> int | None:
+    """When an activity is pinned to during the day ("Morning", "14:30", "晚上"), or None if free."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = " ".join(value.casefold().split())
+    clock = CLOCK.search(text)
+    if clock:
+        hour, minute = int(clock.group(1)) % 24, int(clock.group(2))
+        if clock.group(3) and clock.group(3).lower() == "pm" and hour < 12:
+            hour += 12
+        return hour * 60 + minute
+    if text in SLOT_MINUTES:
+        return SLOT_MINUTES[text]
+    # Longest name first, so "late afternoon" wins over "afternoon".
+    for name in sorted(SLOT_MINUTES, key=len, reverse=True):
+        if name in text:
+            return SLOT_MINUTES[name]
+    return None
+
+
+def haversine_matrix(points: Sequence[tuple[float, float]]) -> list[list[float]]:
+    """Great-circle distances in km between every pair of ``(latitude, longitude)`` points."""
+    if NUMPY_AVAILABLE:
+        import numpy as np
+
+        coords = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+        lat, lng = coords[:, 0:1], coords[:, 1:2]
+        a = np.sin((lat - lat.T) / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin((lng - lng.T) / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))).tolist()
+    radians = [(math.radians(lat), math.radians(lng)) for lat, lng in points]
+    cosines = [math.cos(lat) for lat, _lng in radians]
+    matrix = [[0.0] * len(points) for _ in points]
+    for i, (lat_i, lng_i) in enumerate(radians):
+        row = matrix[i]
+        for j in range(i + 1, len(points)):
+            lat_j, lng_j = radians[j]
+            a = math.sin((lat_j - lat_i) / 2) ** 2 + cosines[i] * cosines[j] * math.sin((lng_j - lng_i) / 2) ** 2
+            row[j] = matrix[j][i] = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+    return matrix
+
+
+def path_length(order: Sequence[int], matrix: list[list[float]]) -> float:
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def _feasible(order: Sequence[int], slots: Sequence[int | None]) -> bool:
+    latest = -1
+    for stop in order:
+        slot = slots[stop]
+        if slot is not None:
+            if slot < latest:
+                return False
+            latest = slot
+    return True
+
+
+def _nearest_neighbour(start: int, matrix: list[list[float]], slots: Sequence[int | None]) -> list[int]:
+    """Greedy tour from ``start``; a pinned stop may only be next once no earlier slot remains."""
+    remaining = set(range(len(matrix))) - {start}
+    order = [start]
+    while remaining:
+        pending = [slots[stop] for stop in remaining if slots[stop] is not None]
+        earliest = min(pending) if pending else None
+        allowed = [stop for stop in remaining if slots[stop] is None or slots[stop] == earliest]
+        row = matrix[order[-1]]
+        stop = min(allowed, key=lambda candidate: (row[candidate], candidate))
+        order.append(stop)
+        remaining.remove(stop)
+    return order
+
+
+def _two_opt(order: list[int], matrix: list[list[float]], slots: Sequence[int | None]) -> list[int]:
+    """Reverse segments while that shortens the (open) path and keeps pinned stops in slot order."""
+    constrained = any(slot is not None for slot in slots)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                before = matrix[order[i - 1]][order[i]] if i > 0 else 0.0
+                after = matrix[order[j]][order[j + 1]] if j + 1 < len(order) else 0.0
+                new_before = matrix[order[i - 1]][order[j]] if i > 0 else 0.0
+                new_after = matrix[order[i]][order[j + 1]] if j + 1 < len(order) else 0.0
+                if new_before + new_after < before + after - 1e-9:
+                    candidate = order[:i] + order[i : j + 1][::-1] + order[j + 1 :]
+                    if constrained and not _feasible(candidate, slots):
+                        continue
+                    order = candidate
+                    improved = True
+    return order
+
+
+def _or_opt(order: list[int], matrix: list[list[float]], slots: Sequence[int | None]) -> bool:
+    """Move one run of up to three stops elsewhere in the path (first improving move); True if moved.
+
+    Complements 2-opt: relocating keeps the run's direction, so it still helps when reversing
+    a segment would put two timed stops out of order.
+    """
+    count = len(order)
+
+    def edge(a: int, b: int) -> float:
+        return matrix[order[a]][order[b]] if 0 <= a < count and 0 <= b < count else 0.0
+
+    for length in (1, 2, 3):
+        for i in range(count - length + 1):
+            j = i + length - 1
+            # Path without the run: ... order[i-1] -> order[j+1] ...
+            removed = edge(i - 1, i) + edge(j, j + 1) - (edge(i - 1, j + 1) if i > 0 else 0.0)
+            run = order[i : j + 1]
+            rest = order[:i] + order[j + 1 :]
+            for k in range(len(rest) + 1):
+                if k == i:
+                    continue
+                left = matrix[rest[k - 1]][run[0]] if k > 0 else 0.0
+                right = matrix[run[-1]][rest[k]] if k < len(rest) else 0.0
+                bridge = matrix[rest[k - 1]][rest[k]] if 0 < k < len(rest) else 0.0
+                if left + right - bridge < removed - 1e-9:
+                    candidate = rest[:k] + run + rest[k:]
+                    if _feasible(candidate, slots):
+                        order[:] = candidate
+                        return True
+    return False
+
+
+def _improve(order: list[int], matrix: list[list[float]], slots: Sequence[int | None]) -> list[int]:
+    order = _two_opt(order, matrix, slots)
+    while _or_opt(order, matrix, slots):
+        order = _two_opt(order, matrix, slots)
+    return order
+
+
+def shortest_order(matrix: list[list[float]], slots: Sequence[int | None]) -> list[int]:
+    """Visiting order (indexes into ``matrix``) for a short open path honouring ``slots``.
+
+    Nearest-neighbour from every admissible first stop, the best of them then improved with
+    2-opt and Or-opt moves; near-optimal at the ten to twenty stops an itinerary day has.
+    """
+    count = len(matrix)
+    if count < 3:
+        return list(range(count))
+    pinned = [slot for slot in slots if slot is not None]
+    first_slot = min(pinned) if pinned else None
+    starts = [stop for stop in range(count) if slots[stop] is None or slots[stop] == first_slot]
+    greedy = sorted((_nearest_neighbour(start, matrix, slots) for start in starts), key=lambda o: path_length(o, matrix))
+    best = min(
+        (_improve(order, matrix, slots) for order in greedy[:IMPROVED_STARTS]),
+        key=lambda order: path_length(order, matrix),
+    )
+    original = list(range(count))
+    # Never hand back something worse than what the LLM produced (when that order was valid).
+    if _feasible(original, slots) and path_length(original, matrix) <= path_length(best, matrix):
+        return original
+    return best
+
+
+@dataclass
+class DayRoute:
+    day_index: int
+    order: list[int]  # original activity indexes in their new order
+    distance_km_before: float
+    distance_km_after: float
+
+    @property
+    def changed(self) -> bool:
+        return self.order != sorted(self.order)
+
+
+def optimize_day(activities: list[Any]) -> tuple[list[Any], list[int], float, float]:
+    """Reorder one day's activities; those without coordinates keep their position."""
+    located = [
+        index
+        for index, activity in enumerate(activities)
+        if isinstance(activity, dict)
+        and isinstance(activity.get("latitude"), (int, float))
+        and isinstance(activity.get("longitude"), (int, float))
+    ]
+    order = list(range(len(activities)))
+    if len(located) < 2:
+        return activities, order, 0.0, 0.0
+    points = [(float(activities[index]["latitude"]), float(activities[index]["longitude"])) for index in located]
+    matrix = haversine_matrix(points)
+    best = shortest_order(matrix, [slot_minute(activities[index].get("time")) for index in located])
+    for position, chosen in zip(located, best):
+        order[position] = located[chosen]
+    before = path_length(list(range(len(located))), matrix)
+    return [activities[index] for index in order], order, before, path_length(best, matrix)
+
+
+def optimize_itinerary(itinerary: dict[str, Any] | None) -> list[DayRoute]:
+    """Reorder every day's activities in place for the shortest walk; returns what changed per day."""
+    routes = []
+    for day_index, day in enumerate((itinerary or {}).get("days") or []):
+        if not isinstance(day, dict) or not isinstance(day.get("activities"), list):
+            continue
+        activities, order, before, after = optimize_day(day["activities"])
+        day["activities"] = activities
+        routes.append(DayRoute(day_index, order, round(before, 3), round(after, 3)))
+    return routes
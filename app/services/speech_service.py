@@ -4,12 +4,14 @@ import json
 import time
 from typing import Any
 
-import httpx
 from fastapi import HTTPException, UploadFile, status
 
 from ..core.config import settings
+from ..core.http import http_clients
 from ..schemas.speech import SpeechTranscriptionResponse
 
+IFLYTEK_IAT_ENDPOINT = "https://api.xfyun.cn/v1/service/v1/iat"
+
 
 class SpeechService:
     def __init__(self) -> None:
@@ -54,12 +56,11 @@ class SpeechService:
             "X-CheckSum": checksum,
             "Content-Type": "application/x-www-form-urlencoded; charset=utf-8",
         }
-        async with httpx.AsyncClient(timeout=45) as client:
-            response = await client.post(
-                "https://api.xfyun.cn/v1/service/v1/iat",
-                headers=headers,
-                data={"audio": audio_b64},
-            )
+        response = await http_clients.get(IFLYTEK_IAT_ENDPOINT).post(
+            IFLYTEK_IAT_ENDPOINT,
+            headers=headers,
+            data={"audio": audio_b64},
+        )
         if response.status_code >= 400:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
@@ -12,6 +12,7 @@ const state = {
   currentPlanId: null,
   map: null,
   markers: [],
+  geocodeRequested: new Set(),
   authMode: "login",
 };
 
@@ -241,11 +242,13 @@ async function handleGeneratePlan(event) {
 async function loadPlans() {
   if (!state.token) return;
   try {
-    const plans = await apiFetch("/plans");
+    const plans = await apiFetch("/plans?view=summary");
     state.plans = plans;
     if (plans.length > 0) {
       state.currentPlanId = plans[0].id;
-      renderPlanDetails(plans[0]);
+      const latest = await apiFetch(`/plans/${plans[0].id}`);
+      updatePlanInState(latest);
+      renderPlanDetails(latest);
     } else {
       renderPlanDetails(null);
     }
@@ -308,6 +311,26 @@ function renderPlanDetails(plan) {
   renderItinerary(plan.itinerary, plan.currency);
   renderExpenses(plan);
   renderMap(plan.itinerary);
+  geocodeMissingLocations(plan);
+}
+
+async function geocodeMissingLocations(plan) {
+  // Older plans may lack coordinates; the server resolves and stores them once per plan.
+  if (state.geocodeRequested.has(plan.id)) return;
+  const missing = (plan.itinerary?.days || []).some((day) =>
+    (day.activities || []).some((act) => act.location && (act.latitude == null || act.longitude == null)),
+  );
+  if (!missing) return;
+  state.geocodeRequested.add(plan.id);
+  try {
+    const updated = await apiFetch(`/plans/${plan.id}/geocode`, { method: "POST" });
+    updatePlanInState(updated);
+    if (state.currentPlanId === updated.id) {
+      renderMap(updated.itinerary);
+    }
+  } catch (error) {
+    console.warn("Geocoding failed", error);
+  }
 }
 
 function formatPlanDates(plan) {
@@ -362,9 +385,7 @@ function renderExpenses(plan) {
   if (!dom.expenseList) return;
   dom.expenseList.innerHTML = "";
   const expenses = plan.expenses || [];
-  let total = 0;
   expenses.forEach((exp) => {
-    total += Number(exp.amount);
     const li = document.createElement("li");
     li.className = "expense-item";
     li.innerHTML = `
@@ -378,7 +399,18 @@ function renderExpenses(plan) {
     `;
     dom.expenseList.appendChild(li);
   });
-  dom.expenseTotal.textContent = `当前记录：¥${total.toFixed(2)}`;
+  renderExpenseTotal(plan.id);
+}
+
+async function renderExpenseTotal(planId) {
+  if (!dom.expenseTotal) return;
+  try {
+    const summary = await apiFetch(`/plans/${planId}/expenses/summary`);
+    const totals = (summary.by_currency || []).map((item) => formatMoney(item.total, item.currency));
+    dom.expenseTotal.textContent = `当前记录：${totals.length ? totals.join(" + ") : "0"}`;
+  } catch (error) {
+    dom.expenseTotal.textContent = "";
+  }
 }
 
 async function refreshExpenses() {
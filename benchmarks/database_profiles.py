@@ -0,0 +1,141 @@
+"""Compare engine profiles under concurrent writes to one SQLite file.
+
+Each profile gets a fresh database and ``--workers`` engines, standing in for uvicorn worker
+processes that share the file. Every worker runs ``--concurrency`` tasks for ``--seconds``:
+mostly the expense write path (read the plan, insert an expense, bump ``expenses_version``)
+mixed with plan-list reads. Reports committed operations per second and how many failed with
+"database is locked".
+
+Usage::
+
+    python -m benchmarks.database_profiles --workers 4 --concurrency 32 --seconds 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+PLANS = 50
+
+
+async def seed(engine) -> None:
+    from sqlalchemy import insert
+
+    from app.db.base import Base
+    from app.models import TravelPlan, User
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x"}])
+        await conn.execute(
+            insert(TravelPlan),
+            [
+                {"id": plan_id, "owner_id": 1, "title": f"Plan {plan_id}", "destination": "Osaka", "version": 1}
+                for plan_id in range(1, PLANS + 1)
+            ],
+        )
+
+
+async def worker_task(sessionmaker, deadline: float, write_ratio: float, rng: random.Random, stats: dict) -> None:
+    from sqlalchemy import select, update
+    from sqlalchemy.exc import OperationalError
+
+    from app.models import Expense, TravelPlan
+
+    while time.perf_counter() < deadline:
+        write = rng.random() < write_ratio
+        plan_id = rng.randint(1, PLANS)
+        started = time.perf_counter()
+        try:
+            async with sessionmaker() as session:
+                if write:
+                    version = await session.scalar(
+                        select(TravelPlan.expenses_version).where(TravelPlan.id == plan_id)
+                    )
+                    session.add(Expense(plan_id=plan_id, category="food", amount=rng.uniform(5, 50)))
+                    await session.execute(
+                        update(TravelPlan).where(TravelPlan.id == plan_id).values(expenses_version=version + 1)
+                    )
+                    await session.commit()
+                else:
+                    await session.execute(
+                        select(TravelPlan.id, TravelPlan.title).where(TravelPlan.owner_id == 1).limit(20)
+                    )
+        except OperationalError as exc:
+            key = "locked" if "database is locked" in str(exc) else "other_errors"
+            stats[key] += 1
+            continue
+        stats["writes" if write else "reads"] += 1
+        stats["latencies_ms"].append((time.perf_counter() - started) * 1000)
+
+
+async def run_profile(profile: str, workers: int, concurrency: int, seconds: float, write_ratio: float) -> dict:
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.db.engine import build_engine
+    from app.models import Expense
+
+    url = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    engines = [build_engine(url, profile) for _ in range(workers)]
+    await seed(engines[0])
+    stats = {"writes": 0, "reads": 0, "locked": 0, "other_errors": 0, "latencies_ms": []}
+    deadline = time.perf_counter() + seconds
+    rng = random.Random(11)
+    await asyncio.gather(
+        *(
+            worker_task(
+                async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession),
+                deadline,
+                write_ratio,
+                random.Random(rng.random()),
+                stats,
+            )
+            for engine in engines
+            for _ in range(concurrency)
+        )
+    )
+    async with engines[0].connect() as conn:
+        stored = await conn.scalar(select(func.count()).select_from(Expense))
+    for engine in engines:
+        await engine.dispose()
+    latencies = sorted(stats.pop("latencies_ms"))
+    attempts = stats["writes"] + stats["reads"] + stats["locked"] + stats["other_errors"]
+    return {
+        "profile": profile,
+        "writes_per_second": round(stats["writes"] / seconds, 1),
+        "reads_per_second": round(stats["reads"] / seconds, 1),
+        "locked_errors": stats["locked"],
+        "locked_pct": round(stats["locked"] / attempts * 100, 2) if attempts else 0.0,
+        "other_errors": stats["other_errors"],
+        "expenses_stored": stored,
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 2) if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    from app.db.engine import PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(reversed(PROFILES)), choices=PROFILES)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.7)
+    args = parser.parse_args()
+    results = [
+        asyncio.run(run_profile(profile, args.workers, args.concurrency, args.seconds, args.write_ratio))
+        for profile in args.profiles
+    ]
+    print(json.dumps({"workers": args.workers, "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
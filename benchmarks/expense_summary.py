@@ -0,0 +1,123 @@
+"""Compare the SQL-side expense summary against shipping every row and summing on the client.
+
+Usage::
+
+    python -m benchmarks.expense_summary --expenses 100000 --plans 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+CATEGORIES = ("Accommodation", "Food", "Activities", "Transport", "Misc")
+CURRENCIES = ("CNY", "CNY", "CNY", "USD", "JPY")
+
+
+async def seed(user_id: int, plan_ids: list[int], expenses: int) -> None:
+    from sqlalchemy import insert
+
+    from app.db.session import AsyncSessionLocal
+    from app.models import Expense
+
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        {
+            "plan_id": plan_ids[index % len(plan_ids)],
+            "category": rng.choice(CATEGORIES),
+            "amount": round(rng.uniform(1, 500), 2),
+            "currency": rng.choice(CURRENCIES),
+            "incurred_at": start + timedelta(minutes=rng.randrange(60 * 24 * 14)),
+        }
+        for index in range(expenses)
+    ]
+    async with AsyncSessionLocal() as session:
+        for offset in range(0, len(rows), 5000):
+            await session.execute(insert(Expense), rows[offset : offset + 5000])
+        await session.commit()
+
+
+async def timed(samples: list[float], coro) -> object:
+    started = time.perf_counter()
+    result = await coro
+    samples.append((time.perf_counter() - started) * 1000)
+    return result
+
+
+async def run(expenses: int, plans: int, repeat: int) -> dict[str, object]:
+    import httpx
+
+    from app.core.security import password_hasher
+    from app.db.init_db import init_db
+    from app.db.session import engine
+    from app.main import create_app
+
+    await init_db()
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        credentials = {"email": "ledger@example.com", "password": "secret123"}
+        await client.post("/api/v1/auth/register", json=credentials)
+        token = (await client.post("/api/v1/auth/login", json=credentials)).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        user_id = (await client.get("/api/v1/users/me")).json()["id"]
+        plan_ids = []
+        for index in range(plans):
+            response = await client.post(
+                "/api/v1/plans/generate", json={"destination": f"City {index}", "duration_days": 3}
+            )
+            plan_ids.append(response.json()["plan"]["id"])
+        await seed(user_id, plan_ids, expenses)
+        target = plan_ids[0]
+
+        client_side: list[float] = []
+        server_side: list[float] = []
+        rollup: list[float] = []
+        payload_bytes = {}
+        for _ in range(repeat):
+            response = await timed(client_side, client.get(f"/api/v1/plans/{target}/expenses"))
+            sum(item["amount"] for item in response.json())
+            payload_bytes["list_and_sum"] = len(response.content)
+            response = await timed(server_side, client.get(f"/api/v1/plans/{target}/expenses/summary"))
+            payload_bytes["summary"] = len(response.content)
+            response = await timed(rollup, client.get("/api/v1/users/me/expenses/summary"))
+            payload_bytes["user_rollup"] = len(response.content)
+    password_hasher.shutdown()
+    await engine.dispose()
+
+    def describe(samples: list[float]) -> dict[str, float]:
+        return {"p50_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
+
+    return {
+        "expenses": expenses,
+        "plans": plans,
+        "expenses_in_target_plan": len(range(0, expenses, plans)),
+        "list_and_sum": describe(client_side),
+        "summary": describe(server_side),
+        "user_rollup": describe(rollup),
+        "payload_bytes": payload_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.setdefault("LLM_PROVIDER", "mock")
+    result = asyncio.run(run(args.expenses, args.plans, args.repeat))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Load-test the API with seeded data and report throughput, latency and SQL per request as JSON.
+
+Runs offline against the ``mock`` LLM provider and a temporary SQLite database (set
+``DATABASE_URL`` to load another database, e.g. a local Postgres). Seeds ``--users`` accounts
+with ``--plans`` generated plans and ``--expenses`` imported expenses each, all through the API,
+then runs ``--concurrency`` clients for ``--seconds`` over a weighted mix of login, plan
+generation, plan listing and reads, and the expense endpoints. The app runs in process unless
+``--base-url`` points at a running server. SQL statements per request come from the
+``X-Query-Count`` header, which is switched on for the in-process app.
+
+Every random choice comes from ``--seed``, so two runs issue the same kinds of requests in the
+same proportions. ``--output`` stores the report; ``--baseline`` compares against a stored one
+and exits non-zero when an operation got slower than ``--tolerance`` allows (given enough
+samples), throughput dropped by more than that, or an operation issues more SQL statements
+than before. Latency is only comparable between runs on the same machine and configuration.
+
+Usage::
+
+    python -m benchmarks.load --output baseline.json
+    python -m benchmarks.load --baseline baseline.json
+    python -m benchmarks.load --users 5 --plans 300 --expenses 3000 --concurrency 32 --seconds 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+# Relative weight of each operation in the request mix; roughly what the web client sends.
+MIX: dict[str, int] = {
+    "POST /auth/login": 1,
+    "POST /plans/generate": 2,
+    "GET /plans?view=summary": 8,
+    "GET /plans?limit=20": 4,
+    "GET /plans/{id}": 20,
+    "GET /plans/{id} (conditional)": 10,
+    "GET /plans/{id}/expenses": 8,
+    "GET /plans/{id}/expenses/summary": 10,
+    "POST /plans/{id}/expenses": 6,
+    "GET /users/me/expenses/summary": 2,
+}
+DESTINATIONS = ("Kyoto", "Chengdu", "Lisbon", "Hangzhou", "Reykjavik", "Osaka", "Xi'an", "Barcelona")
+CATEGORIES = ("food", "transport", "lodging", "tickets", "shopping", "coffee")
+PASSWORD = "secret123"
+# Latency is only compared for operations with at least this many requests in both runs.
+MIN_SAMPLES = 30
+
+
+@dataclass
+class Account:
+    credentials: dict[str, str]
+    headers: dict[str, str]
+    plan_ids: list[int] = field(default_factory=list)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def seed(client, users: int, plans: int, expenses: int, concurrency: int, rng: random.Random) -> list[Account]:
+    accounts = []
+    for index in range(users):
+        credentials = {"email": f"load{index}@example.com", "password": PASSWORD}
+        response = await client.post("/api/v1/auth/register", json=credentials)
+        if response.status_code != 400:  # already registered when --base-url is reused
+            response.raise_for_status()
+        token = (await client.post("/api/v1/auth/login", json=credentials)).json()["access_token"]
+        accounts.append(Account(credentials, {"Authorization": f"Bearer {token}"}))
+
+    # Payloads are drawn up front so the data does not depend on the order tasks finish in.
+    semaphore = asyncio.Semaphore(concurrency)
+    payloads = [
+        (account, {"destination": rng.choice(DESTINATIONS), "duration_days": rng.randint(2, 10), "bypass_cache": True})
+        for account in accounts
+        for _ in range(plans)
+    ]
+
+    async def generate(account: Account, payload: dict) -> None:
+        async with semaphore:
+            response = await client.post("/api/v1/plans/generate", headers=account.headers, json=payload)
+            response.raise_for_status()
+            account.plan_ids.append(response.json()["plan"]["id"])
+
+    await asyncio.gather(*(generate(account, payload) for account, payload in payloads))
+    for account in accounts:
+        account.plan_ids.sort()
+
+    imports = []
+    for account in accounts:
+        per_plan = [expenses // len(account.plan_ids)] * len(account.plan_ids) if account.plan_ids else []
+        for position in range(expenses - sum(per_plan)):
+            per_plan[position] += 1
+        for plan_id, count in zip(account.plan_ids, per_plan):
+            rows = [
+                f"{rng.choice(CATEGORIES)},{rng.uniform(5, 500):.2f},CNY,"
+                f"{date(2026, 1, 1) + timedelta(days=rng.randint(0, 30))}T12:00:00"
+                for _ in range(count)
+            ]
+            imports.append((account, plan_id, "category,amount,currency,incurred_at\n" + "\n".join(rows) + "\n"))
+
+    async def import_expenses(account: Account, plan_id: int, body: str) -> None:
+        async with semaphore:
+            response = await client.post(
+                f"/api/v1/plans/{plan_id}/expenses/import?atomic=true",
+                headers={**account.headers, "Content-Type": "text/csv"},
+                content=body,
+            )
+            response.raise_for_status()
+
+    await asyncio.gather(*(import_expenses(*item) for item in imports if item[2].count("\n") > 1))
+    return accounts
+
+
+def build_request(
+    label: str, account: Account, plan_id: int, rng: random.Random, etags: dict[int, str]
+) -> tuple[str, str, dict]:
+    if label == "POST /auth/login":
+        return "POST", "/api/v1/auth/login", {"json": account.credentials}
+    if label == "POST /plans/generate":
+        # Fixed length and no cache, so every request takes the same full path and SQL count.
+        payload = {"destination": rng.choice(DESTINATIONS), "duration_days": 5, "bypass_cache": True}
+        return "POST", "/api/v1/plans/generate", {"json": payload}
+    if label == "GET /plans?view=summary":
+        return "GET", "/api/v1/plans?view=summary", {}
+    if label == "GET /plans?limit=20":
+        return "GET", "/api/v1/plans?limit=20", {}
+    if label == "GET /plans/{id}":
+        return "GET", f"/api/v1/plans/{plan_id}", {}
+    if label == "GET /plans/{id} (conditional)":
+        return "GET", f"/api/v1/plans/{plan_id}", {"headers": {"If-None-Match": etags.get(plan_id, '""')}}
+    if label == "GET /plans/{id}/expenses":
+        return "GET", f"/api/v1/plans/{plan_id}/expenses", {}
+    if label == "GET /plans/{id}/expenses/summary":
+        return "GET", f"/api/v1/plans/{plan_id}/expenses/summary", {}
+    if label == "POST /plans/{id}/expenses":
+        payload = {"category": rng.choice(CATEGORIES), "amount": round(rng.uniform(5, 500), 2), "currency": "CNY"}
+        return "POST", f"/api/v1/plans/{plan_id}/expenses", {"json": payload}
+    if label == "GET /users/me/expenses/summary":
+        return "GET", "/api/v1/users/me/expenses/summary", {}
+    raise ValueError(f"Unknown operation: {label}")
+
+
+async def drive(
+    client, accounts: list[Account], mix: dict[str, int], concurrency: int, seconds: float, rng: random.Random
+) -> dict[str, list[tuple[float, int, int | None]]]:
+    """Closed-loop clients; returns (latency ms, status, SQL statements) per request, by operation."""
+    labels, weights = list(mix), list(mix.values())
+    samples: dict[str, list[tuple[float, int, int | None]]] = {label: [] for label in labels}
+    etags: dict[int, str] = {}
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client_rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            label = client_rng.choices(labels, weights)[0]
+            account = client_rng.choice(accounts)
+            plan_id = client_rng.choice(account.plan_ids)
+            method, url, kwargs = build_request(label, account, plan_id, client_rng, etags)
+            kwargs["headers"] = {**account.headers, **kwargs.get("headers", {})}
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = (time.perf_counter() - started) * 1000
+            queries = response.headers.get("X-Query-Count")
+            samples[label].append((elapsed, response.status_code, int(queries) if queries else None))
+            if label.startswith("GET /plans/{id}") and response.status_code == 200:
+                etags[plan_id] = response.headers["ETag"]
+            if label == "POST /plans/generate" and response.status_code == 201:
+                account.plan_ids.append(response.json()["plan"]["id"])
+
+    await asyncio.gather(*(client_loop(random.Random(rng.random())) for _ in range(concurrency)))
+    return samples
+
+
+def describe(samples: list[tuple[float, int, int | None]], seconds: float) -> dict[str, object]:
+    latencies = [latency for latency, _, _ in samples]
+    queries = [count for _, _, count in samples if count is not None]
+    statuses: dict[str, int] = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, status, _ in samples if status >= 400),
+        "statuses": dict(sorted(statuses.items())),
+        "requests_per_second": round(len(samples) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+        "queries_mean": round(statistics.mean(queries), 2) if queries else None,
+        "queries_max": max(queries) if queries else None,
+    }
+
+
+def environment() -> dict[str, object]:
+    from app.api.responses import ORJSON_AVAILABLE
+    from app.core.config import settings
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": settings.database_url.split(":", 1)[0],
+        "database_profile": settings.database_profile,
+        "llm_provider": settings.llm_provider,
+        "orjson": ORJSON_AVAILABLE,
+        "compression": settings.compression_enabled,
+    }
+
+
+async def run(args: argparse.Namespace, mix: dict[str, int]) -> dict[str, object]:
+    import httpx
+
+    rng = random.Random(args.seed)
+    if args.base_url:
+        transport, base_url, app = None, args.base_url, None
+    else:
+        from app.db.init_db import init_db
+        from app.main import create_app
+
+        await init_db()
+        app = create_app()
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60.0) as client:
+        if app is not None:
+            await app.router.startup()
+        try:
+            started = time.perf_counter()
+            accounts = await seed(client, args.users, args.plans, args.expenses, args.concurrency, rng)
+            seeded = time.perf_counter() - started
+            if args.warmup:
+                await drive(client, accounts, mix, args.concurrency, args.warmup, random.Random(rng.random()))
+            samples = await drive(client, accounts, mix, args.concurrency, args.seconds, rng)
+        finally:
+            if app is not None:
+                await app.router.shutdown()  # stops the job queue and disposes the engine
+    everything = [sample for label in samples for sample in samples[label]]
+    return {
+        "environment": environment(),
+        "config": {
+            "users": args.users,
+            "plans_per_user": args.plans,
+            "expenses_per_user": args.expenses,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "seed": args.seed,
+            "mix": mix,
+        },
+        "seeding_seconds": round(seeded, 1),
+        "totals": describe(everything, args.seconds),
+        "operations": {label: describe(samples[label], args.seconds) for label in samples},
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> dict[str, object]:
+    """Per-operation latency ratios and SQL counts against ``baseline``, plus the regressions found."""
+    regressions = []
+    operations = {}
+    for label, current in result["operations"].items():
+        before = baseline.get("operations", {}).get(label)
+        if not before or not before["requests"] or not current["requests"]:
+            continue
+        row = {}
+        enough = min(before["requests"], current["requests"]) >= MIN_SAMPLES
+        for metric in ("p50_ms", "p90_ms", "p99_ms"):
+            ratio = round(current[metric] / before[metric], 2) if before[metric] else None
+            row[metric] = {"baseline": before[metric], "current": current[metric], "ratio": ratio}
+            # p99 is reported but too noisy on short runs to fail on.
+            if enough and metric != "p99_ms" and ratio is not None and ratio > 1 + tolerance:
+                regressions.append(f"{label}: {metric} {before[metric]} -> {current[metric]}")
+        row["queries_max"] = {"baseline": before["queries_max"], "current": current["queries_max"]}
+        if None not in (before["queries_max"], current["queries_max"]) and current["queries_max"] > before["queries_max"]:
+            regressions.append(f"{label}: queries {before['queries_max']} -> {current['queries_max']}")
+        operations[label] = row
+    before_rps, current_rps = baseline["totals"]["requests_per_second"], result["totals"]["requests_per_second"]
+    if before_rps and current_rps < before_rps * (1 - tolerance):
+        regressions.append(f"throughput: {before_rps} -> {current_rps} requests/s")
+    return {
+        "tolerance": tolerance,
+        "same_config": baseline.get("config") == result["config"],
+        "baseline_commit": baseline.get("environment", {}).get("git_commit"),
+        "requests_per_second": {"baseline": before_rps, "current": current_rps},
+        "operations": operations,
+        "regressions": regressions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--plans", type=int, default=200, help="Plans generated per user.")
+    parser.add_argument("--expenses", type=int, default=2000, help="Expenses imported per user, spread over its plans.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of load before measuring.")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument(
+        "--mix", nargs="*", default=[], metavar="OPERATION=WEIGHT", help="Override weights; 0 drops an operation."
+    )
+    parser.add_argument("--base-url", help="Drive a running server instead of the app in process.")
+    parser.add_argument("--output", help="Also write the report to this file, e.g. to keep as a baseline.")
+    parser.add_argument("--baseline", help="Report from an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown.")
+    args = parser.parse_args()
+
+    mix = dict(MIX)
+    for item in args.mix:
+        label, _, weight = item.rpartition("=")
+        if label not in MIX:
+            parser.error(f"unknown operation {label!r}; choose from {sorted(MIX)}")
+        mix[label] = int(weight)
+    mix = {label: weight for label, weight in mix.items() if weight > 0}
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ["QUERY_COUNT_HEADER"] = "true"
+    os.environ.setdefault("LLM_PROVIDER", "mock")
+
+    result = asyncio.run(run(args, mix))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            result["comparison"] = compare(result, json.load(handle), args.tolerance)
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(report + "\n")
+    print(report)
+    if result.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Measure latency of an unrelated endpoint while a burst of logins is in flight.
+
+Usage::
+
+    python -m benchmarks.login_storm --logins 200 --concurrency 50
+    PASSWORD_HASH_EXECUTOR=inline python -m benchmarks.login_storm  # previous behaviour
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(logins: int, concurrency: int) -> dict[str, object]:
+    import httpx
+
+    from app.core.security import password_hasher
+    from app.db.init_db import init_db
+    from app.db.session import engine
+    from app.main import create_app
+
+    await init_db()
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"email": "storm@example.com", "password": "secret123"}
+        await client.post("/api/v1/auth/register", json=credentials)
+        token = (await client.post("/api/v1/auth/login", json=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def probe(samples: list[float], stop: asyncio.Event) -> None:
+            while not stop.is_set():
+                started = time.perf_counter()
+                await client.get("/api/v1/users/me", headers=headers)
+                samples.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.005)
+
+        baseline: list[float] = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(baseline, stop))
+        await asyncio.sleep(1.0)
+        stop.set()
+        await probe_task
+
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses: dict[int, int] = {}
+
+        async def login() -> None:
+            async with semaphore:
+                response = await client.post("/api/v1/auth/login", json=credentials)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        storm: list[float] = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(storm, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+    password_hasher.shutdown()
+    await engine.dispose()
+
+    def describe(samples: list[float]) -> dict[str, float]:
+        return {
+            "count": len(samples),
+            "p50_ms": round(statistics.median(samples), 2) if samples else 0.0,
+            "p99_ms": round(percentile(samples, 99), 2),
+            "max_ms": round(max(samples), 2) if samples else 0.0,
+        }
+
+    return {
+        "executor": password_hasher.mode,
+        "logins": logins,
+        "concurrency": concurrency,
+        "login_throughput_rps": round(logins / elapsed, 2),
+        "login_statuses": statuses,
+        "probe_idle": describe(baseline),
+        "probe_during_storm": describe(storm),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25)
+    args = parser.parse_args()
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    result = asyncio.run(run(args.logins, args.concurrency))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
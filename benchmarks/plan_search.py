@@ -0,0 +1,182 @@
+"""Time ``GET /plans/search`` on a large table against loading every itinerary and filtering in Python.
+
+Plans, days and activities are inserted directly, spread over ``--users`` owners. The index is
+then built by ``backfill_search_index``, and queries are issued as one owner.
+
+Usage::
+
+    python -m benchmarks.plan_search --plans 100000 --users 1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+CITIES = ("Osaka", "Kyoto", "Tokyo", "Paris", "Lisbon", "Hangzhou", "Chengdu", "Seoul", "Bangkok", "Rome")
+PLACES = ("market", "temple", "museum", "harbour", "old town", "night street", "garden", "castle", "alley")
+FOODS = ("ramen", "dumplings", "tapas", "noodles", "hotpot", "sushi", "pastries", "street food")
+CN_NOTES = ("想去吃拉面", "记得带护照", "预订温泉旅馆", "看樱花", "逛夜市", "买伴手礼")
+QUERIES = {
+    "rare_word": "ichiran",
+    "common_word": "museum",
+    "two_words": "ramen osaka",
+    "prefix": "dumpl",
+    "cjk_phrase": "拉面",
+}
+OWNER_ID = 1
+
+
+async def seed(plans: int, users: int) -> None:
+    from sqlalchemy import insert
+
+    from app.db.session import AsyncSessionLocal
+    from app.models import ItineraryDay, ItineraryItem, TravelPlan, User
+
+    rng = random.Random(7)
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            insert(User),
+            [{"id": index + 1, "email": f"u{index}@example.com", "hashed_password": "x"} for index in range(users)],
+        )
+        day_id = item_id = 0
+        for offset in range(0, plans, 2000):
+            plan_rows, day_rows, item_rows = [], [], []
+            for plan_id in range(offset + 1, min(offset + 2000, plans) + 1):
+                city = rng.choice(CITIES)
+                start = date(2026, 1, 1) + timedelta(days=rng.randrange(365))
+                plan_rows.append(
+                    {
+                        "id": plan_id,
+                        "owner_id": plan_id % users + 1,
+                        "title": f"{city} {rng.choice(PLACES)} trip",
+                        "destination": city,
+                        "start_date": start,
+                        "notes": rng.choice(CN_NOTES) if rng.random() < 0.3 else None,
+                        "itinerary_meta": {"summary": f"Days in {city}", "tips": []},
+                        "version": 1,
+                        "expenses_version": 0,
+                    }
+                )
+                for position in range(3):
+                    day_id += 1
+                    day_rows.append(
+                        {
+                            "id": day_id,
+                            "plan_id": plan_id,
+                            "position": position,
+                            "day": position + 1,
+                            "day_date": start + timedelta(days=position),
+                        }
+                    )
+                    for slot in range(3):
+                        item_id += 1
+                        food = rng.choice(FOODS)
+                        name = "Ichiran" if rng.random() < 0.0005 else rng.choice(("Local", "Famous", "Hidden"))
+                        item_rows.append(
+                            {
+                                "id": item_id,
+                                "day_id": day_id,
+                                "plan_id": plan_id,
+                                "position": slot,
+                                "title": f"{name} {food}" if slot == 1 else f"Visit the {rng.choice(PLACES)}",
+                                "location": f"{city} {rng.choice(PLACES)}",
+                                "description": f"Try the {food} near the {rng.choice(PLACES)}.",
+                            }
+                        )
+            await session.execute(insert(TravelPlan), plan_rows)
+            await session.execute(insert(ItineraryDay), day_rows)
+            await session.execute(insert(ItineraryItem), item_rows)
+        await session.commit()
+
+
+def naive_search(plans, query: str) -> list[int]:
+    """What a filter without an index has to do: serialize every itinerary and scan it."""
+    words = query.casefold().split()
+    found = []
+    for plan in plans:
+        text = " ".join(
+            [plan.title, plan.destination, plan.notes or "", json.dumps(plan.itinerary, ensure_ascii=False)]
+        ).casefold()
+        if all(word in text for word in words):
+            found.append(plan.id)
+    return found
+
+
+async def run(plans: int, users: int, repeat: int) -> dict[str, object]:
+    from sqlalchemy import func, select
+
+    from app.db.backfill import backfill_search_index
+    from app.db.init_db import init_db
+    from app.db.session import AsyncSessionLocal, engine
+    from app.models import TravelPlan
+    from app.repositories.plan_repository import ITINERARY_LOADER
+    from app.schemas.auth import CurrentUser
+    from app.services.plan_search import PlanSearchService
+
+    await init_db()
+    started = time.perf_counter()
+    await seed(plans, users)
+    seed_seconds = time.perf_counter() - started
+    async with AsyncSessionLocal() as session:
+        started = time.perf_counter()
+        indexed = await backfill_search_index(session, batch_size=1000)
+        index_seconds = time.perf_counter() - started
+        owned = await session.scalar(select(func.count()).where(TravelPlan.owner_id == OWNER_ID))
+
+    user = CurrentUser(id=OWNER_ID, email="u0@example.com", created_at=datetime.now(timezone.utc))
+    results: dict[str, object] = {}
+    for label, query in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            async with AsyncSessionLocal() as session:
+                started = time.perf_counter()
+                hits = await PlanSearchService(session).search(user, query, limit=20)
+                samples.append((time.perf_counter() - started) * 1000)
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            result = await session.execute(
+                select(TravelPlan).options(ITINERARY_LOADER).where(TravelPlan.owner_id == OWNER_ID)
+            )
+            matches = naive_search(result.scalars().all(), query)
+            naive_ms = (time.perf_counter() - started) * 1000
+        results[label] = {
+            "query": query,
+            "hits": len(hits),
+            "naive_matches": len(matches),
+            "search_p50_ms": round(statistics.median(samples), 2),
+            "search_max_ms": round(max(samples), 2),
+            "naive_ms": round(naive_ms, 2),
+        }
+    await engine.dispose()
+    return {
+        "plans": plans,
+        "users": users,
+        "plans_of_queried_user": owned,
+        "seed_seconds": round(seed_seconds, 1),
+        "index_plans": indexed,
+        "index_seconds": round(index_seconds, 1),
+        "queries": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    result = asyncio.run(run(args.plans, args.users, args.repeat))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
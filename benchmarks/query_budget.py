@@ -0,0 +1,165 @@
+"""Check that the main endpoints stay within a fixed number of SQL statements per request.
+
+Usage::
+
+    python -m benchmarks.query_budget            # exits non-zero if any endpoint exceeds its budget
+    python -m benchmarks.query_budget --plans 20 # larger fixture, budgets must not move
+
+Every request runs with ``QUERY_COUNT_HEADER=true`` so the counts come from the
+``X-Query-Count`` response header. The budgets are independent of the number of
+plans and expenses, which is what catches N+1 regressions.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Upper bound of SQL statements per request, keyed by a label for the request below.
+QUERY_BUDGETS: dict[str, int] = {
+    "GET /users/me": 0,
+    "GET /plans": 3,
+    "GET /plans (304)": 1,
+    "GET /plans?view=summary": 2,
+    "GET /plans/search": 1,
+    "GET /plans/{id}": 3,
+    "GET /plans/{id} (304)": 1,
+    "PATCH /plans/{id}": 4,
+    "PATCH /plans/{id}/itinerary": 4,
+    "GET /plans/{id}/expenses": 2,
+    "GET /plans/{id}/expenses (304)": 1,
+    "GET /plans/{id}/expenses/summary": 3,
+    "GET /users/me/expenses/summary": 1,
+    "POST /plans/{id}/expenses": 4,
+    "DELETE /plans/{id}/expenses/{id}": 4,
+    "DELETE /plans/{id}": 2,
+}
+
+
+async def run(plans: int, expenses: int) -> dict[str, object]:
+    import httpx
+
+    from app.core.security import password_hasher
+    from app.db.init_db import init_db
+    from app.db.session import engine
+    from app.main import create_app
+
+    await init_db()
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    measured: dict[str, int] = {}
+
+    async def call(client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        response = await client.request(method, url, **kwargs)
+        if response.status_code != 304:
+            response.raise_for_status()
+        count = int(response.headers["X-Query-Count"])
+        measured[label] = max(measured.get(label, 0), count)
+        return response
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"email": "budget@example.com", "password": "secret123"}
+        await client.post("/api/v1/auth/register", json=credentials)
+        token = (await client.post("/api/v1/auth/login", json=credentials)).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        # Warm the principal cache so /users/me measures the steady state.
+        await client.get("/api/v1/users/me")
+
+        plan_ids: list[int] = []
+        for index in range(plans):
+            response = await client.post(
+                "/api/v1/plans/generate",
+                json={"destination": f"City {index}", "duration_days": 2, "bypass_cache": True},
+            )
+            response.raise_for_status()
+            plan_ids.append(response.json()["plan"]["id"])
+        for plan_id in plan_ids:
+            for index in range(expenses):
+                await call(
+                    client,
+                    "POST /plans/{id}/expenses",
+                    "POST",
+                    f"/api/v1/plans/{plan_id}/expenses",
+                    json={"category": "food", "amount": 10 + index, "currency": "CNY"},
+                )
+
+        await call(client, "GET /users/me", "GET", "/api/v1/users/me")
+        listed = await call(client, "GET /plans", "GET", "/api/v1/plans")
+        await call(
+            client, "GET /plans (304)", "GET", "/api/v1/plans", headers={"If-None-Match": listed.headers["ETag"]}
+        )
+        await call(client, "GET /plans?view=summary", "GET", "/api/v1/plans?view=summary")
+        await call(client, "GET /plans/search", "GET", "/api/v1/plans/search?q=city")
+        for plan_id in plan_ids:
+            plan = await call(client, "GET /plans/{id}", "GET", f"/api/v1/plans/{plan_id}")
+            await call(
+                client,
+                "GET /plans/{id} (304)",
+                "GET",
+                f"/api/v1/plans/{plan_id}",
+                headers={"If-None-Match": plan.headers["ETag"]},
+            )
+            renamed = await call(
+                client, "PATCH /plans/{id}", "PATCH", f"/api/v1/plans/{plan_id}", json={"title": "Renamed"}
+            )
+            await call(
+                client,
+                "PATCH /plans/{id}/itinerary",
+                "PATCH",
+                f"/api/v1/plans/{plan_id}/itinerary",
+                headers={"If-Match": renamed.headers["ETag"]},
+                json=[{"op": "move", "from": "/days/0/activities/0", "path": "/days/1/activities/-"}],
+            )
+            listed = await call(client, "GET /plans/{id}/expenses", "GET", f"/api/v1/plans/{plan_id}/expenses")
+            await call(
+                client,
+                "GET /plans/{id}/expenses (304)",
+                "GET",
+                f"/api/v1/plans/{plan_id}/expenses",
+                headers={"If-None-Match": listed.headers["ETag"]},
+            )
+            await call(
+                client, "GET /plans/{id}/expenses/summary", "GET", f"/api/v1/plans/{plan_id}/expenses/summary"
+            )
+        await call(client, "GET /users/me/expenses/summary", "GET", "/api/v1/users/me/expenses/summary")
+        if expenses:
+            expense_id = listed.json()[0]["id"]
+            await call(
+                client,
+                "DELETE /plans/{id}/expenses/{id}",
+                "DELETE",
+                f"/api/v1/plans/{plan_ids[-1]}/expenses/{expense_id}",
+            )
+        for plan_id in plan_ids:
+            await call(client, "DELETE /plans/{id}", "DELETE", f"/api/v1/plans/{plan_id}")
+    password_hasher.shutdown()
+    await engine.dispose()
+
+    over_budget = {
+        label: {"queries": count, "budget": QUERY_BUDGETS[label]}
+        for label, count in measured.items()
+        if count > QUERY_BUDGETS[label]
+    }
+    return {"plans": plans, "expenses_per_plan": expenses, "queries": measured, "over_budget": over_budget}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=5)
+    parser.add_argument("--expenses", type=int, default=3)
+    args = parser.parse_args()
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ["QUERY_COUNT_HEADER"] = "true"
+    os.environ.setdefault("LLM_PROVIDER", "mock")
+    result = asyncio.run(run(args.plans, args.expenses))
+    print(json.dumps(result, indent=2))
+    if result["over_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
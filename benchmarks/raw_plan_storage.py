@@ -0,0 +1,110 @@
+"""Measure what moving raw_plan_text into compressed planblob rows saves on disk and on the wire.
+
+Generates plans through the API, rewrites them into the pre-compaction layout (raw output inline
+in ``travelplan.raw_plan_text``), then runs the compaction and compares SQLite file sizes after
+VACUUM. ``GET /plans?include=raw`` stands in for the old list payload, which always carried it.
+
+Usage::
+
+    python -m benchmarks.raw_plan_storage --plans 200 --destinations 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+async def vacuumed_size(path: Path) -> int:
+    from app.db.session import engine
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM")
+    return path.stat().st_size
+
+
+async def inline_raw_text() -> None:
+    """Rewrite every plan into the layout older releases stored: raw text inline, no blobs."""
+    from sqlalchemy import delete, select, update
+
+    from app.db.session import AsyncSessionLocal
+    from app.models import PlanBlob, TravelPlan
+    from app.services.blob_store import BlobStore
+
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(select(TravelPlan.id, TravelPlan.raw_plan_digest))).all()
+        texts = await BlobStore(session).get_texts(digest for _plan_id, digest in rows)
+        for plan_id, digest in rows:
+            await session.execute(
+                update(TravelPlan)
+                .where(TravelPlan.id == plan_id)
+                .values(raw_plan_legacy=texts[digest], raw_plan_digest=None)
+            )
+        await session.execute(delete(PlanBlob))
+        await session.commit()
+
+
+async def run(plans: int, destinations: int, path: Path) -> dict[str, object]:
+    import httpx
+
+    from app.core.security import password_hasher
+    from app.db.backfill import compact_raw_plans
+    from app.db.init_db import init_db
+    from app.db.session import AsyncSessionLocal, engine
+    from app.main import create_app
+
+    await init_db()
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        credentials = {"email": "blobs@example.com", "password": "secret123"}
+        await client.post("/api/v1/auth/register", json=credentials)
+        token = (await client.post("/api/v1/auth/login", json=credentials)).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        # Repeated destinations are plan cache hits: the same raw output, stored once as a blob.
+        for index in range(plans):
+            await client.post(
+                "/api/v1/plans/generate",
+                json={"destination": f"City {index % destinations}", "duration_days": 5},
+            )
+        payload_with_raw = len((await client.get("/api/v1/plans", params={"include": "raw"})).content)
+        payload = len((await client.get("/api/v1/plans")).content)
+
+        await inline_raw_text()
+        inline_size = await vacuumed_size(path)
+        async with AsyncSessionLocal() as session:
+            report = await compact_raw_plans(session)
+        compacted_size = await vacuumed_size(path)
+        assert len((await client.get("/api/v1/plans", params={"include": "raw"})).content) == payload_with_raw
+    password_hasher.shutdown()
+    await engine.dispose()
+
+    return {
+        "plans": plans,
+        "distinct_outputs": min(plans, destinations),
+        "compaction": report,
+        "db_bytes": {"inline": inline_size, "compacted": compacted_size},
+        "db_saved_pct": round(100 * (1 - compacted_size / inline_size), 1),
+        "list_payload_bytes": {"with_raw": payload_with_raw, "default": payload},
+        "list_payload_saved_pct": round(100 * (1 - payload / payload_with_raw), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--destinations", type=int, default=50)
+    args = parser.parse_args()
+    path = Path(tempfile.mkdtemp()) / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("LLM_PROVIDER", "mock")
+    result = asyncio.run(run(args.plans, args.destinations, path))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Time per-day route optimization on long itineraries with many stops per day.
+
+Each day has ``--stops`` activities scattered over a city, every fourth one tied to a time slot
+("Morning", "Midday", "Afternoon", "Evening") in the order the LLM wrote them. Reports the
+wall time of ``optimize_itinerary`` for the whole plan and how much walking it saves.
+
+Usage::
+
+    python -m benchmarks.route_optimizer --days 30 60 90 --stops 10 15 20
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import random
+import statistics
+import time
+
+SLOTS = ("Morning", "Midday", "Afternoon", "Evening")
+
+
+def make_itinerary(days: int, stops: int, rng: random.Random) -> dict[str, object]:
+    result = []
+    for day in range(days):
+        activities = []
+        for stop in range(stops):
+            slot = SLOTS[stop * len(SLOTS) // stops] if stop % 4 == 0 else None
+            activities.append(
+                {
+                    "time": slot,
+                    "title": f"Stop {stop}",
+                    "latitude": round(34.65 + rng.random() * 0.12, 6),
+                    "longitude": round(135.45 + rng.random() * 0.12, 6),
+                }
+            )
+        result.append({"day": day + 1, "activities": activities})
+    return {"days": result}
+
+
+def run(days: int, stops: int, repeat: int) -> dict[str, object]:
+    from app.services.route_optimizer import optimize_itinerary
+
+    itinerary = make_itinerary(days, stops, random.Random(days * 1000 + stops))
+    samples, routes = [], []
+    for _ in range(repeat):
+        document = copy.deepcopy(itinerary)
+        started = time.perf_counter()
+        routes = optimize_itinerary(document)
+        samples.append((time.perf_counter() - started) * 1000)
+    before = sum(route.distance_km_before for route in routes)
+    after = sum(route.distance_km_after for route in routes)
+    return {
+        "days": days,
+        "stops_per_day": stops,
+        "p50_ms": round(statistics.median(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "per_day_ms": round(statistics.median(samples) / days, 3),
+        "km_before": round(before, 1),
+        "km_after": round(after, 1),
+        "saved_pct": round((1 - after / before) * 100, 1) if before else 0.0,
+    }
+
+
+def main() -> None:
+    from app.services.route_optimizer import NUMPY_AVAILABLE
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 60, 90])
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 15, 20])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    cases = [run(days, stops, args.repeat) for days in args.days for stops in args.stops]
+    print(json.dumps({"numpy": NUMPY_AVAILABLE, "cases": cases}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Time JSON serialization of plan responses: FastAPI's response_model pass against model_response.
+
+Builds in-memory plans (no database) and encodes a single ``--days``-day plan and a listing of
+``--plans`` shorter plans both ways. "fastapi" is what the endpoints did before: ``from_orm``,
+then FastAPI validating the result against ``response_model`` again, then stdlib ``json``.
+"one_pass" is :func:`app.api.responses.model_response`. Also checks that both bodies match.
+
+Usage::
+
+    python -m benchmarks.serialization --days 30 --plans 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+
+CREATED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_plan(plan_id: int, days: int, stops: int):
+    from app.models import Expense, TravelPlan
+
+    plan = TravelPlan(
+        id=plan_id,
+        owner_id=1,
+        title=f"Kyoto {days}-Day Trip {plan_id}",
+        destination="Kyoto",
+        start_date=date(2026, 1, 1),
+        end_date=date(2026, 1, 1) + timedelta(days=days - 1),
+        duration_days=days,
+        travelers=2,
+        budget_amount=20000.0,
+        currency="CNY",
+        preferences={"interests": ["food", "temples"], "pace": "relaxed"},
+        budget_breakdown={"lines": [{"category": "food", "amount": 3000.0}, {"category": "hotel", "amount": 9000.0}]},
+        notes="Book the tea ceremony in advance.",
+        created_at=CREATED,
+        updated_at=CREATED,
+        version=1,
+        expenses_version=0,
+        expenses=[
+            Expense(
+                id=plan_id * 10 + n, plan_id=plan_id, category="food", amount=42.5, currency="CNY", incurred_at=CREATED
+            )
+            for n in range(5)
+        ],
+    )
+    plan.itinerary = {
+        "summary": "Temples, markets and day trips around Kyoto.",
+        "tips": ["Buy an ICOCA card", "Temples close early"],
+        "days": [
+            {
+                "day": day + 1,
+                "date": (date(2026, 1, 1) + timedelta(days=day)).isoformat(),
+                "headline": f"Day {day + 1} in Kyoto",
+                "activities": [
+                    {
+                        "time": "Morning" if stop == 0 else None,
+                        "title": f"Stop {stop}",
+                        "description": "Walk through the old streets and try the local snacks on the way.",
+                        "location": f"Kyoto stop {stop}",
+                        "latitude": 35.0 + stop / 100,
+                        "longitude": 135.7 + stop / 100,
+                        "estimated_cost": 120.0,
+                    }
+                    for stop in range(stops)
+                ],
+            }
+            for day in range(days)
+        ],
+    }
+    return plan
+
+
+def fastapi_body(schema, content) -> bytes:
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name="response", type_=schema)
+    data = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def timed(function, repeat: int) -> tuple[float, bytes]:
+    body = function()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), body
+
+
+def run(label: str, plans: list, single: bool, repeat: int) -> dict[str, object]:
+    from app.api.responses import model_response
+    from app.schemas.plan import TravelPlanRead
+
+    schema = TravelPlanRead if single else list[TravelPlanRead]
+
+    def legacy() -> bytes:
+        content = [TravelPlanRead.from_orm(plan) for plan in plans]
+        return fastapi_body(schema, content[0] if single else content)
+
+    def one_pass() -> bytes:
+        content = [TravelPlanRead.model_validate(plan) for plan in plans]
+        return model_response(schema, content[0] if single else content).body
+
+    legacy_ms, legacy_body = timed(legacy, repeat)
+    one_pass_ms, one_pass_body = timed(one_pass, repeat)
+    return {
+        "case": label,
+        "bytes": len(one_pass_body),
+        "fastapi_ms": round(legacy_ms, 2),
+        "one_pass_ms": round(one_pass_ms, 2),
+        "speedup": round(legacy_ms / one_pass_ms, 2),
+        "same_json": json.loads(legacy_body) == json.loads(one_pass_body),
+    }
+
+
+def main() -> None:
+    import warnings
+
+    from app.api.responses import ORJSON_AVAILABLE
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--plans", type=int, default=500)
+    parser.add_argument("--stops", type=int, default=6, help="Activities per day.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)  # from_orm, kept to measure the old path
+    cases = [
+        run(f"{args.days}-day plan", [make_plan(1, args.days, args.stops)], True, args.repeat),
+        run(
+            f"{args.plans} plans",
+            [make_plan(plan_id, 5, args.stops) for plan_id in range(1, args.plans + 1)],
+            False,
+            max(args.repeat // 4, 3),
+        ),
+    ]
+    print(json.dumps({"orjson": ORJSON_AVAILABLE, "cases": cases}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Shared fixtures: the app runs offline against a temporary SQLite database and the mock LLM.
+
+Settings are read when :mod:`app` is first imported, so the environment is set up here, before
+any test module imports it.
+"""
+import asyncio
+import itertools
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["QUERY_COUNT_HEADER"] = "true"
+os.environ["LLM_PROVIDER"] = "mock"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+_emails = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.db.init_db import init_db
+    from app.db.session import engine
+    from app.main import app
+
+    async def migrate() -> None:
+        await init_db()
+        await engine.dispose()
+
+    asyncio.run(migrate())
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization headers of a newly registered user."""
+    credentials = {"email": f"user{next(_emails)}@example.com", "password": "secret123"}
+    assert client.post("/api/v1/auth/register", json=credentials).status_code == 201
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def plan(client, auth_headers):
+    """A generated plan of the current user, as returned by the API."""
+    response = client.post(
+        "/api/v1/plans/generate",
+        headers=auth_headers,
+        json={"destination": "Kyoto", "duration_days": 3, "bypass_cache": True},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["plan"]
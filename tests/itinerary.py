@@ -0,0 +1,45 @@
+"""Itinerary data and helpers shared by the itinerary tests."""
+import json
+
+ITINERARY = {
+    "summary": "Temples and markets",
+    "tips": ["Buy an ICOCA card"],
+    "rating": 4,
+    "days": [
+        {
+            "headline": "Arrival",
+            "day": 1,
+            "date": "2026-04-01",
+            "weather": {"forecast": "sunny", "high": 21},
+            "activities": [
+                {"title": "Fushimi Inari", "time": "Morning", "latitude": 34.9671, "longitude": 135.7727},
+                {"title": "Nishiki Market", "estimated_cost": 80, "tags": ["food"], "booked": True},
+            ],
+        },
+        {"day": 2, "date": None, "activities": "to be decided"},
+        {"day": 3, "activities": [{"title": "Arashiyama", "description": None, "estimated_cost": 1.0}]},
+    ],
+}
+
+
+def exact(value) -> str:
+    """Compare JSON exactly: key order counts and 1, 1.0 and true differ."""
+    return json.dumps(value)
+
+
+def get_plan(client, headers, plan_id):
+    response = client.get(f"/api/v1/plans/{plan_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def patch_itinerary(client, headers, plan_id, operations, etag):
+    extra = {} if etag is None else {"If-Match": etag}
+    return client.patch(f"/api/v1/plans/{plan_id}/itinerary", headers={**headers, **extra}, json=operations)
+
+
+def store_itinerary(client, headers, plan_id):
+    """Replace the plan's itinerary with :data:`ITINERARY`; returns the plan's new ETag."""
+    response = client.patch(f"/api/v1/plans/{plan_id}", headers=headers, json={"itinerary": ITINERARY})
+    assert response.status_code == 200, response.text
+    return response.headers["ETag"]
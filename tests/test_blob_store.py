@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models import PlanBlob, TravelPlan
+from app.repositories.blob_repository import BlobRepository
+from app.services.blob_store import CODECS, BlobStore, compress, decompress, resolve_codec
+
+TEXT = '{"days": [' + ", ".join(f'{{"day": {day}, "title": "Temples and gardens"}}' for day in range(50)) + "]}"
+
+
+def in_session(work):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            result = await work(session)
+            await session.commit()
+            return result
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_codecs_round_trip(codec):
+    codec = resolve_codec(codec)
+    data = compress(TEXT.encode("utf-8"), codec)
+    assert decompress(data, codec).decode("utf-8") == TEXT
+    if codec != "none":
+        assert len(data) < len(TEXT) // 4
+
+
+def test_identical_texts_are_stored_once_and_incompressible_ones_as_is(client):
+    noise = os.urandom(512).hex()
+
+    async def store(session):
+        blobs = BlobStore(session)
+        digests = [await blobs.put_text(TEXT), await blobs.put_text(TEXT), await blobs.put_text(noise)]
+        rows = await session.execute(select(PlanBlob.digest, PlanBlob.codec).where(PlanBlob.digest.in_(digests)))
+        return digests, dict(rows.all()), await blobs.get_texts(digests)
+
+    digests, codecs, texts = in_session(store)
+    assert digests[0] == digests[1] == hashlib.sha256(TEXT.encode("utf-8")).hexdigest()
+    assert len(codecs) == 2
+    assert codecs[digests[0]] == resolve_codec()
+    assert texts == {digests[0]: TEXT, digests[2]: noise}
+
+
+def stored_at(digest, when):
+    statement = update(PlanBlob).where(PlanBlob.digest == digest).values(created_at=when)
+    in_session(lambda session: session.execute(statement))
+
+
+def remaining(digests):
+    async def count(session):
+        return await session.scalar(select(func.count()).select_from(PlanBlob).where(PlanBlob.digest.in_(digests)))
+
+    return in_session(count)
+
+
+def test_only_old_unreferenced_blobs_are_deleted(client, plan):
+    query = select(TravelPlan.raw_plan_digest).where(TravelPlan.id == plan["id"])
+    referenced = in_session(lambda session: session.scalar(query))
+    old, recent, revived = (
+        in_session(lambda session, n=n: BlobStore(session).put_text(f"{TEXT} {n}")) for n in range(3)
+    )
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    for digest in (referenced, old, revived):
+        stored_at(digest, hour_ago - timedelta(minutes=1))
+    # Storing the same text again restarts its grace period.
+    assert in_session(lambda session: BlobStore(session).put_text(f"{TEXT} 2")) == revived
+
+    in_session(lambda session: BlobRepository(session).delete_unreferenced(hour_ago))
+    assert remaining([old]) == 0
+    assert remaining([referenced, recent, revived]) == 3
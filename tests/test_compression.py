@@ -0,0 +1,131 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "offered", "expected"),
+    [
+        ("gzip, br", ["zstd", "br", "gzip"], "br"),
+        ("gzip;q=1.0, br;q=0.5", ["br", "gzip"], "gzip"),
+        ("br;q=0, *", ["br", "gzip"], "gzip"),
+        ("*;q=0", ["gzip"], None),
+        ("identity", ["br", "gzip"], None),
+        ("GZIP;q=bogus, br", ["gzip", "br"], "br"),
+        ("", ["gzip"], None),
+    ],
+)
+def test_negotiate(accept_encoding, offered, expected):
+    assert negotiate(accept_encoding, offered) == expected
+
+
+BODY = '{"days": ["' + "temple, market, garden, " * 200 + '"]}'
+
+
+def _json(request):
+    return Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+
+
+def _small(request):
+    return Response('{"ok": true}', media_type="application/json")
+
+
+def _events(request):
+    async def stream():
+        yield "data: " + "x" * 4096 + "\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+def _binary(request):
+    return Response(b"\x00" * 4096, media_type="application/octet-stream")
+
+
+def _not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"abc"'})
+
+
+@pytest.fixture
+def compressing_client():
+    app = Starlette(
+        routes=[
+            Route("/json", _json),
+            Route("/small", _small),
+            Route("/events", _events),
+            Route("/binary", _binary),
+            Route("/not-modified", _not_modified),
+            Route("/text", lambda request: PlainTextResponse("hello " * 1000)),
+        ]
+    )
+    return TestClient(CompressionMiddleware(app, minimum_size=1024, encodings=["gzip"]))
+
+
+def test_large_json_is_compressed_with_its_own_etag(compressing_client):
+    response = compressing_client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == '"abc-gzip"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.text == BODY
+    assert int(response.headers["Content-Length"]) < len(BODY)
+    assert response.headers["Server-Timing"].startswith("compress;dur=")
+
+
+def test_identity_keeps_the_etag_and_varies(compressing_client):
+    response = compressing_client.get("/json", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"abc"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_small_bodies_are_sent_as_is_but_still_vary(compressing_client):
+    response = compressing_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+@pytest.mark.parametrize("path", ["/events", "/binary"])
+def test_streams_and_binary_bodies_are_not_compressed(compressing_client, path):
+    response = compressing_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_not_modified_echoes_the_encoded_tag_the_client_sent(compressing_client):
+    response = compressing_client.get(
+        "/not-modified", headers={"Accept-Encoding": "gzip", "If-None-Match": '"abc-gzip"'}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"abc-gzip"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    identity = compressing_client.get(
+        "/not-modified", headers={"Accept-Encoding": "identity", "If-None-Match": '"abc"'}
+    )
+    assert identity.headers["ETag"] == '"abc"'
+
+
+def test_text_is_compressed(compressing_client):
+    response = compressing_client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == "hello " * 1000
+
+
+def test_plan_etags_validate_across_codings(client, auth_headers, plan):
+    url = f"/api/v1/plans/{plan['id']}"
+    compressed = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    etag = compressed.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    again = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+
+    identity = client.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] == etag.removesuffix('-gzip"') + '"'
+    # A tag received with the gzip body still names the same version of the plan.
+    revalidated = client.get(url, headers={**auth_headers, "Accept-Encoding": "identity", "If-None-Match": etag})
+    assert revalidated.status_code == 304
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services import currency as currency_module
+from app.services.currency import ExchangeRates, RateTable, exchange_rates, read_rate_file
+
+
+def test_rates_convert_through_the_base_currency():
+    table = RateTable("cny", {"usd": 0.14, "JPY": 20.0, "BAD": 0})
+    assert table.rate("CNY", "USD") == 0.14
+    assert table.rate("usd", "jpy") == pytest.approx(20.0 / 0.14)
+    assert table.rate("CNY", "BAD") is None  # non-positive rates are dropped
+    assert table.convert_column([100.0, 14.0, 5.0], ["CNY", "USD", "EUR"], "JPY") == [
+        pytest.approx(2000.0),
+        pytest.approx(2000.0),
+        None,
+    ]
+
+
+def test_the_version_follows_the_rates_only():
+    assert RateTable("CNY", {"USD": 0.14}).version == RateTable("cny", {"usd": 0.14}, source="file").version
+    assert RateTable("CNY", {"USD": 0.14}).version != RateTable("CNY", {"USD": 0.15}).version
+
+
+def test_rate_files(tmp_path):
+    json_file = tmp_path / "rates.json"
+    json_file.write_text('{"base": "USD", "rates": {"EUR": 0.9}}', encoding="utf-8")
+    assert read_rate_file(json_file) == ("USD", {"EUR": 0.9})
+    csv_file = tmp_path / "rates.csv"
+    csv_file.write_text("currency,per_base\nUSD,0.14\n\nJPY,20\n", encoding="utf-8")
+    assert read_rate_file(csv_file) == (None, {"USD": 0.14, "JPY": 20.0})
+
+
+def test_tables_older_than_the_interval_are_reloaded(tmp_path, monkeypatch):
+    rate_file = tmp_path / "rates.json"
+    rate_file.write_text('{"USD": 0.14}', encoding="utf-8")
+    monkeypatch.setattr(settings, "exchange_rate_file", str(rate_file))
+    monkeypatch.setattr(settings, "exchange_rate_reload_seconds", 60)
+    now = [1000.0]
+    monkeypatch.setattr(currency_module.time, "monotonic", lambda: now[0])
+    rates = ExchangeRates()
+
+    async def current():
+        return await rates.current(None)
+
+    first = asyncio.run(rates.load(None))
+    rate_file.write_text('{"USD": 0.15}', encoding="utf-8")
+    now[0] += 59
+    assert asyncio.run(current()) is first
+    now[0] += 1
+    assert asyncio.run(current()).rate("CNY", "USD") == 0.15
+    # A broken file keeps the last good table instead of failing requests.
+    rate_file.write_text("{not json", encoding="utf-8")
+    now[0] += 60
+    assert asyncio.run(current()).rate("CNY", "USD") == 0.15
+
+
+@pytest.fixture
+def usd_rate(client):
+    """Store a CNY->USD rate for the test, then put the previous rates back."""
+
+    async def replace(rates):
+        async with AsyncSessionLocal() as session:
+            await exchange_rates.replace(session, rates)
+
+    original = dict(exchange_rates.table.as_dict()["rates"])
+    asyncio.run(replace({**original, "USD": 0.125}))
+    yield
+    asyncio.run(replace(original))
+
+
+def test_summaries_convert_into_the_budget_currency_and_round(client, auth_headers, plan, usd_rate):
+    for amount, currency in ((10.0, "CNY"), (0.01, "USD"), (1.0, "USD"), (3.0, "XTS")):
+        response = client.post(
+            f"/api/v1/plans/{plan['id']}/expenses",
+            headers=auth_headers,
+            json={"category": "Food", "amount": amount, "currency": currency},
+        )
+        assert response.status_code == 201, response.text
+    result = client.get(f"/api/v1/plans/{plan['id']}/expenses/summary", headers=auth_headers).json()
+    converted = result["converted"]
+    # 10 CNY + 1.01 USD at 8 CNY per USD; XTS has no rate.
+    assert converted == {
+        "currency": "CNY",
+        "total": 18.08,
+        "count": 3,
+        "rates_version": exchange_rates.table.version,
+        "unconverted_currencies": ["XTS"],
+    }
+    food = next(line for line in result["budget"]["items"] if line["category"] == "Food")
+    assert (food["spent"], food["remaining"]) == (18.08, 581.92)
@@ -0,0 +1,62 @@
+import pytest
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def headers(auth_headers):
+    return {**auth_headers, **IDENTITY}
+
+
+def etag_of(client, headers, url):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    return response.headers["ETag"]
+
+
+def revalidate(client, headers, url, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_unchanged_resources_answer_304(client, headers, plan):
+    for url in (
+        f"/api/v1/plans/{plan['id']}",
+        "/api/v1/plans",
+        f"/api/v1/plans/{plan['id']}/expenses",
+        f"/api/v1/plans/{plan['id']}/expenses/summary",
+    ):
+        etag = etag_of(client, headers, url)
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = revalidate(client, headers, url, header)
+            assert response.status_code == 304, (url, header)
+            assert response.headers["ETag"] == etag
+            assert not response.content
+        assert revalidate(client, headers, url, '"other"').status_code == 200
+
+
+def test_expense_writes_change_the_plan_and_ledger_tags(client, headers, plan):
+    plan_url = f"/api/v1/plans/{plan['id']}"
+    urls = [plan_url, f"{plan_url}/expenses", f"{plan_url}/expenses/summary"]
+    before = [etag_of(client, headers, url) for url in urls]
+    response = client.post(f"{plan_url}/expenses", headers=headers, json={"category": "Food", "amount": 10})
+    assert response.status_code == 201
+    for url, etag in zip(urls, before):
+        assert revalidate(client, headers, url, etag).status_code == 200, url
+
+
+def test_updates_need_the_current_tag(client, headers, plan):
+    url = f"/api/v1/plans/{plan['id']}"
+    etag = etag_of(client, headers, url)
+    list_etag = etag_of(client, headers, "/api/v1/plans")
+    updated = client.patch(url, headers={**headers, "If-Match": etag}, json={"title": "Kyoto in spring"})
+    assert updated.status_code == 200, updated.text
+    new_etag = updated.headers["ETag"]
+    assert new_etag != etag
+    assert etag_of(client, headers, url) == new_etag
+    assert revalidate(client, headers, "/api/v1/plans", list_etag).status_code == 200
+
+    stale = client.patch(url, headers={**headers, "If-Match": etag}, json={"title": "Lost update"})
+    assert stale.status_code == 412
+    assert stale.headers["ETag"] == new_etag
+    assert client.get(url, headers=headers).json()["title"] == "Kyoto in spring"
@@ -0,0 +1,74 @@
+import json
+
+CSV = (
+    "category,amount,currency,note,incurred_at\n"
+    "Food,12.5,CNY,\"ramen, two bowls\",2026-04-01T12:00:00+00:00\n"
+    "Food,-3,CNY,,\n"
+    "Transport,7\n"
+    "Tickets,20,,\"a note\nover two lines\",\n"
+    "Museum,oops,CNY,,\n"
+)
+
+
+def import_expenses(client, headers, plan_id, body, content_type, **params):
+    return client.post(
+        f"/api/v1/plans/{plan_id}/expenses/import",
+        headers={**headers, "Content-Type": content_type},
+        params=params,
+        content=body.encode("utf-8"),
+    )
+
+
+def export(client, headers, plan_id, fmt):
+    response = client.get(f"/api/v1/plans/{plan_id}/expenses/export", headers=headers, params={"format": fmt})
+    assert response.status_code == 200, response.text
+    return response.text
+
+
+def test_csv_rows_are_imported_and_bad_rows_reported_by_line(client, auth_headers, plan):
+    response = import_expenses(client, auth_headers, plan["id"], CSV, "text/csv")
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 3)
+    assert [error["line"] for error in result["errors"]] == [3, 4, 7]
+    assert result["errors"][1]["message"] == "expected 5 columns, got 2"
+    assert result["errors"][0]["message"].startswith("amount:")
+
+    rows = export(client, auth_headers, plan["id"], "csv").splitlines()
+    assert rows[0] == "id,category,amount,currency,note,incurred_at"
+    # Newest first; the Tickets row had no date and was stamped with the import time.
+    assert [row.split(",")[1] for row in rows[1:] if row[:1].isdigit()] == ["Tickets", "Food"]
+    assert '"a note' in export(client, auth_headers, plan["id"], "csv")
+
+
+def test_ndjson_round_trips(client, auth_headers, plan):
+    body = "\n".join(
+        [
+            json.dumps({"category": "Food", "amount": 12.5, "currency": "JPY", "note": "寿司"}),
+            "",
+            "{not json",
+            json.dumps(["Food", 1]),
+            json.dumps({"category": "Transport", "amount": 3}),
+        ]
+    )
+    result = import_expenses(client, auth_headers, plan["id"], body, "application/x-ndjson").json()
+    assert (result["imported"], result["failed"]) == (2, 2)
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+    assert result["errors"][0]["message"].startswith("invalid JSON")
+    assert result["errors"][1]["message"] == "expected a JSON object"
+    exported = [json.loads(line) for line in export(client, auth_headers, plan["id"], "ndjson").splitlines()]
+    assert sorted((row["category"], row["amount"], row["currency"], row["note"]) for row in exported) == [
+        ("Food", 12.5, "JPY", "寿司"),
+        ("Transport", 3.0, "CNY", None),
+    ]
+
+
+def test_an_atomic_import_with_a_bad_row_imports_nothing(client, auth_headers, plan):
+    result = import_expenses(client, auth_headers, plan["id"], CSV, "text/csv", atomic="true").json()
+    assert (result["imported"], result["failed"]) == (0, 3)
+    assert export(client, auth_headers, plan["id"], "ndjson") == ""
+
+
+def test_unknown_formats_are_refused(client, auth_headers, plan):
+    response = import_expenses(client, auth_headers, plan["id"], "<xml/>", "application/xml")
+    assert response.status_code == 415
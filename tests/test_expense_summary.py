@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.db.session import AsyncSessionLocal
+from app.repositories.expense_repository import ExpenseRepository
+from app.repositories.plan_repository import TravelPlanRepository
+
+
+def summary(client, headers, plan_id):
+    response = client.get(f"/api/v1/plans/{plan_id}/expenses/summary", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def add_expense_elsewhere(plan_id, amount):
+    """Record an expense the way another worker would: through the database, not this process's cache."""
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            await ExpenseRepository(session).create_for_plan(
+                plan_id,
+                category="food",
+                amount=amount,
+                currency="CNY",
+                note=None,
+                incurred_at=datetime.now(timezone.utc),
+            )
+            await TravelPlanRepository(session).bump_expenses_version(plan_id)
+            await session.commit()
+
+    asyncio.run(run())
+
+
+def test_cached_ledgers_follow_writes_from_other_workers(client, auth_headers, plan):
+    assert summary(client, auth_headers, plan["id"])["expense_count"] == 0
+    add_expense_elsewhere(plan["id"], 120.0)
+    after = summary(client, auth_headers, plan["id"])
+    assert after["expense_count"] == 1
+    assert after["by_currency"] == [{"currency": "CNY", "total": 120.0, "count": 1}]
+
+
+def add(client, headers, plan_id, category, amount, currency, day):
+    expense = {"category": category, "amount": amount, "currency": currency, "incurred_at": f"{day}T12:00:00Z"}
+    response = client.post(f"/api/v1/plans/{plan_id}/expenses", headers=headers, json=expense)
+    assert response.status_code == 201, response.text
+
+
+def test_totals_by_currency_category_and_day(client, auth_headers, plan):
+    add(client, auth_headers, plan["id"], "Food", 12.5, "CNY", "2026-04-01")
+    add(client, auth_headers, plan["id"], "Food", 30.25, "CNY", "2026-04-02")
+    add(client, auth_headers, plan["id"], "Transport", 7.5, "CNY", "2026-04-01")
+    add(client, auth_headers, plan["id"], "Transport", 8, "XTS", "2026-04-02")
+    result = summary(client, auth_headers, plan["id"])
+    assert result["expense_count"] == 4
+    assert result["by_currency"] == [
+        {"currency": "CNY", "total": 50.25, "count": 3},
+        {"currency": "XTS", "total": 8.0, "count": 1},
+    ]
+    assert result["by_category"] == [
+        {"category": "Food", "currency": "CNY", "total": 42.75, "count": 2},
+        {"category": "Transport", "currency": "XTS", "total": 8.0, "count": 1},
+        {"category": "Transport", "currency": "CNY", "total": 7.5, "count": 1},
+    ]
+    assert result["by_day"] == [
+        {"day": "2026-04-01", "currency": "CNY", "total": 20.0, "count": 2},
+        {"day": "2026-04-02", "currency": "CNY", "total": 30.25, "count": 1},
+        {"day": "2026-04-02", "currency": "XTS", "total": 8.0, "count": 1},
+    ]
+    # A currency without a rate is reported instead of being added to the plan's currency as is.
+    assert result["converted"]["total"] == 50.25
+    assert result["converted"]["unconverted_currencies"] == ["XTS"]
+
+
+def test_spending_is_compared_with_the_budget_by_category(client, auth_headers, plan):
+    add(client, auth_headers, plan["id"], "food", 100, "CNY", "2026-04-01")
+    add(client, auth_headers, plan["id"], "Souvenirs", 40, "CNY", "2026-04-01")
+    budget = summary(client, auth_headers, plan["id"])["budget"]
+    assert (budget["currency"], budget["planned"], budget["spent"], budget["remaining"]) == ("CNY", 3000.0, 140.0, 2860.0)
+    lines = {line["category"]: line for line in budget["items"]}
+    assert lines["Food"] == {"category": "Food", "planned": 600.0, "spent": 100.0, "remaining": 500.0}
+    assert lines["Souvenirs"] == {"category": "Souvenirs", "planned": None, "spent": 40.0, "remaining": None}
+    assert lines["Accommodation"]["spent"] == 0.0
+
+
+def test_summaries_of_other_users_plans_are_not_found(client, auth_headers, plan):
+    intruder = client.post("/api/v1/auth/register", json={"email": "intruder@example.com", "password": "secret123"})
+    assert intruder.status_code == 201
+    token = client.post(
+        "/api/v1/auth/login", json={"email": "intruder@example.com", "password": "secret123"}
+    ).json()["access_token"]
+    response = client.get(
+        f"/api/v1/plans/{plan['id']}/expenses/summary", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
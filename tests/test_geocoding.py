@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.db.session import AsyncSessionLocal
+from app.services.geocoding import GeocodeResult, Geocoder, GeocodingError, LocalGeocoder, normalize_address
+
+
+def test_addresses_are_folded_and_scoped_to_the_city():
+    assert normalize_address("  Fushimi-Inari   Taisha！", "Kyoto") == "fushimi inari taisha | kyoto"
+    assert normalize_address("ＫＹＯＴＯ Station", "kyoto") == "kyoto station"
+    assert normalize_address("Old Town", "Lisbon") != normalize_address("Old Town", "Prague")
+
+
+class CountingProvider:
+    """Answers like the local geocoder, counting calls; some addresses are unknown or fail."""
+
+    def __init__(self) -> None:
+        self.name = f"test-{uuid.uuid4().hex[:8]}"
+        self.calls: list[str] = []
+        self.failing = {"flaky pier"}
+
+    async def geocode(self, address: str, city: str | None) -> GeocodeResult | None:
+        self.calls.append(address)
+        await asyncio.sleep(0.01)
+        if address in self.failing:
+            raise GeocodingError("quota exceeded")
+        if address == "nowhere":
+            return None
+        return await LocalGeocoder().geocode(address, city)
+
+
+@pytest.fixture
+def provider(client):
+    return CountingProvider()
+
+
+def resolve(geocoder, queries):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            results = await geocoder.resolve(session, queries)
+            await session.commit()
+            return results
+
+    return asyncio.run(run())
+
+
+def test_each_address_is_looked_up_once_across_the_cache_tiers(provider):
+    queries = [("Kinkaku-ji", "Kyoto"), ("kinkaku ji", "Kyoto"), ("nowhere", "Kyoto"), ("flaky pier", "Kyoto")]
+    geocoder = Geocoder(provider)
+    first = resolve(geocoder, queries)
+    assert sorted(provider.calls) == ["flaky pier", "kinkaku ji", "nowhere"]
+    temple = normalize_address("Kinkaku-ji", "Kyoto")
+    assert isinstance(first[temple], GeocodeResult)
+    assert first[normalize_address("nowhere", "Kyoto")] is None  # known to have no match
+    assert normalize_address("flaky pier", "Kyoto") not in first  # failed, so not cached
+    assert geocoder.failures == 1
+
+    provider.calls.clear()
+    provider.failing.clear()
+    assert resolve(geocoder, queries)[temple] == first[temple]
+    assert provider.calls == ["flaky pier"]
+
+    # A new process starts with an empty memory tier but finds the stored results.
+    provider.calls.clear()
+    restarted = Geocoder(provider)
+    assert resolve(restarted, queries)[temple] == first[temple]
+    assert provider.calls == []
+    assert restarted.db_hits == 3
+
+
+def test_itineraries_get_coordinates_for_named_locations(provider):
+    itinerary = {
+        "days": [
+            {
+                "activities": [
+                    {"title": "Temple", "location": "Kiyomizu-dera"},
+                    {"title": "Lunch", "location": "nowhere"},
+                    {"title": "Walk", "location": "Gion", "latitude": 1.0, "longitude": 2.0},
+                    {"title": "Rest"},
+                ]
+            }
+        ]
+    }
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return await Geocoder(provider).fill_itinerary(session, itinerary, "Kyoto")
+
+    assert asyncio.run(run()) == 1
+    temple, lunch, walk, rest = itinerary["days"][0]["activities"]
+    assert temple["latitude"] is not None and temple["longitude"] is not None
+    assert "latitude" not in lunch and "latitude" not in rest
+    assert (walk["latitude"], walk["longitude"]) == (1.0, 2.0)
+    assert sorted(provider.calls) == ["Kiyomizu-dera", "nowhere"]
@@ -0,0 +1,37 @@
+import pytest
+
+from app.core.config import settings
+from app.services.currency import exchange_rates
+
+TOKEN = "internal-secret"
+
+
+@pytest.fixture
+def rates(client):
+    """Restore the rate table a test replaces."""
+    original = {code: rate for code, rate in exchange_rates.table.as_dict()["rates"].items()}
+    yield {**original, "JPY": 20.0}
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "internal_stats_token", TOKEN)
+        restored = client.put(
+            "/api/v1/internal/exchange-rates", headers={"X-Internal-Token": TOKEN}, json={"rates": original}
+        )
+        assert restored.status_code == 200, restored.text
+
+
+def test_writes_are_refused_without_a_configured_token(client, rates, monkeypatch):
+    monkeypatch.setattr(settings, "internal_stats_token", None)
+    for headers in ({}, {"X-Internal-Token": ""}, {"X-Internal-Token": "anything"}):
+        response = client.put("/api/v1/internal/exchange-rates", headers=headers, json={"rates": rates})
+        assert response.status_code == 403
+    # Read-only routes stay open outside production.
+    assert client.get("/api/v1/internal/stats").status_code == 200
+
+
+def test_writes_need_the_configured_token(client, rates, monkeypatch):
+    monkeypatch.setattr(settings, "internal_stats_token", TOKEN)
+    wrong = client.put("/api/v1/internal/exchange-rates", headers={"X-Internal-Token": "guess"}, json={"rates": rates})
+    assert wrong.status_code == 403
+    response = client.put("/api/v1/internal/exchange-rates", headers={"X-Internal-Token": TOKEN}, json={"rates": rates})
+    assert response.status_code == 200, response.text
+    assert response.json()["rates"]["JPY"] == 20.0
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from .itinerary import ITINERARY, exact, get_plan, patch_itinerary, store_itinerary
+
+
+@pytest.fixture
+def stored(client, auth_headers, plan):
+    """The plan with :data:`ITINERARY` stored in it, and its current ETag."""
+    return plan["id"], store_itinerary(client, auth_headers, plan["id"])
+
+
+def test_move_returns_only_the_changed_fragment(client, auth_headers, stored):
+    plan_id, etag = stored
+    response = patch_itinerary(
+        client,
+        auth_headers,
+        plan_id,
+        [{"op": "move", "from": "/days/0/activities/1", "path": "/days/2/activities/0"}],
+        etag,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "changes": [
+            {
+                "op": "move",
+                "from": "/days/0/activities/1",
+                "path": "/days/2/activities/0",
+                "value": ITINERARY["days"][0]["activities"][1],
+            }
+        ]
+    }
+    assert response.headers["ETag"] != etag
+
+    expected = json.loads(json.dumps(ITINERARY))
+    expected["days"][2]["activities"].insert(0, expected["days"][0]["activities"].pop(1))
+    assert exact(get_plan(client, auth_headers, plan_id).json()["itinerary"]) == exact(expected)
+
+
+def test_patch_requires_if_match(client, auth_headers, stored):
+    plan_id, _ = stored
+    response = patch_itinerary(client, auth_headers, plan_id, [{"op": "remove", "path": "/tips"}], None)
+    assert response.status_code == 428
+
+
+def test_patch_with_a_stale_etag_is_rejected(client, auth_headers, stored):
+    plan_id, etag = stored
+    first = patch_itinerary(client, auth_headers, plan_id, [{"op": "remove", "path": "/tips"}], etag)
+    assert first.status_code == 200, first.text
+    second = patch_itinerary(client, auth_headers, plan_id, [{"op": "remove", "path": "/summary"}], etag)
+    assert second.status_code == 412
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert get_plan(client, auth_headers, plan_id).json()["itinerary"]["summary"] == ITINERARY["summary"]
+
+
+@pytest.mark.parametrize(
+    ("operations", "status_code"),
+    [
+        ([{"op": "test", "path": "/rating", "value": 3}, {"op": "remove", "path": "/days/0"}], 409),
+        # Applied in order: the first operation must not survive the failing second one.
+        ([{"op": "remove", "path": "/days/0"}, {"op": "remove", "path": "/days/9"}], 422),
+        ([{"op": "replace", "path": "", "value": {}}], 422),
+        ([{"op": "move", "from": "/days/0", "path": "/days/0/activities/0"}], 422),
+    ],
+)
+def test_failed_patches_change_nothing(client, auth_headers, stored, operations, status_code):
+    plan_id, etag = stored
+    response = patch_itinerary(client, auth_headers, plan_id, operations, etag)
+    assert response.status_code == status_code, response.text
+    assert exact(get_plan(client, auth_headers, plan_id).json()["itinerary"]) == exact(ITINERARY)
+
+
+def test_test_operations_compare_json_values(client, auth_headers, stored):
+    plan_id, etag = stored
+    booked = [{"op": "test", "path": "/days/0/activities/1/booked", "value": 1}]
+    assert patch_itinerary(client, auth_headers, plan_id, booked, etag).status_code == 409
+    market = {**ITINERARY["days"][0]["activities"][1], "estimated_cost": 80.0}
+    cost = [{"op": "test", "path": "/days/0/activities/1", "value": market}]
+    assert patch_itinerary(client, auth_headers, plan_id, cost, etag).status_code == 200
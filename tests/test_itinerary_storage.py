@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from .itinerary import ITINERARY, exact, get_plan, patch_itinerary, store_itinerary
+
+
+@pytest.fixture
+def stored(client, auth_headers, plan):
+    """The plan with :data:`ITINERARY` stored in it, and its current ETag."""
+    return plan["id"], store_itinerary(client, auth_headers, plan["id"])
+
+
+def test_itinerary_reads_back_exactly_as_written(client, auth_headers, stored):
+    plan_id, _ = stored
+    assert exact(get_plan(client, auth_headers, plan_id).json()["itinerary"]) == exact(ITINERARY)
+
+
+def test_activities_are_queryable_rows(client, auth_headers, stored):
+    plan_id, _ = stored
+    response = client.get("/api/v1/plans/activities", headers=auth_headers, params={"date": "2026-04-01"})
+    assert response.status_code == 200, response.text
+    assert [(a["plan_id"], a["title"]) for a in response.json()] == [
+        (plan_id, "Fushimi Inari"),
+        (plan_id, "Nishiki Market"),
+    ]
+
+
+def test_edits_leave_the_rest_of_the_document_untouched(client, auth_headers, stored):
+    plan_id, etag = stored
+    operations = [
+        {"op": "replace", "path": "/days/0/activities/0/title", "value": "Fushimi Inari Taisha"},
+        {"op": "add", "path": "/days/1/activities", "value": [{"title": "Kiyomizu-dera"}]},
+        {"op": "remove", "path": "/days/2"},
+        {"op": "copy", "from": "/days/0/weather", "path": "/days/1/weather"},
+        {"op": "replace", "path": "/rating", "value": 5},
+    ]
+    response = patch_itinerary(client, auth_headers, plan_id, operations, etag)
+    assert response.status_code == 200, response.text
+
+    expected = json.loads(json.dumps(ITINERARY))
+    expected["days"][0]["activities"][0]["title"] = "Fushimi Inari Taisha"
+    expected["days"][1]["activities"] = [{"title": "Kiyomizu-dera"}]
+    del expected["days"][2]
+    expected["days"][1]["weather"] = expected["days"][0]["weather"]
+    expected["rating"] = 5
+    assert exact(get_plan(client, auth_headers, plan_id).json()["itinerary"]) == exact(expected)
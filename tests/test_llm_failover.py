@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.schemas.plan import PlanIntent
+from app.services import provider_health as health_module
+from app.services.llm_client import LLMClient, LLMClientError, LLMProviderUnavailable
+from app.services.provider_health import CircuitBreaker, ProviderHealthRegistry, provider_health
+
+INTENT = PlanIntent(destination="Kyoto", duration_days=1)
+
+
+@pytest.fixture
+def openai_with_fallback(monkeypatch):
+    """An OpenAI client with its own key (so its own breaker) that falls back to the mock provider."""
+    monkeypatch.setattr(settings, "llm_fallback_providers", ["mock"])
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    monkeypatch.setattr(settings, "llm_breaker_failure_threshold", 1)
+    return LLMClient(provider="openai", api_key=f"sk-{uuid.uuid4()}")
+
+
+def fail_openai_stream(monkeypatch, chunks_before_failure):
+    original = LLMClient._stream_once
+
+    async def stream_once(self, intent):
+        if self.provider != "openai":
+            async for chunk in original(self, intent):
+                yield chunk
+            return
+        for chunk in chunks_before_failure:
+            yield chunk
+        raise LLMProviderUnavailable("openai returned 503")
+
+    monkeypatch.setattr(LLMClient, "_stream_once", stream_once)
+
+
+def collect(client):
+    async def run():
+        return [chunk async for chunk in client.stream_plan(INTENT)]
+
+    return asyncio.run(run())
+
+
+def test_a_stream_that_fails_before_its_first_chunk_falls_back(openai_with_fallback, monkeypatch):
+    fail_openai_stream(monkeypatch, [])
+    text = "".join(collect(openai_with_fallback))
+    assert '"days"' in text
+    assert openai_with_fallback.served_by == "mock"
+    assert openai_with_fallback._health().breaker.state == "open"
+
+
+def test_a_stream_that_fails_after_its_first_chunk_does_not_fall_back(openai_with_fallback, monkeypatch):
+    fail_openai_stream(monkeypatch, ['{"title": '])
+    received = []
+
+    async def run():
+        async for chunk in openai_with_fallback.stream_plan(INTENT):
+            received.append(chunk)
+
+    with pytest.raises(LLMClientError, match="503"):
+        asyncio.run(run())
+    # Mixing a second provider's output into the first one's half-sent plan would corrupt it.
+    assert received == ['{"title": ']
+    assert openai_with_fallback.served_by is None
+
+
+def test_an_open_breaker_fails_fast_then_lets_one_trial_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(health_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    now[0] += 30
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_health_is_tracked_per_endpoint_and_key():
+    registry = ProviderHealthRegistry(max_tracked=2)
+    configured = registry.get("openai", "https://api.openai.com/v1", "sk-configured")
+    configured.breaker.record_failure()
+    assert registry.get("openai", "https://api.openai.com/v1", "sk-configured") is configured
+    assert registry.get("openai", "https://api.openai.com/v1", "sk-user") is not configured
+    assert registry.get("openai", "https://proxy.example.com/v1", "sk-configured") is not configured
+    # Only the most recently used combinations are kept, and keys never appear in the stats.
+    assert len(registry.stats()) == 2
+    assert not any("sk-" in label for label in registry.stats())
+
+
+def test_an_unhealthy_provider_is_skipped_for_the_fallback(openai_with_fallback, monkeypatch):
+    async def unavailable(self, intent):
+        raise LLMProviderUnavailable("openai returned 503")
+
+    monkeypatch.setattr(LLMClient, "_openai_plan", unavailable)
+    assert asyncio.run(openai_with_fallback.generate_plan(INTENT))["days"]
+    health = provider_health.get("openai", openai_with_fallback.default_endpoint, openai_with_fallback.api_key)
+    assert health.breaker.state == "open"
+    requests = health.counters["requests"]
+    assert asyncio.run(openai_with_fallback.generate_plan(INTENT))["days"]
+    assert health.counters["requests"] == requests
+    assert health.counters["short_circuited"] == 1
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import text
+
+from app.db.engine import build_engine
+from app.db.migrations import (
+    MigrationError,
+    SchemaOutOfDateError,
+    check_schema,
+    current_revision,
+    downgrade,
+    head_revision,
+    load_revisions,
+    upgrade,
+)
+
+REVISIONS = [module.revision for module in load_revisions()]
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite+aiosqlite:///{tmp_path}/migrations.db"
+
+
+def migrate(database_url, scenario):
+    async def run():
+        engine = build_engine(database_url)
+        try:
+            return await scenario(engine)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_upgrade_applies_every_revision_once(database_url):
+    async def scenario(engine):
+        assert await upgrade(engine) == REVISIONS
+        assert await upgrade(engine) == []
+        return await check_schema(engine)
+
+    assert migrate(database_url, scenario) == head_revision() == REVISIONS[-1]
+
+
+def test_concurrent_upgrades_apply_each_revision_once(database_url):
+    async def scenario(engine):
+        engines = [build_engine(database_url) for _ in range(4)]
+        try:
+            applied = await asyncio.gather(*(upgrade(other) for other in engines))
+        finally:
+            for other in engines:
+                await other.dispose()
+        return applied, await current_revision(engine)
+
+    applied, current = migrate(database_url, scenario)
+    assert sorted(revision for revisions in applied for revision in revisions) == sorted(REVISIONS)
+    assert current == REVISIONS[-1]
+
+
+def test_downgrade_and_upgrade_again(database_url):
+    async def scenario(engine):
+        await upgrade(engine)
+        assert await downgrade(engine, "-1") == REVISIONS[-1:]
+        with pytest.raises(SchemaOutOfDateError):
+            await check_schema(engine)
+        with pytest.raises(MigrationError):
+            await upgrade(engine, REVISIONS[0])
+        assert await downgrade(engine, "base") == REVISIONS[-2::-1]
+        assert await current_revision(engine) is None
+        assert await upgrade(engine) == REVISIONS
+
+    migrate(database_url, scenario)
+
+
+def test_upgrade_adopts_a_database_built_by_create_all(database_url):
+    itinerary = {
+        "summary": "Temples",
+        "days": [
+            {"day": 1, "date": "2026-04-01", "activities": [{"title": "Fushimi Inari", "estimated_cost": 0}]},
+            {"day": 2, "activities": []},
+        ],
+    }
+
+    async def scenario(engine):
+        await upgrade(engine)
+        # What a database from before migrations looks like: the tables, days embedded in the
+        # itinerary JSON, no search document and no schema_version.
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO user (id, email, hashed_password, created_at, updated_at) "
+                    "VALUES (1, 'legacy@example.com', 'x', '2026-01-01', '2026-01-01')"
+                )
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO travelplan (id, owner_id, title, destination, duration_days, travelers, "
+                    "currency, itinerary, created_at, updated_at) "
+                    "VALUES (1, 1, 'Kyoto', 'Kyoto', 2, 1, 'CNY', :itinerary, '2026-01-01', '2026-01-01')"
+                ),
+                {"itinerary": json.dumps(itinerary)},
+            )
+            await conn.execute(text("DELETE FROM plansearch"))
+            await conn.execute(text("DROP TABLE schema_version"))
+        assert await upgrade(engine) == REVISIONS
+        async with engine.connect() as conn:
+            days = await conn.scalar(text("SELECT count(*) FROM itineraryday WHERE plan_id = 1"))
+            items = await conn.scalar(text("SELECT count(*) FROM itineraryitem WHERE plan_id = 1"))
+            meta = await conn.scalar(text("SELECT itinerary FROM travelplan WHERE id = 1"))
+            indexed = await conn.scalar(text("SELECT count(*) FROM plansearch WHERE rowid = 1"))
+        return days, items, json.loads(meta), indexed
+
+    assert migrate(database_url, scenario) == (2, 1, {"summary": "Temples"}, 1)
@@ -0,0 +1,72 @@
+import asyncio
+import datetime as dt
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+from app.db.session import AsyncSessionLocal
+from app.schemas.plan import PlanIntent
+from app.services.plan_cache import PlanCache, plan_cache_key
+
+
+def key(provider="mock", model="m", endpoint=None, **fields):
+    return plan_cache_key(PlanIntent(**{"destination": "Kyoto", **fields}), provider, model, endpoint)
+
+
+def test_equivalent_intents_share_a_key():
+    messy = key(destination="  Kyoto ", currency="jpy", interests=["Temples", "food"], travel_style="Slow, relaxed")
+    tidy = key(
+        destination="kyoto", currency="JPY", interests=["food", "temples", " temples"], travel_style=["relaxed", "slow"]
+    )
+    assert messy == tidy
+    # Only the length of the trip matters, not its dates.
+    assert key(start_date=dt.date(2026, 4, 1), end_date=dt.date(2026, 4, 3)) == key(duration_days=3)
+
+
+def test_anything_that_shapes_the_output_changes_the_key():
+    base = key(duration_days=3)
+    others = [key(duration_days=4), key(duration_days=3, budget_amount=5000), key(duration_days=3, model="n")]
+    assert len({base, *others}) == 4
+    assert base != key(duration_days=3, endpoint="https://proxy.example.com/v1")
+    assert base != key(destination="Osaka", duration_days=3)
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache(2, ttl=60)
+    cache.set("a", 1)
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache: TTLCache[str, int] = TTLCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_cached_payloads_survive_a_restart_and_are_copies(client):
+    payload = {"days": [{"day": 1, "activities": [{"title": "Fushimi Inari"}]}]}
+    cache_key = key(duration_days=1, custom_request="cache-test")
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            await PlanCache().set(session, cache_key, payload, provider="mock", model="m")
+            await session.commit()
+        payload["days"].clear()  # the caller's object is not the cached one
+        restarted = PlanCache()  # an empty memory tier, as in a new process
+        async with AsyncSessionLocal() as session:
+            first = await restarted.get(session, cache_key)
+            first["days"][0]["activities"].clear()
+            second = await restarted.get(session, cache_key)
+        return restarted, second
+
+    restarted, cached = asyncio.run(run())
+    assert cached == {"days": [{"day": 1, "activities": [{"title": "Fushimi Inari"}]}]}
+    assert restarted.db_hits == 1
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.db.session import AsyncSessionLocal
+from app.models import PlanJob
+from app.repositories.plan_job_repository import PlanJobRepository, new_lease_token
+from app.services.planning_service import PlanningService
+
+LEASE_SECONDS = 300.0
+
+
+def in_session(work):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            result = await work(PlanJobRepository(session))
+            await session.commit()
+            return result
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def owner_id(client, auth_headers):
+    return client.get("/api/v1/users/me", headers=auth_headers).json()["id"]
+
+
+@pytest.fixture
+def job(owner_id):
+    """A queued job leased to a worker that is alive: ``(job_id, lease_token)``."""
+    token = new_lease_token()
+
+    async def create(repo):
+        created = await repo.create_for_user(
+            owner_id, provider="mock", request={"destination": "Kyoto"}, requires_api_key=True, lease_token=token
+        )
+        return created.id
+
+    return in_session(create), token
+
+
+def expire(job_id):
+    async def age(repo):
+        stale = datetime.now(timezone.utc) - timedelta(seconds=LEASE_SECONDS + 1)
+        await repo.session.execute(update(PlanJob).where(PlanJob.id == job_id).values(heartbeat_at=stale))
+
+    in_session(age)
+
+
+def taken_over():
+    return in_session(lambda repo: repo.take_over_expired(LEASE_SECONDS))
+
+
+def test_jobs_held_by_a_live_worker_are_not_taken_over(job):
+    job_id, _ = job
+    assert job_id not in taken_over()
+
+
+def test_renewing_keeps_the_lease(job):
+    job_id, token = job
+    expire(job_id)
+    in_session(lambda repo: repo.renew({job_id: token}))
+    assert job_id not in taken_over()
+
+
+def test_an_expired_lease_moves_to_the_new_worker(job):
+    job_id, old_token = job
+    expire(job_id)
+    new_token = taken_over()[job_id]
+    assert new_token != old_token
+    assert job_id not in taken_over()
+
+    # The previous holder can neither run nor finish the job any more.
+    assert not in_session(lambda repo: repo.claim(job_id, old_token))
+    assert not in_session(lambda repo: repo.finish(job_id, old_token, error="lost"))
+    assert in_session(lambda repo: repo.claim(job_id, new_token))
+    assert in_session(lambda repo: repo.finish(job_id, new_token, plan_id=None))
+    assert in_session(lambda repo: repo.get(job_id)).status == "succeeded"
+
+
+def test_a_running_job_whose_worker_died_is_requeued(job):
+    job_id, token = job
+    assert in_session(lambda repo: repo.claim(job_id, token))
+    assert job_id not in taken_over()
+    expire(job_id)
+    assert job_id in taken_over()
+    assert in_session(lambda repo: repo.get(job_id)).status == "queued"
+
+
+def run_job(client, headers):
+    """Submit an async generation and wait for it; returns the job's URL and final state."""
+    response = client.post(
+        "/api/v1/plans/generate",
+        headers=headers,
+        params={"async": "true"},
+        json={"destination": "Osaka", "duration_days": 2, "bypass_cache": True},
+    )
+    assert response.status_code == 202, response.text
+    location = response.headers["Location"]
+    deadline = time.monotonic() + 10
+    while (job := client.get(location, headers=headers).json())["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline, job
+        time.sleep(0.05)
+    return location, job
+
+
+def test_async_generation_completes(client, auth_headers):
+    location, job = run_job(client, auth_headers)
+    assert job["status"] == "succeeded", job
+    result = client.get(f"{location}/result", headers=auth_headers)
+    assert result.status_code == 200, result.text
+    assert result.json()["id"] == job["plan_id"]
+
+
+def test_failures_are_reported_without_internals(client, auth_headers, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise RuntimeError("database at /srv/secret.db is locked")
+
+    monkeypatch.setattr(PlanningService, "save_generated_plan", broken)
+    location, job = run_job(client, auth_headers)
+    assert job["status"] == "failed"
+    assert job["error"] == "Failed to save plan"
+    result = client.get(f"{location}/result", headers=auth_headers)
+    assert result.status_code == 502
+    assert result.json()["detail"] == "Failed to save plan"
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.db.session import AsyncSessionLocal
+from app.models import TravelPlan
+
+
+def generate(client, headers, destination):
+    response = client.post(
+        "/api/v1/plans/generate",
+        headers=headers,
+        json={"destination": destination, "duration_days": 1, "bypass_cache": True},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["plan"]["id"]
+
+
+@pytest.fixture
+def plan_ids(client, auth_headers):
+    """Five plans created in the same second, so their created_at values tie."""
+    ids = [generate(client, auth_headers, f"City {number}") for number in range(5)]
+
+    same_time = datetime(2026, 4, 1, 9, tzinfo=timezone.utc)
+
+    async def tie():
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(TravelPlan).where(TravelPlan.id.in_(ids)).values(created_at=same_time))
+            await session.commit()
+
+    asyncio.run(tie())
+    return ids
+
+
+def pages(client, headers, **params):
+    cursor = None
+    while True:
+        query = {**params, "cursor": cursor} if cursor else params
+        response = client.get("/api/v1/plans", headers=headers, params=query)
+        assert response.status_code == 200, response.text
+        yield response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return
+
+
+def test_pages_cover_tied_plans_exactly_once(client, auth_headers, plan_ids):
+    seen = [[plan["id"] for plan in page] for page in pages(client, auth_headers, limit=2)]
+    assert [len(page) for page in seen] == [2, 2, 1]
+    assert [plan_id for page in seen for plan_id in page] == sorted(plan_ids, reverse=True)
+
+
+def test_plans_created_while_paging_do_not_shift_later_pages(client, auth_headers, plan_ids):
+    walk = pages(client, auth_headers, limit=2)
+    first = [plan["id"] for plan in next(walk)]
+    newer = generate(client, auth_headers, "Late addition")
+    rest = [plan["id"] for page in walk for plan in page]
+    assert newer not in first + rest
+    assert first + rest == sorted(plan_ids, reverse=True)
+
+
+def test_the_summary_view_leaves_out_the_heavy_fields(client, auth_headers, plan_ids):
+    (page,) = pages(client, auth_headers, view="summary")
+    assert [plan["id"] for plan in page] == sorted(plan_ids, reverse=True)
+    assert not {"itinerary", "budget_breakdown", "expenses"} & set(page[0])
+    assert page[0]["expense_count"] == 0
+
+
+def test_malformed_cursors_are_rejected(client, auth_headers):
+    response = client.get("/api/v1/plans", headers=auth_headers, params={"limit": 2, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
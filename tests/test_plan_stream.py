@@ -0,0 +1,86 @@
+import json
+
+from app.services.plan_stream import IncrementalPlanParser
+from app.services.planning_service import PlanningService
+
+DOCUMENT = {
+    "title": "Kyoto {in} \"spring\"",
+    "days": [
+        {"day": 1, "activities": [{"title": "Fushimi Inari", "notes": "go early ]}"}]},
+        {"day": 2, "activities": []},
+    ],
+    "budget": {"total": 5000},
+    "tips": ["Buy an ICOCA card"],
+}
+
+
+def parse(text, chunk_size):
+    parser = IncrementalPlanParser()
+    events = []
+    for start in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[start:start + chunk_size]))
+    return parser, events
+
+
+def test_sections_are_emitted_as_soon_as_they_are_complete():
+    text = "```json\n" + json.dumps(DOCUMENT) + "\n```"
+    expected = [
+        ("field", ("title", DOCUMENT["title"])),
+        ("day", DOCUMENT["days"][0]),
+        ("day", DOCUMENT["days"][1]),
+        ("field", ("days", DOCUMENT["days"])),
+        ("field", ("budget", DOCUMENT["budget"])),
+        ("field", ("tips", DOCUMENT["tips"])),
+    ]
+    for chunk_size in (1, 7, len(text)):
+        parser, events = parse(text, chunk_size)
+        assert events == expected
+        assert parser.completed
+        assert json.loads(parser.document) == DOCUMENT
+
+
+def test_a_day_is_emitted_before_the_rest_of_the_document_arrives():
+    text = json.dumps(DOCUMENT)
+    cut = text.index('{"day": 2')
+    parser = IncrementalPlanParser()
+    assert ("day", DOCUMENT["days"][0]) in parser.feed(text[:cut])
+    assert not parser.completed
+
+
+def events(response):
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def stream(client, headers):
+    return client.post(
+        "/api/v1/plans/generate/stream",
+        headers=headers,
+        json={"destination": "Nara", "duration_days": 2, "bypass_cache": True},
+    )
+
+
+def test_stream_sends_each_day_then_the_saved_plan(client, auth_headers):
+    response = stream(client, auth_headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+    sent = events(response)
+    assert [event for event, _ in sent].count("day") == 2
+    event, plan = sent[-1]
+    assert event == "plan"
+    assert [day["day"] for day in plan["itinerary"]["days"]] == [1, 2]
+    assert client.get(f"/api/v1/plans/{plan['id']}", headers=auth_headers).status_code == 200
+
+
+def test_unexpected_failures_end_the_stream_with_a_generic_error(client, auth_headers, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise RuntimeError("database at /srv/secret.db is locked")
+
+    monkeypatch.setattr(PlanningService, "save_generated_plan", broken)
+    response = stream(client, auth_headers)
+    assert response.status_code == 200
+    assert events(response)[-1] == ("error", {"status_code": 500, "detail": "Plan generation failed"})
+    assert "secret" not in response.text
@@ -0,0 +1,19 @@
+import asyncio
+
+from benchmarks.query_budget import QUERY_BUDGETS, run
+
+
+def test_endpoints_stay_within_their_query_budget():
+    result = run_budget(plans=3, expenses=2)
+    assert set(result["queries"]) == set(QUERY_BUDGETS)
+    assert result["over_budget"] == {}
+
+
+def test_query_counts_do_not_grow_with_the_data():
+    small = run_budget(plans=1, expenses=1)
+    large = run_budget(plans=6, expenses=4)
+    assert large["queries"] == small["queries"]
+
+
+def run_budget(plans: int, expenses: int) -> dict:
+    return asyncio.run(run(plans, expenses))
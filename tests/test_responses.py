@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.api.responses import dumps, model_response
+from app.schemas.expense import ExpenseRead, ExpenseSummary
+
+EXPENSES = [
+    SimpleNamespace(
+        id=1,
+        plan_id=7,
+        category="餐饮",
+        amount=12.5,
+        currency="JPY",
+        note=None,
+        incurred_at=datetime(2026, 4, 1, 12, 30, tzinfo=timezone(timedelta(hours=9))),
+    ),
+    SimpleNamespace(
+        id=2,
+        plan_id=7,
+        category="Transport",
+        amount=3,
+        currency="CNY",
+        note='say "hi"',
+        incurred_at=datetime(2026, 4, 2),
+    ),
+]
+
+SUMMARY = {
+    "plan_id": 7,
+    "expense_count": 2,
+    "by_currency": [{"currency": "JPY", "total": 12.5, "count": 1}],
+    "by_category": [],
+    "by_day": [{"day": "2026-04-01", "currency": "JPY", "total": 12.5, "count": 1}],
+    "converted": {"currency": "CNY", "total": 0.6, "count": 1, "rates_version": "abc", "unconverted_currencies": []},
+    "budget": None,
+}
+
+
+@pytest.fixture(scope="module")
+def app_client():
+    app = FastAPI()
+
+    @app.get("/standard/expenses", response_model=list[ExpenseRead])
+    def standard_expenses():
+        return EXPENSES
+
+    @app.get("/fast/expenses", response_model=list[ExpenseRead])
+    def fast_expenses(response: Response):
+        response.headers["ETag"] = '"v1"'
+        return model_response(list[ExpenseRead], EXPENSES, response=response)
+
+    @app.get("/standard/summary", response_model=ExpenseSummary)
+    def standard_summary():
+        return SUMMARY
+
+    @app.get("/fast/summary", response_model=ExpenseSummary)
+    def fast_summary():
+        return model_response(ExpenseSummary, SUMMARY, status_code=201)
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["expenses", "summary"])
+def test_model_responses_match_what_fastapi_would_send(app_client, path):
+    standard = app_client.get(f"/standard/{path}")
+    fast = app_client.get(f"/fast/{path}")
+    assert fast.json() == standard.json()
+    assert fast.headers["Content-Type"] == "application/json"
+
+
+def test_headers_and_status_are_kept(app_client):
+    assert app_client.get("/fast/expenses").headers["ETag"] == '"v1"'
+    assert app_client.get("/fast/summary").status_code == 201
+
+
+def test_dumps_is_compact_utf8_json():
+    content = {"title": "京都", "days": [1, 2.5, None, True]}
+    assert dumps(content) == json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
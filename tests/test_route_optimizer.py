@@ -0,0 +1,85 @@
+import itertools
+import random
+
+import pytest
+
+from app.services import route_optimizer
+from app.services.route_optimizer import (
+    _feasible,
+    haversine_matrix,
+    optimize_day,
+    path_length,
+    shortest_order,
+    slot_minute,
+)
+
+SLOTS = [None, None, None, "Morning", "14:30", "晚上", "Lunch"]
+
+
+def random_day(rng, count, slotted):
+    points = [(35.0 + rng.random() * 0.1, 135.7 + rng.random() * 0.1) for _ in range(count)]
+    slots = [slot_minute(rng.choice(SLOTS)) if slotted else None for _ in range(count)]
+    return haversine_matrix(points), slots
+
+
+@pytest.mark.parametrize("slotted", [False, True])
+def test_the_result_is_never_longer_than_a_valid_original(slotted):
+    rng = random.Random(20260418)
+    for count in range(2, 16):
+        for _ in range(10):
+            matrix, slots = random_day(rng, count, slotted)
+            order = shortest_order(matrix, slots)
+            assert sorted(order) == list(range(count))
+            assert _feasible(order, slots)
+            original = list(range(count))
+            if _feasible(original, slots):
+                assert path_length(order, matrix) <= path_length(original, matrix) + 1e-9
+
+
+def test_small_days_are_close_to_optimal():
+    rng = random.Random(7)
+    for _ in range(20):
+        matrix, slots = random_day(rng, 7, slotted=False)
+        optimal = min(path_length(order, matrix) for order in itertools.permutations(range(7)))
+        assert path_length(shortest_order(matrix, slots), matrix) <= optimal * 1.05
+
+
+POINTS = [(35.0116, 135.7681), (34.9671, 135.7727), (35.0394, 135.7292), (-33.8688, 151.2093)]
+
+
+def test_distances_are_great_circle_kilometres():
+    matrix = haversine_matrix(POINTS)
+    assert matrix[0][3] == pytest.approx(7_826, rel=0.01)  # Kyoto to Sydney
+    assert all(matrix[i][j] == pytest.approx(matrix[j][i]) for i in range(4) for j in range(4))
+    assert [matrix[i][i] for i in range(4)] == [0.0] * 4
+
+
+def test_numpy_and_pure_python_distances_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    vectorized = haversine_matrix(POINTS)
+    monkeypatch.setattr(route_optimizer, "NUMPY_AVAILABLE", False)
+    for row, expected in zip(haversine_matrix(POINTS), vectorized):
+        assert row == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize(
+    ("value", "minute"),
+    [("Late afternoon", 17 * 60), ("2:30 pm", 14 * 60 + 30), ("14：05", 14 * 60 + 5), ("晚上", 19 * 60), ("", None)],
+)
+def test_slot_names_and_clock_times(value, minute):
+    assert slot_minute(value) == minute
+
+
+def test_unlocated_activities_keep_their_place():
+    activities = [
+        {"title": "A", "latitude": 35.00, "longitude": 135.70},
+        {"title": "Check in"},
+        {"title": "B", "latitude": 35.10, "longitude": 135.80},
+        {"title": "C", "latitude": 35.01, "longitude": 135.71},
+        {"title": "D", "latitude": 35.11, "longitude": 135.81},
+    ]
+    reordered, order, before, after = optimize_day(activities)
+    assert reordered[1] == {"title": "Check in"}
+    assert [activity["title"] for activity in reordered] == ["A", "Check in", "C", "B", "D"]
+    assert order == [0, 1, 3, 2, 4]
+    assert after < before
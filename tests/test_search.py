@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+from app.services.plan_search import fts5_query, query_terms
+
+
+def test_queries_are_split_into_quoted_terms():
+    assert query_terms('Ramen "OR" 拉面店, kyoto*') == ["ramen", "or", "拉面店", "kyoto"]
+    assert fts5_query(query_terms("拉面 kyo")) == '"拉 面" "kyo"*'
+
+
+def search(client, headers, q):
+    response = client.get("/api/v1/plans/search", headers=headers, params={"q": q})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def other_user(client):
+    credentials = {"email": f"{uuid.uuid4().hex}@example.com", "password": "secret123"}
+    assert client.post("/api/v1/auth/register", json=credentials).status_code == 201
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def noted_plan(client, auth_headers, plan):
+    note = f"Find the tiny ramen counter near the station {uuid.uuid4().hex} 拉面馆"
+    response = client.patch(f"/api/v1/plans/{plan['id']}", headers=auth_headers, json={"notes": note})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_owners_find_their_plans_by_notes_prefixes_and_cjk(client, auth_headers, noted_plan):
+    for q in ("ramen counter", "rame", "拉面"):
+        hits = search(client, auth_headers, q)
+        assert [hit["id"] for hit in hits] == [noted_plan["id"]], q
+    snippet = next(s for s in search(client, auth_headers, "ramen")[0]["snippets"] if s["field"] == "notes")
+    assert "<mark>ramen</mark>" in snippet["text"]
+
+
+def test_other_users_only_find_their_own_plans(client, noted_plan):
+    token = noted_plan["notes"].split()[-2]
+    headers = other_user(client)
+    assert search(client, headers, token) == []
+    own = client.post(
+        "/api/v1/plans/generate",
+        headers=headers,
+        json={"destination": "Osaka", "duration_days": 1, "notes": f"Also {token}", "bypass_cache": True},
+    )
+    assert own.status_code == 201, own.text
+    assert [hit["id"] for hit in search(client, headers, token)] == [own.json()["plan"]["id"]]
+
+
+def test_the_index_follows_edits_and_deletes(client, auth_headers, noted_plan):
+    token = noted_plan["notes"].split()[-2]
+    url = f"/api/v1/plans/{noted_plan['id']}"
+    assert client.patch(url, headers=auth_headers, json={"notes": "Okonomiyaki instead"}).status_code == 200
+    assert search(client, auth_headers, token) == []
+    assert [hit["id"] for hit in search(client, auth_headers, "okonomiyaki")] == [noted_plan["id"]]
+    assert client.delete(url, headers=auth_headers).status_code == 204
+    assert search(client, auth_headers, "okonomiyaki") == []
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution_and_get_their_own_copy():
+    flights: SingleFlight[dict] = SingleFlight()
+    executions = 0
+
+    async def generate():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return {"days": [{"activities": ["Fushimi Inari"]}]}
+
+    async def caller():
+        result, leader = await flights.do("kyoto", generate)
+        result["days"][0]["activities"].append("mine")  # must not leak into the other callers
+        return result, leader
+
+    async def run():
+        return await asyncio.gather(*(caller() for _ in range(5)))
+
+    outcomes = asyncio.run(run())
+    assert executions == 1
+    assert [leader for _, leader in outcomes].count(True) == 1
+    assert all(result == {"days": [{"activities": ["Fushimi Inari", "mine"]}]} for result, _ in outcomes)
+    assert len({id(result) for result, _ in outcomes}) == 5
+    assert flights.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "inflight": 0}
+
+
+def test_different_keys_do_not_coalesce():
+    flights: SingleFlight[str] = SingleFlight()
+
+    async def run():
+        return await asyncio.gather(*(flights.do(key, lambda key=key: asyncio.sleep(0, key)) for key in "ab"))
+
+    assert asyncio.run(run()) == [("a", True), ("b", True)]
+    assert flights.executions == 2
+
+
+def test_failures_reach_every_caller_and_are_not_remembered():
+    flights: SingleFlight[str] = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        failures = await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+        retried = await flights.do("k", lambda: asyncio.sleep(0, "ok"))
+        return failures, retried
+
+    failures, retried = asyncio.run(run())
+    assert all(isinstance(failure, RuntimeError) for failure in failures)
+    assert retried == ("ok", True)
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flights: SingleFlight[str] = SingleFlight()
+
+    async def generate():
+        await asyncio.sleep(0.05)
+        return "plan"
+
+    async def run():
+        first = asyncio.ensure_future(flights.do("k", generate))
+        second = asyncio.ensure_future(flights.do("k", generate))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == ("plan", False)